@@ -7,21 +7,31 @@ import os
 from config import Config
 from routes.profile import profile_bp, init_profile_routes
 from routes.resources import resources_bp, init_resources_routes
+from routes.jobs import jobs_bp, init_jobs_routes
+from routes.autocomplete import autocomplete_bp, init_autocomplete_routes
+from routes.admin import admin_bp, init_admin_routes
+from services.job_queue import JobQueue
+from services.ranking_service import RankingService
+from services.review_service import ReviewService
+from auth_middleware import limit_by_ip
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 
-# Set maximum file upload size (50MB)
-app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
+# Set maximum request size (individual files are still capped by Config.MAX_FILE_SIZE)
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_REQUEST_SIZE
+
+# Per-IP admission control runs before every request (per-user limits run in verify_token)
+app.before_request(limit_by_ip)
 
 # Configure CORS - Allow all origins in development
 CORS(app, resources={
     r"/api/*": {
         "origins": ["http://localhost:3000", "http://localhost:3001", Config.FRONTEND_URL],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization", "Accept"],
-        "expose_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Authorization", "Accept", "Content-Range"],
+        "expose_headers": ["Content-Type", "Authorization", "Retry-After"],
         "supports_credentials": True,
         "max_age": 3600
     }
@@ -39,16 +49,8 @@ try:
 except Exception as e:
     print(f"❌ Error initializing Firebase: {e}")
 
-# Initialize MongoDB
-try:
-    mongo_client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
-    db = mongo_client.notehub
-    
-    # Test connection
-    mongo_client.admin.command('ping')
-    print("✅ MongoDB connected successfully")
-    
-    # Create indexes
+def create_indexes(db):
+    """Create the indexes of every collection"""
     db.profiles.create_index('uid', unique=True)
     db.profiles.create_index('email')
     
@@ -57,16 +59,70 @@ try:
     db.resources.create_index('tags')
     db.resources.create_index('resource_type')
     db.resources.create_index('created_at')
+    db.resources.create_index('file_id')
+    db.resources.create_index('preview_file_id', sparse=True)
+    db.resources.create_index([('trend_log', -1), ('created_at', -1)])
+    db.resources.create_index('import_key', unique=True, sparse=True)
+    db.resources.create_index('updated_at')  # Incremental exports
+    db.resources.create_index([('uid', 1), ('updated_at', 1)])  # My-resources delta sync
+    
+    # Create indexes for deleted-resource tombstones (delta sync), expired after the retention period
+    db.resource_tombstones.create_index([('uid', 1), ('deleted_at', 1)])
+    db.resource_tombstones.create_index('deleted_at', expireAfterSeconds=Config.SYNC_TOMBSTONE_RETENTION_DAYS * 24 * 60 * 60)
+    
+    # Create index for deleted-review tombstones (incremental exports), expired after the same period
+    db.review_tombstones.create_index('deleted_at', expireAfterSeconds=Config.SYNC_TOMBSTONE_RETENTION_DAYS * 24 * 60 * 60)
+    
+    # Create indexes for reviews collection (one review per user and resource)
+    ReviewService.create_indexes(db)
+    
+    # Create index for per-user download records (co-download similarity)
+    db.user_downloads.create_index([('uid', 1), ('resource_id', 1)], unique=True)
+    db.user_downloads.create_index('resource_id')
+    
+    # Create indexes for the popular/rated/trending ranking table
+    RankingService.create_indexes(db)
     
-    print("✅ Database indexes created")
+    # Create indexes for resumable upload sessions
+    db.upload_sessions.create_index('uid')
+    db.upload_sessions.create_index('expires_at')
+    db.upload_sessions.create_index('file_id')
+    
+    # Create index for deleted profiles awaiting cleanup of their resources
+    db.deleted_profiles.create_index('uid', unique=True)
+    
+    # Create indexes for the background job queue
+    JobQueue.create_indexes(db)
+
+# Initialize MongoDB
+try:
+    mongo_client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
+    db = mongo_client.notehub
+    
+    # Test connection
+    mongo_client.admin.command('ping')
+    print("✅ MongoDB connected successfully")
+    
+    # Create indexes; routes are registered even if this fails
+    try:
+        create_indexes(db)
+        print("✅ Database indexes created")
+    except Exception as e:
+        print(f"⚠️  Warning: Failed to create database indexes - {e}")
     
     # Initialize routes with database
     init_profile_routes(db)
     init_resources_routes(db)
+    init_jobs_routes(db)
+    init_autocomplete_routes(db)
+    init_admin_routes(db)
     
     # Register blueprints
     app.register_blueprint(profile_bp)
     app.register_blueprint(resources_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(autocomplete_bp)
+    app.register_blueprint(admin_bp)
     print("✅ Database routes initialized")
     
 except Exception as e:
@@ -103,11 +159,33 @@ def root():
             },
             'resources': {
                 'upload': 'POST /api/resources/upload',
+                'bulk-upload': 'POST /api/resources/bulk-upload',
+                'resumable-upload': {
+                    'create': 'POST /api/resources/uploads',
+                    'status': 'GET /api/resources/uploads/:session_id',
+                    'chunk': 'PUT /api/resources/uploads/:session_id',
+                    'complete': 'POST /api/resources/uploads/:session_id/complete',
+                    'abort': 'DELETE /api/resources/uploads/:session_id'
+                },
                 'my-resources': 'GET /api/resources/my-resources',
                 'get': 'GET /api/resources/:id',
                 'download': 'GET /api/resources/download/:id',
+                'preview': 'GET /api/resources/preview/:id',
+                'related': 'GET /api/resources/:id/related',
+                'browse': 'GET /api/resources/browse',
+                'facets': 'GET /api/resources/facets',
                 'update': 'PUT /api/resources/:id',
-                'delete': 'DELETE /api/resources/:id'
+                'delete': 'DELETE /api/resources/:id',
+                'bulk-update': 'POST /api/resources/bulk-update',
+                'bulk-delete': 'POST /api/resources/bulk-delete'
+            },
+            'jobs': {
+                'status': 'GET /api/jobs/:id'
+            },
+            'autocomplete': 'GET /api/autocomplete/:field?q=prefix (tags, subjects, colleges)',
+            'admin': {
+                'export': 'GET /api/admin/export/:kind?since=timestamp (resources, reviews, files, deletions)',
+                'import': 'POST /api/admin/import/:kind'
             }
         }
     }), 200
@@ -1,7 +1,97 @@
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, make_response
 import firebase_admin
 from firebase_admin import auth
+from config import Config
+from services.rate_limiter import TokenBucketLimiter, ConcurrencyLimiter
+import math
+
+# Endpoints that move file contents; they draw on the smaller transfer budget
+TRANSFER_ENDPOINTS = {
+    'resources.upload_resource',
+    'resources.bulk_upload_resources',
+    'resources.download_resource',
+    'resources.view_resource',
+    'admin.export_library',
+    'admin.import_library'
+}
+
+# Endpoints charged by request body size against the upload byte budget
+UPLOAD_BYTES_ENDPOINTS = {
+    'resources.upload_chunk'
+}
+
+# Admission control state of this worker process
+uid_limiters = {
+    'metadata': TokenBucketLimiter(Config.RATE_LIMIT_UID_METADATA_RATE, Config.RATE_LIMIT_UID_METADATA_BURST),
+    'transfer': TokenBucketLimiter(Config.RATE_LIMIT_UID_TRANSFER_RATE, Config.RATE_LIMIT_UID_TRANSFER_BURST),
+    'upload_bytes': TokenBucketLimiter(Config.RATE_LIMIT_UID_UPLOAD_BYTES_RATE, Config.RATE_LIMIT_UID_UPLOAD_BYTES_BURST)
+}
+ip_limiters = {
+    'metadata': TokenBucketLimiter(Config.RATE_LIMIT_IP_METADATA_RATE, Config.RATE_LIMIT_IP_METADATA_BURST),
+    'transfer': TokenBucketLimiter(Config.RATE_LIMIT_IP_TRANSFER_RATE, Config.RATE_LIMIT_IP_TRANSFER_BURST),
+    'upload_bytes': TokenBucketLimiter(Config.RATE_LIMIT_IP_UPLOAD_BYTES_RATE, Config.RATE_LIMIT_IP_UPLOAD_BYTES_BURST)
+}
+stream_limiter = ConcurrencyLimiter(Config.MAX_CONCURRENT_FILE_STREAMS)
+
+def _request_budget():
+    """Budget the current request draws on: 'upload_bytes', 'transfer' or 'metadata'"""
+    if request.endpoint in UPLOAD_BYTES_ENDPOINTS:
+        return 'upload_bytes'
+    return 'transfer' if request.endpoint in TRANSFER_ENDPOINTS else 'metadata'
+
+def _acquire(limiters, key):
+    """Charge the current request to its budget; returns seconds to wait, or 0 if admitted"""
+    budget = _request_budget()
+    limiter = limiters[budget]
+    cost = 1.0
+    if budget == 'upload_bytes':
+        # A request larger than the bucket is admitted once the bucket is full
+        cost = min(max(request.content_length or 0, 1), limiter.burst)
+    return limiter.acquire(key, cost)
+
+def _rejection(status_code, message, retry_after):
+    """Fast error response telling the client when to retry"""
+    response = make_response(jsonify({'error': message}), status_code)
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def limit_by_ip():
+    """
+    Per-IP rate limit, registered with app.before_request
+    Returns a 429 response when the client's IP is over its budget, otherwise None
+    (behind a proxy, wrap the app in ProxyFix so remote_addr is the client address)
+    """
+    if not Config.RATE_LIMIT_ENABLED or request.method == 'OPTIONS' or request.endpoint in (None, 'health_check'):
+        return None
+    
+    wait = _acquire(ip_limiters, request.remote_addr or 'unknown')
+    if wait:
+        return _rejection(429, 'Too many requests from this address', wait)
+    return None
+
+def limit_concurrent_streams(f):
+    """
+    Decorator capping file responses streamed at once by this process (Config.MAX_CONCURRENT_FILE_STREAMS)
+    The slot is held until the response body has been sent; requests over the cap get a 503
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method == 'OPTIONS':
+            return f(*args, **kwargs)
+        
+        if not stream_limiter.try_acquire():
+            return _rejection(503, 'Server is busy sending files; please retry shortly', Config.STREAM_RETRY_AFTER)
+        
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            stream_limiter.release()
+            raise
+        response.call_on_close(stream_limiter.release)
+        return response
+    
+    return decorated_function
 
 def verify_token(f):
     """
@@ -35,6 +125,12 @@ def verify_token(f):
             request.email = decoded_token.get('email')
             request.user_data = decoded_token
             
+            # Per-user rate limit, checked once the user is known
+            if Config.RATE_LIMIT_ENABLED:
+                wait = _acquire(uid_limiters, request.uid)
+                if wait:
+                    return _rejection(429, 'Too many requests; please slow down', wait)
+            
             return f(*args, **kwargs)
             
         except auth.InvalidIdTokenError:
@@ -48,6 +144,23 @@ def verify_token(f):
     
     return decorated_function
 
+def require_admin(f):
+    """
+    Decorator restricting a route to the users listed in Config.ADMIN_UIDS
+    Apply below verify_token, which sets request.uid
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method == 'OPTIONS':
+            return jsonify({'status': 'ok'}), 200
+        
+        if getattr(request, 'uid', None) not in Config.ADMIN_UIDS:
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        return f(*args, **kwargs)
+    
+    return decorated_function
+
 def get_current_user():
     """
     Get current authenticated user from request context
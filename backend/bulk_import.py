@@ -0,0 +1,265 @@
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from config import Config
+from models import Resource, UserProfile
+from services.storage_service import StorageService
+from services.ranking_service import RankingService
+from services.job_queue import JobQueue
+import multiprocessing
+import mimetypes
+import argparse
+import hashlib
+import csv
+import os
+import re
+import sys
+
+# Metadata columns read from the CSV; 'file' holds the path relative to the files directory.
+# Branch and college come from the owner's profile, as for HTTP uploads (private
+# resources are only served to students of the uploader's college)
+METADATA_COLUMNS = ['title', 'subject', 'semester', 'resource_type', 'year', 'description',
+                    'tags', 'privacy']
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Storage service of a pool worker process
+worker_storage_service = None
+
+def _init_worker():
+    """Connect a pool worker to the database (MongoClient is not fork-safe)"""
+    global worker_storage_service
+    mongo_client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
+    worker_storage_service = StorageService(mongo_client.notehub)
+
+def _file_id_for(import_key, file_hash):
+    """
+    Deterministic ObjectId for an imported file
+    
+    A rerun after a crash finds the file stored by the previous run instead of
+    storing a second copy; a file whose content changed gets a new id.
+    """
+    return ObjectId(hashlib.sha1(f"{import_key}:{file_hash}".encode('utf-8')).digest()[:12])
+
+def store_file(task):
+    """
+    Hash a local file and stream it into storage (runs in a pool worker)
+    
+    Args:
+        task: dict with path, file_name, file_type, file_size, uid and import_key
+    
+    Returns:
+        tuple: (file_id, file_hash, error_message)
+    """
+    try:
+        digest = hashlib.sha256()
+        with open(task['path'], 'rb') as local_file:
+            while True:
+                block = local_file.read(1024 * 1024)
+                if not block:
+                    break
+                digest.update(block)
+        file_hash = digest.hexdigest()
+        file_id = _file_id_for(task['import_key'], file_hash)
+        
+        if not worker_storage_service.file_exists(str(file_id)):
+            # Clear chunks left by a run that died while storing this file
+            worker_storage_service.delete_file(str(file_id))
+            with open(task['path'], 'rb') as local_file:
+                worker_storage_service.store_stream(
+                    local_file,
+                    task['file_size'],
+                    filename=task['file_name'],
+                    content_type=task['file_type'],
+                    metadata={'uid': task['uid'], 'uploaded_at': datetime.utcnow(), 'import_key': task['import_key']},
+                    file_id=file_id
+                )
+        return str(file_id), file_hash, None
+    except Exception as e:
+        return None, None, str(e)
+
+def parse_row(row, files_dir, uid):
+    """
+    Validate a CSV row and turn it into an import task
+    
+    Returns:
+        tuple: (task, form_data, error_message)
+    """
+    form_data = {column: row[column].strip() for column in METADATA_COLUMNS if (row.get(column) or '').strip()}
+    if 'tags' in form_data:
+        form_data['tags'] = [tag.strip() for tag in re.split(r'[;,]', form_data['tags']) if tag.strip()]
+    
+    is_valid, error_msg = Resource.validate_resource_data(form_data)
+    if not is_valid:
+        return None, None, error_msg
+    
+    relative_path = (row.get('file') or '').strip()
+    if not relative_path:
+        return None, None, "Missing required field: file"
+    path = os.path.join(files_dir, relative_path)
+    if not os.path.isfile(path):
+        return None, None, f"File not found: {relative_path}"
+    
+    file_name = os.path.basename(relative_path)
+    file_size = os.path.getsize(path)
+    file_type = (row.get('file_type') or '').strip() or mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+    is_valid, error_msg = Resource.validate_file(file_name, file_size, file_type)
+    if not is_valid:
+        return None, None, error_msg
+    
+    task = {
+        'path': path,
+        'file_name': file_name,
+        'file_type': file_type,
+        'file_size': file_size,
+        'uid': uid,
+        # The same owner importing the same path is the same resource
+        'import_key': hashlib.sha1(f"{uid}\0{os.path.normpath(relative_path)}".encode('utf-8')).hexdigest()
+    }
+    return task, form_data, None
+
+def build_document(task, form_data, file_id, file_hash, branch, college, uploader):
+    """Build the resource document of an imported file (same shape as an HTTP upload)"""
+    current_time = datetime.utcnow()
+    resource_data = Resource.sanitize_resource_data(form_data)
+    resource_data.update(uploader)
+    resource_data.update({
+        'uid': task['uid'],
+        'branch': branch,
+        'college': college,
+        'file_id': file_id,
+        'file_name': task['file_name'],
+        'file_size': task['file_size'],
+        'file_type': task['file_type'],
+        'file_hash': file_hash,
+        'import_key': task['import_key'],
+        'views': 0,
+        'downloads': 0,
+        'ratings': [],
+        'avg_rating': 0.0,
+        'preview_status': 'pending',
+        'created_at': current_time,
+        'updated_at': current_time
+    })
+    return resource_data
+
+def import_batch(db, pool, batch, branch, college, uploader, counts):
+    """Store the files of a batch in parallel and insert their resources in one round trip"""
+    # Rows imported by an earlier run are skipped without touching their files
+    existing = {
+        resource['import_key']
+        for resource in db.resources.find({'import_key': {'$in': [task['import_key'] for task, _ in batch]}}, {'import_key': 1})
+    }
+    pending = [(task, form_data) for task, form_data in batch if task['import_key'] not in existing]
+    counts['existing'] += len(batch) - len(pending)
+    if not pending:
+        return
+    
+    documents = []
+    for (task, form_data), (file_id, file_hash, error) in zip(pending, pool.map(store_file, [task for task, _ in pending])):
+        if error:
+            print(f"Error storing {task['path']}: {error}")
+            counts['failed'] += 1
+            continue
+        documents.append(build_document(task, form_data, file_id, file_hash, branch, college, uploader))
+    if not documents:
+        return
+    
+    failed_positions = set()
+    try:
+        db.resources.insert_many(documents, ordered=False)
+    except BulkWriteError as bwe:
+        for error in bwe.details.get('writeErrors', []):
+            failed_positions.add(error['index'])
+            if error.get('code') == DUPLICATE_KEY_ERROR:
+                # Imported concurrently by another run
+                counts['existing'] += 1
+            else:
+                print(f"Error inserting {documents[error['index']]['file_name']}: {error.get('errmsg')}")
+                counts['failed'] += 1
+    
+    inserted = [document for position, document in enumerate(documents) if position not in failed_positions]
+    counts['imported'] += len(inserted)
+    if not inserted:
+        return
+    
+    RankingService(db).sync_resources(inserted)
+    
+    # The hash is already known; previews and text extraction run in the worker
+    job_queue = JobQueue(db)
+    for document in inserted:
+        for job_type, priority in (('generate_preview', JobQueue.PRIORITY_LOW), ('extract_text', JobQueue.PRIORITY_LOW)):
+            job_queue.enqueue(
+                job_type,
+                {'resource_id': str(document['_id'])},
+                priority=priority,
+                idempotency_key=f"{job_type}:{document['_id']}",
+                uid=document['uid']
+            )
+
+def main():
+    """Parse arguments and run the import"""
+    parser = argparse.ArgumentParser(description='Import a folder of files described by a CSV of resource metadata')
+    parser.add_argument('csv_path', help=f"CSV with a 'file' column and resource metadata columns ({', '.join(METADATA_COLUMNS)})")
+    parser.add_argument('--uid', required=True, help='Firebase UID of the owner of the imported resources')
+    parser.add_argument('--files-dir', help='Directory the file paths are relative to (defaults to the CSV directory)')
+    parser.add_argument('--workers', type=int, default=Config.BULK_IMPORT_WORKERS, help='Processes hashing and storing files')
+    parser.add_argument('--batch-size', type=int, default=Config.BULK_IMPORT_BATCH_SIZE, help='Rows inserted per batch')
+    parser.add_argument('--dry-run', action='store_true', help='Only validate the CSV and files')
+    args = parser.parse_args()
+    
+    files_dir = args.files_dir or os.path.dirname(os.path.abspath(args.csv_path))
+    counts = {'imported': 0, 'existing': 0, 'invalid': 0, 'failed': 0}
+    
+    rows = []
+    seen_keys = set()
+    with open(args.csv_path, newline='', encoding='utf-8-sig') as csv_file:
+        # Header is line 1
+        for line, row in enumerate(csv.DictReader(csv_file), start=2):
+            task, form_data, error_msg = parse_row(row, files_dir, args.uid)
+            if error_msg:
+                print(f"⚠️  Line {line}: {error_msg}")
+                counts['invalid'] += 1
+                continue
+            if task['import_key'] in seen_keys:
+                print(f"⚠️  Line {line}: {row['file']} is listed more than once; skipping")
+                counts['invalid'] += 1
+                continue
+            seen_keys.add(task['import_key'])
+            rows.append((task, form_data))
+    
+    print(f"📄 {len(rows)} valid rows, {counts['invalid']} invalid")
+    if args.dry_run or not rows:
+        return 1 if counts['invalid'] else 0
+    
+    mongo_client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
+    db = mongo_client.notehub
+    db.resources.create_index('import_key', unique=True, sparse=True)
+    
+    profile = db.profiles.find_one({'uid': args.uid})
+    if not profile:
+        print(f"❌ No profile found for uid {args.uid}; the owner must create a profile before importing")
+        mongo_client.close()
+        return 1
+    branch = profile.get('branch', 'General')
+    college = profile.get('college', 'Unknown')
+    uploader = UserProfile.uploader_fields(profile)
+    
+    print(f"\n📥 Importing with {args.workers} workers...")
+    # Spawned workers open their own connections instead of inheriting this one
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker) as pool:
+        for start in range(0, len(rows), args.batch_size):
+            import_batch(db, pool, rows[start:start + args.batch_size], branch, college, uploader, counts)
+            print(f"   {min(start + args.batch_size, len(rows))}/{len(rows)} rows processed")
+    
+    print(f"✅ Imported: {counts['imported']}, already imported: {counts['existing']}, "
+          f"invalid: {counts['invalid']}, failed: {counts['failed']}")
+    
+    mongo_client.close()
+    return 1 if counts['invalid'] or counts['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,6 +18,9 @@ class Config:
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
     PORT = int(os.getenv('PORT', 5000))
     
+    # Admin Configuration
+    ADMIN_UIDS = [uid.strip() for uid in os.getenv('ADMIN_UIDS', '').split(',') if uid.strip()]  # Firebase UIDs allowed to use /api/admin
+    
     # CORS Configuration
     FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3001')
     
@@ -45,5 +48,172 @@ class Config:
         '.jpg', '.jpeg', '.png', '.gif', '.webp', '.txt'
     ]
     
+    # Bulk Upload Configuration
+    MAX_BULK_UPLOAD_FILES = int(os.getenv('MAX_BULK_UPLOAD_FILES', 50))
+    BULK_UPLOAD_WORKERS = int(os.getenv('BULK_UPLOAD_WORKERS', 4))
+    MAX_REQUEST_SIZE = int(os.getenv('MAX_REQUEST_SIZE', 200 * 1024 * 1024))  # 200MB per request
+    
+    # Bulk Update/Delete Configuration
+    MAX_BULK_OPERATION_IDS = int(os.getenv('MAX_BULK_OPERATION_IDS', 100))
+    GRIDFS_DELETE_BATCH_SIZE = 100
+    
+    # Resumable Upload Configuration
+    MAX_RESUMABLE_FILE_SIZE = int(os.getenv('MAX_RESUMABLE_FILE_SIZE', 500 * 1024 * 1024))  # 500MB
+    UPLOAD_SESSION_TTL_HOURS = int(os.getenv('UPLOAD_SESSION_TTL_HOURS', 24))
+    UPLOAD_COMPLETE_TIMEOUT = 10 * 60  # Seconds after which a complete request that never finished loses its claim
+    UPLOAD_SESSION_GC_INTERVAL = 15 * 60  # Seconds between background sweeps of abandoned sessions
+    
+    # Preview Configuration
+    PREVIEW_MAX_DIMENSION = 480  # Longest side of image/PDF previews in pixels
+    PREVIEW_TEXT_LENGTH = 2000  # Characters kept in text previews
+    PREVIEW_CACHE_MAX_AGE = 24 * 60 * 60  # Seconds clients may cache a preview
+    
+    # Background Job Configuration
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))  # Worker processes started by worker.py
+    JOB_POLL_INTERVAL = 1.0  # Seconds an idle worker waits before polling again
+    JOB_SCHEDULER_INTERVAL = 30  # Seconds between scheduling rounds for periodic jobs
+    JOB_MAX_ATTEMPTS = 5
+    JOB_RETRY_BASE_DELAY = 10  # Seconds before the first retry, doubled on each attempt
+    JOB_RETRY_MAX_DELAY = 60 * 60
+    JOB_LOCK_TIMEOUT = 15 * 60  # Seconds before a running job is assumed abandoned
+    JOB_HEARTBEAT_INTERVAL = 60  # Seconds between lock refreshes of a running job by its worker
+    JOB_RETENTION_DAYS = 7  # Finished jobs are removed after this many days
+    
+    # Maintenance Configuration
+    COUNTER_FLUSH_INTERVAL = 5  # Seconds between batched view/download counter writes
+    ORPHAN_CLEANUP_INTERVAL = 6 * 60 * 60  # Seconds between orphan file sweeps
+    ORPHAN_GRACE_HOURS = 24  # Unreferenced files and chunks younger than this are left alone
+    ORPHAN_PROFILE_GRACE_DAYS = 7  # Resources of a deleted profile are removed after this many days
+    ORPHAN_GC_BATCH_SIZE = 500  # Items checked per batch by the orphan collector
+    ORPHAN_GC_PAUSE = 0.1  # Seconds the orphan collector sleeps between batches
+    
+    # Full-Content Search Configuration
+    SEARCH_INDEX_DIR = os.getenv('SEARCH_INDEX_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_index'))
+    SEARCH_MAX_SEGMENTS = 16  # Small segments are merged once there are more than this
+    SEARCH_MAX_CONTENT_HITS = 500  # Content matches considered per search request
+    MAX_EXTRACTED_TEXT_LENGTH = 2 * 1024 * 1024  # Characters of text indexed per file
+    
+    # Browse Cache Configuration
+    FACET_CACHE_SIZE = 1024  # Facet results kept per process
+    FACET_CACHE_TTL = 5 * 60  # Seconds a facet result stays valid (counters change without invalidation)
+    
+    # Ranking Configuration
+    RANKING_REBUILD_INTERVAL = 24 * 60 * 60  # Seconds between full ranking table rebuilds (safety net)
+    BROWSE_MAX_PAGE_SIZE = 100  # Largest page size accepted by browse
+    
+    # Trending Configuration
+    TRENDING_HALF_LIFE_HOURS = 72  # Hours for an event's contribution to the trending score to halve
+    TRENDING_VIEW_WEIGHT = 1
+    TRENDING_DOWNLOAD_WEIGHT = 3
+    TRENDING_REVIEW_WEIGHT = 5
+    
+    # Related Resources Configuration
+    RELATED_TOP_K = 30  # Neighbors stored per resource (more than served, to survive access filtering)
+    RELATED_MAX_RESULTS = 10  # Related resources returned by the API
+    RELATED_CO_DOWNLOAD_WEIGHT = 0.3  # Share of co-download similarity in the blended score
+    RELATED_BLOCK_SIZE = 500  # Resources scored per sparse matrix product
+    # Features on more than this share of the library (e.g. a branch or semester) tell little about
+    # similarity and make every block product nearly dense, so they are left out...
+    RELATED_MAX_FEATURE_SHARE = 0.01
+    RELATED_MIN_FEATURE_LIMIT = 1000  # ...unless they are on fewer resources than this
+    RELATED_REBUILD_INTERVAL = 6 * 60 * 60  # Seconds between similarity recomputations
+    
+    # Autocomplete Configuration
+    AUTOCOMPLETE_MAX_RESULTS = 10
+    AUTOCOMPLETE_SCAN_LIMIT = 1000  # Most prefix matches ranked per query (bounds latency of short prefixes)
+    AUTOCOMPLETE_REFRESH_INTERVAL = 300  # Seconds before the in-process indexes are rebuilt from the database
+    
+    # Browse Cache Configuration
+    BROWSE_CACHE_SIZE = 512  # Cached browse result pages per process
+    BROWSE_CACHE_TTL = 30  # Seconds (bounds staleness of view/download counts)
+    
+    # Request Coalescing Configuration
+    SINGLE_FLIGHT_TIMEOUT = 30  # Seconds a request waits for an identical in-flight request
+    
+    # File Cache Configuration
+    FILE_CACHE_DIR = os.getenv('FILE_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'file_cache'))
+    FILE_CACHE_MAX_BYTES = int(os.getenv('FILE_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))  # 2GB; 0 disables the cache
+    FILE_CACHE_MAX_FILE_SIZE = int(os.getenv('FILE_CACHE_MAX_FILE_SIZE', 100 * 1024 * 1024))  # Larger files are streamed from storage in blocks
+    FILE_CACHE_EVICT_GRACE = 60  # Seconds after its last use a cached file is safe from eviction (covers X-Sendfile/X-Accel hand-off)
+    FILE_CACHE_STALE_FILL_AGE = 60 * 60  # Seconds after which an unfinished fill is assumed abandoned and removed
+    
+    # File Serving Configuration
+    # 'sendfile': cached files go through the WSGI server's file wrapper (sendfile under gunicorn/uWSGI)
+    # 'x-sendfile': Apache/lighttpd send the file named in the X-Sendfile header
+    # 'x-accel-redirect': nginx sends the file from the internal location X_ACCEL_REDIRECT_PREFIX,
+    #                     which must alias FILE_CACHE_DIR
+    # 'stream': Python streams the memory-mapped file
+    FILE_SERVING_MODE = os.getenv('FILE_SERVING_MODE', 'sendfile')
+    X_ACCEL_REDIRECT_PREFIX = os.getenv('X_ACCEL_REDIRECT_PREFIX', '/protected-files')
+    USE_X_SENDFILE = FILE_SERVING_MODE == 'x-sendfile'  # Read by Flask's send_file
+    
+    # Storage Backend Configuration
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'gridfs')  # 'gridfs' or 'local'; new files are written here
+    LOCAL_STORAGE_DIR = os.getenv('LOCAL_STORAGE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'storage'))
+    
+    # Storage Policy Configuration
+    # Types compressed before storage and decompressed on the fly when read
+    # (PDFs and images are already compressed; DOCX/PPTX often hold parts stored without compression)
+    STORAGE_COMPRESSED_TYPES = [
+        'text/plain',
+        'text/csv',
+        'text/markdown',
+        'text/html',
+        'application/json',
+        'application/xml',
+        'application/rtf',
+        'application/msword',
+        'application/vnd.ms-powerpoint',
+        'application/vnd.ms-excel',
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+    ]
+    STORAGE_COMPRESSION_LEVEL = 6  # zlib level (1 = fastest, 9 = smallest)
+    # GridFS chunk size per content type; an entry ending in '/' matches the whole type family
+    STORAGE_CHUNK_SIZES = {
+        'application/pdf': 1024 * 1024,  # Large documents: fewer chunk documents and round trips per file
+        'image/': 64 * 1024  # Small images: range reads and previews fetch less per chunk
+    }
+    STORAGE_DEFAULT_CHUNK_SIZE = 255 * 1024  # GridFS default
+    
+    # Bulk Import Configuration
+    BULK_IMPORT_WORKERS = int(os.getenv('BULK_IMPORT_WORKERS', os.cpu_count() or 4))  # Processes hashing and storing files
+    BULK_IMPORT_BATCH_SIZE = 100  # Rows stored and inserted per batch
+    
+    # Streaming Response Configuration
+    NDJSON_BATCH_SIZE = 200  # Documents fetched from the cursor and written per chunk of an NDJSON response
+    
+    # Delta Sync Configuration
+    SYNC_CURSOR_OVERLAP = 5  # Seconds re-read before a my-resources sync cursor to catch late commits
+    SYNC_TOMBSTONE_RETENTION_DAYS = 30  # Deletions kept for syncing clients; older cursors get a full reset
+    
+    # Rate Limiting Configuration
+    # Token buckets per worker process: rate = sustained requests per second, burst = bucket size.
+    # File transfers (uploads, downloads, views, exports) have their own, smaller budget.
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_UID_METADATA_RATE = 10
+    RATE_LIMIT_UID_METADATA_BURST = 40
+    RATE_LIMIT_UID_TRANSFER_RATE = 0.5
+    RATE_LIMIT_UID_TRANSFER_BURST = 10
+    # Resumable upload chunks draw on a budget in bytes (a request costs its body size)
+    RATE_LIMIT_UID_UPLOAD_BYTES_RATE = 32 * 1024 * 1024
+    RATE_LIMIT_UID_UPLOAD_BYTES_BURST = 128 * 1024 * 1024
+    # Per IP limits are looser: a campus network shares few addresses
+    RATE_LIMIT_IP_METADATA_RATE = 50
+    RATE_LIMIT_IP_METADATA_BURST = 200
+    RATE_LIMIT_IP_TRANSFER_RATE = 5
+    RATE_LIMIT_IP_TRANSFER_BURST = 50
+    RATE_LIMIT_IP_UPLOAD_BYTES_RATE = 256 * 1024 * 1024
+    RATE_LIMIT_IP_UPLOAD_BYTES_BURST = 1024 * 1024 * 1024
+    MAX_CONCURRENT_FILE_STREAMS = int(os.getenv('MAX_CONCURRENT_FILE_STREAMS', 32))  # Per process; further downloads get a 503
+    STREAM_RETRY_AFTER = 2  # Seconds clients are told to wait when file streaming is saturated
+    
+    # Review Configuration
+    REVIEWS_PAGE_SIZE = 20  # Reviews returned per page when no limit is given
+    REVIEWS_MAX_PAGE_SIZE = 100  # Largest page size accepted for reviews
+    
+    # Uploader Info Configuration
+    UPLOADER_SYNC_BATCH_SIZE = 500  # Resources updated per batch when an uploader changes their name or college
+    
     # GridFS Configuration
     GRIDFS_COLLECTION = 'fs'  # Default GridFS collection prefix
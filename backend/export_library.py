@@ -0,0 +1,118 @@
+from pymongo import MongoClient
+from config import Config
+from services.storage_service import StorageService
+from services.export_service import ExportService, EXPORT_COLLECTIONS, DELETIONS_EXPORT
+from datetime import datetime
+import argparse
+import json
+import os
+import sys
+
+MANIFEST_NAME = 'manifest.json'
+
+def export_library(export_service, out_dir, since=None):
+    """
+    Write resources.ndjson, reviews.ndjson, files.tar and manifest.json to out_dir
+    (plus deletions.ndjson for an incremental export)
+    
+    Returns:
+        dict: The manifest; its started_at is the since of the next incremental export
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    started_at = datetime.utcnow()
+    counts = {}
+    
+    for collection in EXPORT_COLLECTIONS:
+        counts[collection] = 0
+        with open(os.path.join(out_dir, f'{collection}.ndjson'), 'wb') as out_file:
+            for line in export_service.iter_ndjson(collection, since):
+                out_file.write(line)
+                counts[collection] += 1
+        print(f"   {counts[collection]} {collection}")
+    
+    with open(os.path.join(out_dir, 'files.tar'), 'wb') as out_file:
+        for block in export_service.iter_files_tar(since):
+            out_file.write(block)
+    print("   files.tar written")
+    
+    if since:
+        counts[DELETIONS_EXPORT] = 0
+        with open(os.path.join(out_dir, f'{DELETIONS_EXPORT}.ndjson'), 'wb') as out_file:
+            for line in export_service.iter_deletions(since):
+                out_file.write(line)
+                counts[DELETIONS_EXPORT] += 1
+        print(f"   {counts[DELETIONS_EXPORT]} deletions")
+    
+    manifest = {
+        'started_at': started_at.isoformat(),
+        'since': since.isoformat() if since else None,
+        'counts': counts
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+def import_library(export_service, in_dir):
+    """Import an export directory written by export_library (resources, reviews, files, then deletions)"""
+    for collection in EXPORT_COLLECTIONS:
+        path = os.path.join(in_dir, f'{collection}.ndjson')
+        if os.path.exists(path):
+            with open(path, 'rb') as in_file:
+                print(f"   {export_service.import_ndjson(collection, in_file)} {collection} imported")
+    
+    path = os.path.join(in_dir, 'files.tar')
+    if os.path.exists(path):
+        with open(path, 'rb') as in_file:
+            counts = export_service.import_files_tar(in_file)
+        print(f"   {counts['restored']} files restored, {counts['skipped']} already present")
+    
+    path = os.path.join(in_dir, f'{DELETIONS_EXPORT}.ndjson')
+    if os.path.exists(path):
+        with open(path, 'rb') as in_file:
+            counts = export_service.import_deletions(in_file)
+        print(f"   {counts['resources']} resources and {counts['reviews']} reviews deleted")
+
+def main():
+    """Parse arguments and run the export or import"""
+    parser = argparse.ArgumentParser(description='Export or import resources, reviews and files')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    export_parser = subparsers.add_parser('export', help='Write an export directory')
+    export_parser.add_argument('out_dir', help='Directory to write the export to')
+    export_parser.add_argument('--since', help='Only export documents updated at or after this ISO timestamp')
+    export_parser.add_argument('--after', help="Export directory of a previous run; exports what changed since it started")
+    
+    import_parser = subparsers.add_parser('import', help='Import an export directory')
+    import_parser.add_argument('in_dir', help='Directory written by export')
+    args = parser.parse_args()
+    
+    since = None
+    if args.command == 'export':
+        if args.after:
+            with open(os.path.join(args.after, MANIFEST_NAME)) as manifest_file:
+                since = datetime.fromisoformat(json.load(manifest_file)['started_at'])
+        elif args.since:
+            since = datetime.fromisoformat(args.since)
+    
+    if since and since < ExportService.oldest_incremental_since():
+        print("❌ --since is older than the deletion retention (SYNC_TOMBSTONE_RETENTION_DAYS); take a full export")
+        return 1
+    
+    mongo_client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
+    db = mongo_client.notehub
+    export_service = ExportService(db, StorageService(db))
+    
+    if args.command == 'export':
+        print(f"\n📤 Exporting to {args.out_dir}" + (f" (changes since {since.isoformat()})" if since else ''))
+        manifest = export_library(export_service, args.out_dir, since)
+        print(f"✅ Export complete; next incremental export: --since {manifest['started_at']}")
+    else:
+        print(f"\n📥 Importing from {args.in_dir}")
+        import_library(export_service, args.in_dir)
+        print("✅ Import complete")
+    
+    mongo_client.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+from pymongo import MongoClient
+from config import Config
+from services.storage_service import StorageService
+from services.orphan_collector import OrphanCollector
+import argparse
+import sys
+
+SECTION_LABELS = {
+    'resources': 'resources of deleted profiles',
+    'reviews': 'reviews of deleted resources',
+    'downloads': 'downloads of deleted resources',
+    'files': 'unreferenced files',
+    'chunks': 'GridFS chunks without a file'
+}
+
+def print_report(report):
+    """Print what each sweep scanned and found (or deleted)"""
+    verb = 'found' if report['dry_run'] else 'deleted'
+    for section, label in SECTION_LABELS.items():
+        row = report[section]
+        print(f"\n🧹 {label}: {row['orphans']} {verb} of {row['scanned']} scanned")
+        if row.get('error'):
+            print(f"   ❌ Sweep failed: {row['error']}")
+        for orphan in row['sample']:
+            print(f"   - {orphan}")
+        if row.get('without_profile'):
+            print(f"   ⚠️  {row['without_profile']} resources belong to users who never had a profile (not deleted)")
+
+def main():
+    """Parse arguments and run the orphan collector"""
+    parser = argparse.ArgumentParser(description='Remove files, chunks, reviews and resources that nothing references')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+    parser.add_argument('--batch-size', type=int, default=Config.ORPHAN_GC_BATCH_SIZE, help='Items checked per batch')
+    parser.add_argument('--pause', type=float, default=Config.ORPHAN_GC_PAUSE, help='Seconds to sleep between batches')
+    args = parser.parse_args()
+    
+    mongo_client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
+    db = mongo_client.notehub
+    collector = OrphanCollector(db, StorageService(db), batch_size=args.batch_size, pause=args.pause)
+    
+    print("🔍 Dry run: nothing will be deleted" if args.dry_run else "🗑️  Collecting orphans")
+    print_report(collector.collect(dry_run=args.dry_run))
+    
+    mongo_client.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+from pymongo import MongoClient
+from config import Config
+from services.storage_service import StorageService
+from services.storage_backends import BACKEND_NAMES
+import argparse
+import sys
+
+def migrate(storage_service, source, target, keep_source=False, dry_run=False, limit=None):
+    """
+    Copy every file from the source backend to the target backend
+    
+    Safe to run while the application is serving: readers look in every
+    backend, and each source copy is only removed after the target copy
+    has been verified. Rerunning after an interruption resumes where it
+    stopped, since files already moved are no longer in the source.
+    """
+    counts = {'copied': 0, 'present': 0, 'missing': 0, 'failed': 0}
+    
+    # Materialize the ids first; deleting while iterating a cursor can skip files
+    file_ids = list(storage_service.backends[source].iter_file_ids())
+    if limit:
+        file_ids = file_ids[:limit]
+    
+    print(f"📦 {len(file_ids)} files in {source}")
+    if dry_run:
+        return counts
+    
+    for number, file_id in enumerate(file_ids, start=1):
+        try:
+            status = storage_service.migrate_file(file_id, source, target, delete_source=not keep_source)
+            counts[status] += 1
+        except Exception as e:
+            print(f"Error migrating file {file_id}: {e}")
+            counts['failed'] += 1
+        
+        if number % 100 == 0:
+            print(f"   {number}/{len(file_ids)} files processed")
+    
+    return counts
+
+def main():
+    """Parse arguments and run the migration"""
+    parser = argparse.ArgumentParser(description='Move stored files between storage backends')
+    parser.add_argument('--from', dest='source', choices=BACKEND_NAMES, required=True, help='Backend to copy from')
+    parser.add_argument('--to', dest='target', choices=BACKEND_NAMES, required=True, help='Backend to copy to')
+    parser.add_argument('--keep-source', action='store_true', help='Leave the source copies in place')
+    parser.add_argument('--limit', type=int, help='Migrate at most this many files')
+    parser.add_argument('--dry-run', action='store_true', help='Only count the files to migrate')
+    args = parser.parse_args()
+    
+    if args.source == args.target:
+        parser.error('Source and target backends must differ')
+    
+    if Config.STORAGE_BACKEND != args.target and not args.keep_source:
+        print(f"⚠️  Warning: STORAGE_BACKEND is '{Config.STORAGE_BACKEND}'; new uploads will keep going to it")
+    
+    mongo_client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
+    storage_service = StorageService(mongo_client.notehub)
+    
+    print(f"\n🚚 Migrating files from {args.source} to {args.target}...")
+    counts = migrate(storage_service, args.source, args.target, args.keep_source, args.dry_run, args.limit)
+    print(f"✅ Copied: {counts['copied']}, already present: {counts['present']}, "
+          f"missing: {counts['missing']}, failed: {counts['failed']}")
+    
+    mongo_client.close()
+    return 1 if counts['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
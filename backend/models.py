@@ -84,6 +84,15 @@ class UserProfile:
         
         return True, None
     
+    @staticmethod
+    def uploader_fields(profile: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Uploader name and college copied onto the resources of a profile (None if it is missing)"""
+        profile = profile or {}
+        return {
+            'uploader_name': profile.get('name') or 'Anonymous',
+            'uploader_college': profile.get('college') or 'Unknown'
+        }
+    
     @staticmethod
     def sanitize_profile_data(data: Dict[str, Any]) -> Dict[str, Any]:
         """Sanitize and clean profile data"""
@@ -173,46 +182,51 @@ class Resource:
         }
     
     @staticmethod
-    def validate_resource_data(data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+    def validate_resource_data(data: Dict[str, Any], partial: bool = False) -> tuple[bool, Optional[str]]:
         """
         Validate resource data
+        With partial=True only the fields present are validated (used for bulk updates)
         Returns: (is_valid, error_message)
         """
         # Check required fields
         required_fields = ['title', 'subject', 'semester', 'resource_type', 'year']
         
         for field in required_fields:
+            if partial and field not in data:
+                continue
             if field not in data or not data[field]:
                 return False, f"Missing required field: {field}"
         
         # Validate title
-        if len(data['title']) < 3 or len(data['title']) > 200:
+        if 'title' in data and (len(data['title']) < 3 or len(data['title']) > 200):
             return False, "Title must be between 3 and 200 characters"
         
         # Validate subject
-        if len(data['subject']) < 2 or len(data['subject']) > 100:
+        if 'subject' in data and (len(data['subject']) < 2 or len(data['subject']) > 100):
             return False, "Subject must be between 2 and 100 characters"
         
         # Validate semester
-        try:
-            semester = int(data['semester'])
-            if semester < 1 or semester > 10:
-                return False, "Semester must be between 1 and 10"
-        except (ValueError, TypeError):
-            return False, "Semester must be a valid number"
+        if 'semester' in data:
+            try:
+                semester = int(data['semester'])
+                if semester < 1 or semester > 10:
+                    return False, "Semester must be between 1 and 10"
+            except (ValueError, TypeError):
+                return False, "Semester must be a valid number"
         
         # Validate resource type
-        if data['resource_type'] not in Resource.RESOURCE_TYPES:
+        if 'resource_type' in data and data['resource_type'] not in Resource.RESOURCE_TYPES:
             return False, f"Resource type must be one of: {', '.join(Resource.RESOURCE_TYPES)}"
         
         # Validate year
-        try:
-            year = int(data['year'])
-            current_year = datetime.now().year
-            if year < 2000 or year > current_year + 5:
-                return False, f"Year must be between 2000 and {current_year + 5}"
-        except (ValueError, TypeError):
-            return False, "Year must be a valid number"
+        if 'year' in data:
+            try:
+                year = int(data['year'])
+                current_year = datetime.now().year
+                if year < 2000 or year > current_year + 5:
+                    return False, f"Year must be between 2000 and {current_year + 5}"
+            except (ValueError, TypeError):
+                return False, "Year must be a valid number"
         
         # Validate description (optional)
         if 'description' in data and data['description']:
@@ -237,14 +251,17 @@ class Resource:
         return True, None
     
     @staticmethod
-    def validate_file(file_name: str, file_size: int, file_type: str) -> tuple[bool, Optional[str]]:
+    def validate_file(file_name: str, file_size: int, file_type: str, max_size: Optional[int] = None) -> tuple[bool, Optional[str]]:
         """
         Validate uploaded file
+        max_size overrides Config.MAX_FILE_SIZE (e.g. for resumable uploads)
         Returns: (is_valid, error_message)
         """
+        max_size = max_size or Config.MAX_FILE_SIZE
+        
         # Check file size
-        if file_size > Config.MAX_FILE_SIZE:
-            max_size_mb = Config.MAX_FILE_SIZE / (1024 * 1024)
+        if file_size > max_size:
+            max_size_mb = max_size / (1024 * 1024)
             return False, f"File size exceeds maximum allowed size of {max_size_mb}MB"
         
         # Check file type
@@ -256,8 +273,11 @@ class Resource:
         return True, None
     
     @staticmethod
-    def sanitize_resource_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        """Sanitize and clean resource data"""
+    def sanitize_resource_data(data: Dict[str, Any], partial: bool = False) -> Dict[str, Any]:
+        """
+        Sanitize and clean resource data
+        With partial=True no defaults are filled in for missing fields
+        """
         sanitized = {}
         
         # Copy only allowed fields
@@ -278,7 +298,7 @@ class Resource:
                     sanitized[field] = str(data[field]).strip()
         
         # Ensure privacy field always exists with default value
-        if 'privacy' not in sanitized:
+        if 'privacy' not in sanitized and not partial:
             sanitized['privacy'] = 'Private'
         
         return sanitized
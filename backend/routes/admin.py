@@ -0,0 +1,103 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from auth_middleware import verify_token, require_admin
+from services.storage_service import StorageService
+from services.export_service import ExportService, EXPORT_COLLECTIONS, DELETIONS_EXPORT
+from routes.autocomplete import reindex_all
+from datetime import datetime
+
+# Create blueprint
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+# Global variables (will be initialized by init function)
+db = None
+export_service = None
+
+def init_admin_routes(database):
+    """Initialize routes with database connection"""
+    global db, export_service
+    db = database
+    export_service = ExportService(db, StorageService(db))
+
+def _parse_since():
+    """
+    Parse the optional ?since= ISO timestamp of an incremental export
+    Returns: (datetime or None, error_message)
+    """
+    since = request.args.get('since')
+    if not since:
+        return None, None
+    try:
+        return datetime.fromisoformat(since.replace('Z', '+00:00')).replace(tzinfo=None), None
+    except ValueError:
+        return None, 'since must be an ISO 8601 timestamp'
+
+@admin_bp.route('/export/<kind>', methods=['GET'])
+@verify_token
+@require_admin
+def export_library(kind):
+    """
+    Stream an export: resources or reviews as NDJSON, files as a tar archive,
+    or (with since) the deletions since then as NDJSON
+    
+    The X-Export-Started-At header is the since value for the next incremental export.
+    """
+    try:
+        since, error_msg = _parse_since()
+        if error_msg:
+            return jsonify({'error': error_msg}), 400
+        if since and since < export_service.oldest_incremental_since():
+            return jsonify({'error': 'since is older than the deletion retention; take a full export'}), 400
+        
+        started_at = datetime.utcnow()
+        if kind in EXPORT_COLLECTIONS:
+            body = export_service.iter_ndjson(kind, since)
+            mimetype = 'application/x-ndjson'
+            file_name = f'{kind}.ndjson'
+        elif kind == 'files':
+            body = export_service.iter_files_tar(since)
+            mimetype = 'application/x-tar'
+            file_name = 'files.tar'
+        elif kind == DELETIONS_EXPORT:
+            if not since:
+                return jsonify({'error': 'since is required for a deletions export'}), 400
+            body = export_service.iter_deletions(since)
+            mimetype = 'application/x-ndjson'
+            file_name = f'{DELETIONS_EXPORT}.ndjson'
+        else:
+            return jsonify({'error': f"Unknown export: {kind}"}), 404
+        
+        response = Response(stream_with_context(body), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename={file_name}'
+        response.headers['X-Export-Started-At'] = started_at.isoformat()
+        return response
+    
+    except Exception as e:
+        print(f"Error exporting {kind}: {e}")
+        return jsonify({'error': 'Failed to export'}), 500
+
+@admin_bp.route('/import/<kind>', methods=['POST'])
+@verify_token
+@require_admin
+def import_library(kind):
+    """
+    Import an export produced by GET /export/<kind>, reading the request body as a stream
+    (archives larger than MAX_REQUEST_SIZE must be imported with export_library.py)
+    """
+    try:
+        if kind in EXPORT_COLLECTIONS:
+            imported = export_service.import_ndjson(kind, request.stream)
+            if kind == 'resources':
+                reindex_all()
+            return jsonify({'message': f'{imported} {kind} imported', 'imported': imported}), 200
+        if kind == 'files':
+            counts = export_service.import_files_tar(request.stream)
+            return jsonify({'message': f"{counts['restored']} files restored", **counts}), 200
+        if kind == DELETIONS_EXPORT:
+            # Apply after the documents and files of the same export
+            counts = export_service.import_deletions(request.stream)
+            return jsonify({'message': f"{counts['resources']} resources and {counts['reviews']} reviews deleted", **counts}), 200
+        return jsonify({'error': f"Unknown import: {kind}"}), 404
+    
+    except Exception as e:
+        print(f"Error importing {kind}: {e}")
+        return jsonify({'error': 'Failed to import'}), 500
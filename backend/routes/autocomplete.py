@@ -0,0 +1,64 @@
+from flask import Blueprint, request, jsonify
+from auth_middleware import verify_token
+from services.autocomplete_index import AutocompleteIndex
+from config import Config
+
+# Create blueprint
+autocomplete_bp = Blueprint('autocomplete', __name__, url_prefix='/api/autocomplete')
+
+# Global variables (will be initialized by init function)
+db = None
+autocomplete_index = None
+
+def init_autocomplete_routes(database):
+    """Initialize routes with database connection and build the prefix indexes"""
+    global db, autocomplete_index
+    db = database
+    autocomplete_index = AutocompleteIndex(db)
+
+def index_resources(resources):
+    """Add the tags and subjects of written resources to the prefix indexes"""
+    if autocomplete_index:
+        autocomplete_index.add_resources(resources)
+
+def index_resource_updates(updates):
+    """Add the tags and subjects that updates introduce; takes (stored resource, update) pairs"""
+    if autocomplete_index:
+        for previous, update in updates:
+            autocomplete_index.add_resource_update(previous, update)
+
+def reindex_all():
+    """Rebuild the prefix indexes in the background after a bulk write such as an import"""
+    if autocomplete_index:
+        autocomplete_index.refresh()
+
+def index_college(college):
+    """Add the college of a written profile to the prefix index"""
+    if autocomplete_index:
+        autocomplete_index.add_college(college)
+
+@autocomplete_bp.route('/<field>', methods=['GET'])
+@verify_token
+def autocomplete(field):
+    """
+    Suggest tags, subjects or colleges starting with the typed prefix
+    Query parameters: q (prefix), limit (optional)
+    """
+    try:
+        if field not in AutocompleteIndex.FIELDS:
+            return jsonify({'error': f"Field must be one of: {', '.join(AutocompleteIndex.FIELDS)}"}), 400
+        
+        prefix = request.args.get('q', '')
+        if not prefix.strip():
+            return jsonify({'suggestions': []}), 200
+        
+        try:
+            limit = min(int(request.args.get('limit', Config.AUTOCOMPLETE_MAX_RESULTS)), Config.AUTOCOMPLETE_MAX_RESULTS)
+        except ValueError:
+            return jsonify({'error': 'Invalid limit'}), 400
+        
+        return jsonify({'suggestions': autocomplete_index.complete(field, prefix, max(limit, 1))}), 200
+    
+    except Exception as e:
+        print(f"Error fetching autocomplete suggestions: {e}")
+        return jsonify({'error': 'Failed to fetch suggestions'}), 500
@@ -0,0 +1,33 @@
+from flask import Blueprint, request, jsonify
+from auth_middleware import verify_token
+from services.job_queue import JobQueue
+
+# Create blueprint
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+# Global variables (will be initialized by init function)
+db = None
+job_queue = None
+
+def init_jobs_routes(database):
+    """Initialize routes with database connection"""
+    global db, job_queue
+    db = database
+    job_queue = JobQueue(db)
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@verify_token
+def get_job_status(job_id):
+    """Get the status of a background job started by the authenticated user"""
+    try:
+        job = job_queue.get(job_id)
+        
+        # Jobs of other users (and maintenance jobs) are not visible
+        if not job or job.get('uid') != request.uid:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify({'job': JobQueue.serialize(job)}), 200
+    
+    except Exception as e:
+        print(f"Error fetching job status: {e}")
+        return jsonify({'error': 'Failed to fetch job status'}), 500
@@ -1,17 +1,25 @@
 from flask import Blueprint, request, jsonify
 from auth_middleware import verify_token, get_current_user
 from models import UserProfile
+from routes.autocomplete import index_college
+from services.job_queue import JobQueue
 from datetime import datetime
 
 profile_bp = Blueprint('profile', __name__)
 
 # This will be injected by app.py
 db = None
+job_queue = None
 
 def init_profile_routes(database):
     """Initialize routes with database connection"""
-    global db
+    global db, job_queue
     db = database
+    job_queue = JobQueue(db)
+
+def _sync_uploader_info(uid):
+    """Copy the user's name and college onto their resources in the background"""
+    job_queue.enqueue('sync_uploader_info', {'uid': uid}, uid=uid)
 
 @profile_bp.route('/api/profile', methods=['GET'])
 @verify_token
@@ -68,6 +76,11 @@ def create_profile():
         
         # Save to database
         result = db.profiles.insert_one(profile.to_dict())
+        index_college(sanitized_data.get('college'))
+        
+        # Resources uploaded before the profile existed (or before it was recreated) show it from now on
+        if db.resources.find_one({'uid': user['uid']}, {'_id': 1}):
+            _sync_uploader_info(user['uid'])
         
         # Get the created profile
         created_profile = db.profiles.find_one({'_id': result.inserted_id})
@@ -111,6 +124,10 @@ def update_profile():
             {'uid': user['uid']},
             {'$set': sanitized_data}
         )
+        if sanitized_data.get('college') != existing_profile.get('college'):
+            index_college(sanitized_data.get('college'))
+        if any(sanitized_data.get(field) != existing_profile.get(field) for field in ('name', 'college')):
+            _sync_uploader_info(user['uid'])
         
         # Get updated profile
         updated_profile = db.profiles.find_one({'uid': user['uid']})
@@ -138,6 +155,14 @@ def delete_profile():
         if result.deleted_count == 0:
             return jsonify({'error': 'Profile not found'}), 404
         
+        # Their resources are removed by the orphan collector after a grace period
+        db.deleted_profiles.update_one(
+            {'uid': user['uid']},
+            {'$set': {'deleted_at': datetime.utcnow()}},
+            upsert=True
+        )
+        _sync_uploader_info(user['uid'])
+        
         return jsonify({
             'success': True,
             'message': 'Profile deleted successfully'
@@ -1,11 +1,26 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context, current_app
 from auth_middleware import verify_token as verify_firebase_token
-from auth_middleware import verify_token as verify_firebase_token
-from models import Resource, Review
+from auth_middleware import limit_concurrent_streams
+from models import Resource, Review, UserProfile
 from services.storage_service import StorageService
+from services.upload_session_service import UploadSessionService
+from services.job_queue import JobQueue
+from services.counter_buffer import CounterBuffer
+from services.search_index import SearchIndex
+from services.cache import TTLCache, GenerationCounter
+from services.ranking_service import RankingService, RANKING_SORTS
+from services.trending import event_log_weight, trend_stage
+from services.similarity_service import SimilarityService
+from services.single_flight import SingleFlight
+from routes.autocomplete import index_resources, index_resource_updates
+from config import Config
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
+import json
 import io
+import os
 
 # Create blueprint
 resources_bp = Blueprint('resources', __name__, url_prefix='/api/resources')
@@ -13,12 +28,364 @@ resources_bp = Blueprint('resources', __name__, url_prefix='/api/resources')
 # Global variables (will be initialized by init function)
 db = None
 storage_service = None
+upload_session_service = None
+job_queue = None
+counter_buffer = None
+search_index = None
+ranking_service = None
+similarity_service = None
+resources_generation = None
+facet_cache = TTLCache(Config.FACET_CACHE_SIZE, Config.FACET_CACHE_TTL)
+browse_cache = TTLCache(Config.BROWSE_CACHE_SIZE, Config.BROWSE_CACHE_TTL)
+
+# Concurrent identical reads share one database/GridFS round trip
+resource_flight = SingleFlight(Config.SINGLE_FLIGHT_TIMEOUT)
+browse_flight = SingleFlight(Config.SINGLE_FLIGHT_TIMEOUT)
+file_flight = SingleFlight(Config.SINGLE_FLIGHT_TIMEOUT)
 
 def init_resources_routes(database):
     """Initialize routes with database connection"""
-    global db, storage_service
+    global db, storage_service, upload_session_service, job_queue, counter_buffer, search_index, ranking_service, similarity_service, resources_generation
     db = database
     storage_service = StorageService(db)
+    upload_session_service = UploadSessionService(db, storage_service)
+    job_queue = JobQueue(db)
+    counter_buffer = CounterBuffer(db)
+    search_index = SearchIndex()
+    ranking_service = RankingService(db)
+    similarity_service = SimilarityService(db)
+    resources_generation = GenerationCounter(db, 'resources')
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def _wants_ndjson():
+    """Check whether the client asked for a streamed NDJSON list (Accept: application/x-ndjson)"""
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def _stream_ndjson(cursor, prepare_batch, error_message):
+    """
+    Stream the documents of a cursor as NDJSON, one JSON object per line
+    
+    Documents are fetched and written Config.NDJSON_BATCH_SIZE at a time, so
+    time to first byte and memory use do not depend on the result size.
+    prepare_batch turns a list of documents into JSON-safe dicts. An error
+    after the response has started is reported as a final {"error": ...} line.
+    """
+    batch_size = Config.NDJSON_BATCH_SIZE
+    
+    def encode(documents):
+        return ''.join(current_app.json.dumps(document) + '\n' for document in prepare_batch(documents))
+    
+    def generate():
+        batch = []
+        try:
+            for document in cursor.batch_size(batch_size):
+                batch.append(document)
+                if len(batch) >= batch_size:
+                    yield encode(batch)
+                    batch = []
+            if batch:
+                yield encode(batch)
+        except Exception as e:
+            print(f"{error_message}: {e}")
+            yield current_app.json.dumps({'error': error_message}) + '\n'
+        finally:
+            cursor.close()
+    
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+def _serialize_listed_resources(resources):
+    """Make resource documents of a list response JSON-safe, in place"""
+    for resource in resources:
+        resource['_id'] = str(resource['_id'])
+        resource['created_at'] = resource['created_at'].isoformat()
+        resource['updated_at'] = resource['updated_at'].isoformat()
+        # Ensure new fields exist for display
+        resource['views'] = resource.get('views', 0)
+        resource['downloads'] = resource.get('downloads', 0)
+        resource['avg_rating'] = resource.get('avg_rating', 0.0)
+    return resources
+
+def _prepare_browse_batch(resources):
+    """
+    Serialize browse results
+    
+    Uploader name and college are stored on the resources (kept current by
+    the sync_uploader_info job), so no profiles are read here.
+    """
+    missing_uploader = UserProfile.uploader_fields(None)
+    for resource in _serialize_listed_resources(resources):
+        for field, default in missing_uploader.items():
+            resource.setdefault(field, default)
+    return resources
+
+def _record_tombstones(uid, resource_ids):
+    """Remember deleted resources so delta-syncing clients can drop their copies"""
+    deleted_at = datetime.utcnow()
+    db.resource_tombstones.insert_many([
+        {'resource_id': str(resource_id), 'uid': uid, 'deleted_at': deleted_at}
+        for resource_id in resource_ids
+    ])
+
+def _parse_sync_cursor(cursor):
+    """
+    Parse a my-resources sync cursor (the server time of the previous sync)
+    Returns: datetime; raises ValueError if malformed
+    """
+    return datetime.fromisoformat(cursor)
+
+def _get_resource_changes(uid, since):
+    """
+    Resources of a user created, updated or deleted since a sync cursor
+    
+    Changes are read from a little before the cursor (Config.SYNC_CURSOR_OVERLAP)
+    so writes that committed just after the previous sync read are not missed;
+    clients apply changes by _id, so seeing one twice is harmless.
+    Returns: (changed resources, deleted resource ids)
+    """
+    window_start = since - timedelta(seconds=Config.SYNC_CURSOR_OVERLAP)
+    changed = _serialize_listed_resources(list(
+        db.resources.find({'uid': uid, 'updated_at': {'$gt': window_start}}).sort('updated_at', 1)
+    ))
+    deleted = [
+        tombstone['resource_id']
+        for tombstone in db.resource_tombstones.find(
+            {'uid': uid, 'deleted_at': {'$gt': window_start}}, {'resource_id': 1}
+        )
+    ]
+    return changed, deleted
+
+def _invalidate_resource_caches():
+    """Invalidate cached browse data after a write to the resources collection"""
+    resources_generation.bump()
+
+def _enqueue_post_upload_jobs(resource_id, uid):
+    """
+    Queue the follow-up work for a newly uploaded resource
+    Returns: dict of job type -> job id (for the job status endpoint)
+    """
+    jobs = {}
+    post_upload_jobs = (
+        ('generate_preview', JobQueue.PRIORITY_HIGH),
+        ('hash_file', JobQueue.PRIORITY_NORMAL),
+        ('extract_text', JobQueue.PRIORITY_NORMAL)
+    )
+    for job_type, priority in post_upload_jobs:
+        job = job_queue.enqueue(
+            job_type,
+            {'resource_id': str(resource_id)},
+            priority=priority,
+            idempotency_key=f'{job_type}:{resource_id}',
+            uid=uid
+        )
+        jobs[job_type] = str(job['_id'])
+    return jobs
+
+def _parse_tags(form_data):
+    """Parse tags sent as a JSON string in multipart form data"""
+    if 'tags' in form_data and isinstance(form_data['tags'], str):
+        try:
+            form_data['tags'] = json.loads(form_data['tags'])
+        except:
+            form_data['tags'] = []
+    return form_data
+
+def _get_file_size(file):
+    """Get the size of an uploaded file without reading it into memory"""
+    file.stream.seek(0, io.SEEK_END)
+    file_size = file.stream.tell()
+    file.stream.seek(0)
+    return file_size
+
+def _get_uploader_info(uid):
+    """
+    Get branch and college of the uploader from their profile
+    Returns: (branch, college, uploader fields denormalized onto the resource)
+    """
+    user_profile = db.profiles.find_one({'uid': uid}, {'branch': 1, 'college': 1, 'name': 1})
+    branch = user_profile.get('branch', 'General') if user_profile else 'General'
+    college = user_profile.get('college', 'Unknown') if user_profile else 'Unknown'
+    return branch, college, UserProfile.uploader_fields(user_profile)
+
+def _content_search_clause(search):
+    """
+    Match resources whose extracted document text contains the search terms
+    Returns: query clause for the search $or, or None if nothing matched
+    """
+    try:
+        resource_ids = search_index.search(search, limit=Config.SEARCH_MAX_CONTENT_HITS)
+    except Exception as e:
+        # Metadata search still works without the content index
+        print(f"Error searching document text: {e}")
+        return None
+    
+    if not resource_ids:
+        return None
+    return {'_id': {'$in': [ObjectId(resource_id) for resource_id in resource_ids]}}
+
+def _find_resource(resource_id):
+    """
+    Fetch a resource by id, sharing the query with concurrent requests for the same id
+    Returns: a copy of the resource document the caller may modify, or None
+    """
+    object_id = ObjectId(resource_id)
+    resource = resource_flight.do(object_id, lambda: db.resources.find_one({'_id': object_id}))
+    return dict(resource) if resource else None
+
+def _stream_stored_file(file_id, send_options):
+    """
+    Stream a file from its storage backend in blocks, never holding it in memory whole
+    A single byte range (Range header) is read from the backend and sent with a 206
+    Returns: response, or None if the file does not exist
+    """
+    stored_file = storage_service.get_file(file_id)
+    if stored_file is None:
+        return None
+    
+    length = stored_file.length
+    byte_range = None
+    if request.range:
+        byte_range = request.range.range_for_length(length)
+        if byte_range is None:
+            stored_file.close()
+            response = Response(status=416)
+            response.headers['Content-Range'] = f'bytes */{length}'
+            return response
+        if byte_range == (0, length):
+            byte_range = None
+        else:
+            stored_file.close()
+            stored_file = storage_service.get_file(file_id, *byte_range)
+    
+    # send_file iterates over the file object; closing the response closes it
+    response = send_file(stored_file, conditional=False, **send_options)
+    response.headers['Accept-Ranges'] = 'bytes'
+    if byte_range:
+        start, end = byte_range
+        response.status_code = 206
+        response.headers['Content-Range'] = f'bytes {start}-{end - 1}/{length}'
+        response.content_length = end - start
+    else:
+        response.content_length = length
+    return response
+
+def _send_resource_file(resource, as_attachment):
+    """
+    Send a resource's file (callers check access first)
+    
+    Cached files are handed off per Config.FILE_SERVING_MODE: to the kernel
+    through the WSGI server's sendfile support, or to the fronting proxy with an
+    X-Sendfile / X-Accel-Redirect header. Concurrent cache misses share one cache fill;
+    files that are not cached are streamed from storage.
+    Returns: response, or None if the file does not exist
+    """
+    file_id = str(resource['file_id'])
+    file_hash = resource.get('file_hash')
+    send_options = {
+        'mimetype': resource['file_type'],
+        'as_attachment': as_attachment,
+        'download_name': resource['file_name']
+    }
+    
+    if storage_service.file_cache:
+        file_flight.do(('cache', file_id), lambda: storage_service.cache_file(file_id, file_hash))
+        if Config.FILE_SERVING_MODE == 'stream':
+            cached_file = storage_service.open_cached_file(file_id, file_hash)
+            if cached_file:
+                return send_file(cached_file, **send_options)
+        else:
+            cached_path = storage_service.locate_cached_file(file_id, file_hash)
+            if cached_path:
+                # X-Sendfile is emitted by send_file itself (Config.USE_X_SENDFILE)
+                response = send_file(cached_path, **send_options)
+                if Config.FILE_SERVING_MODE == 'x-accel-redirect':
+                    # nginx reads the file from its internal location
+                    response.close()
+                    response.set_data(b'')
+                    relative_path = os.path.relpath(cached_path, Config.FILE_CACHE_DIR).replace(os.sep, '/')
+                    response.headers['X-Accel-Redirect'] = f"{Config.X_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{relative_path}"
+                return response
+    
+    return _stream_stored_file(file_id, send_options)
+
+def _check_resource_access(resource, uid):
+    """
+    Check whether the user may open a resource's file
+    Private resources are only available to students from the uploader's college
+    Returns: None if allowed, otherwise a (response, status_code) tuple
+    """
+    if resource.get('privacy', 'Private') != 'Private':
+        return None
+    
+    # Get current user's college
+    current_user_profile = db.profiles.find_one({'uid': uid})
+    if not current_user_profile:
+        return jsonify({'error': 'User profile not found. Please complete your profile.'}), 403
+    
+    # Get uploader's college
+    uploader_profile = db.profiles.find_one({'uid': resource['uid']})
+    if not uploader_profile:
+        return jsonify({'error': 'Resource uploader profile not found'}), 404
+    
+    # Compare colleges (case-insensitive)
+    current_college = current_user_profile.get('college', '').strip().lower()
+    uploader_college = uploader_profile.get('college', '').strip().lower()
+    
+    if current_college != uploader_college:
+        return jsonify({
+            'error': 'Access denied. This is a private resource available only to students from the same college.'
+        }), 403
+    
+    return None
+
+def _parse_resource_ids(ids):
+    """
+    Convert a list of resource id strings to ObjectIds
+    Returns: (dict of id string -> ObjectId, list of invalid id strings)
+    """
+    valid, invalid = {}, []
+    for resource_id in ids:
+        try:
+            valid[str(resource_id)] = ObjectId(str(resource_id))
+        except Exception:
+            invalid.append(str(resource_id))
+    return valid, invalid
+
+def _get_owned_resources(object_ids, uid, projection=None):
+    """
+    Fetch resources by id in one query and split them by ownership
+    Returns: (dict of owned id -> resource, set of ids owned by someone else)
+    """
+    owned, forbidden = {}, set()
+    for resource in db.resources.find({'_id': {'$in': list(object_ids)}}, projection or {'uid': 1}):
+        if resource['uid'] == uid:
+            owned[str(resource['_id'])] = resource
+        else:
+            forbidden.add(str(resource['_id']))
+    return owned, forbidden
+
+def _build_resource_document(form_data, uid, branch, college, uploader, file_id, file_name, file_size, file_type):
+    """Build the resource document stored alongside a GridFS file"""
+    current_time = datetime.utcnow()
+    resource_data = Resource.sanitize_resource_data(form_data)
+    resource_data.update(uploader)
+    resource_data.update({
+        'uid': uid,
+        'branch': branch,
+        'college': college,
+        'file_id': str(file_id),
+        'file_name': file_name,
+        'file_size': file_size,
+        'file_type': file_type,
+        'views': 0,
+        'downloads': 0,
+        'ratings': [],
+        'avg_rating': 0.0,
+        'preview_status': 'pending',
+        'created_at': current_time,
+        'updated_at': current_time
+    })
+    return resource_data
 
 @resources_bp.route('/upload', methods=['POST'])
 @verify_firebase_token
@@ -38,15 +405,7 @@ def upload_resource():
             return jsonify({'error': 'No file selected'}), 400
         
         # Get form data
-        form_data = request.form.to_dict()
-        
-        # Parse tags from JSON string if provided
-        import json
-        if 'tags' in form_data and isinstance(form_data['tags'], str):
-            try:
-                form_data['tags'] = json.loads(form_data['tags'])
-            except:
-                form_data['tags'] = []
+        form_data = _parse_tags(request.form.to_dict())
         
         # Validate resource metadata
         is_valid, error_msg = Resource.validate_resource_data(form_data)
@@ -54,8 +413,7 @@ def upload_resource():
             return jsonify({'error': error_msg}), 400
         
         # Validate file
-        file_size = len(file.read())
-        file.seek(0)  # Reset file pointer
+        file_size = _get_file_size(file)
         
         is_valid, error_msg = Resource.validate_file(
             file.filename,
@@ -72,31 +430,23 @@ def upload_resource():
         })
         
         # Get user profile to add branch and college info
-        user_profile = db.profiles.find_one({'uid': uid})
-        branch = user_profile.get('branch', 'General') if user_profile else 'General'
-        college = user_profile.get('college', 'Unknown') if user_profile else 'Unknown'
+        branch, college, uploader = _get_uploader_info(uid)
         
         # Sanitize and prepare resource data
-        resource_data = Resource.sanitize_resource_data(form_data)
-        resource_data.update({
-            'uid': uid,
-            'branch': branch,
-            'college': college,
-            'file_id': str(file_id),
-            'file_name': file.filename,
-            'file_size': file_size,
-            'file_type': file.content_type,
-            'views': 0,
-            'downloads': 0,
-            'ratings': [],
-            'avg_rating': 0.0,
-            'created_at': datetime.utcnow(),
-            'updated_at': datetime.utcnow()
-        })
+        resource_data = _build_resource_document(
+            form_data, uid, branch, college, uploader,
+            file_id, file.filename, file_size, file.content_type
+        )
         
         # Save resource metadata to database
         result = db.resources.insert_one(resource_data)
+        ranking_service.sync_resources([resource_data])
+        index_resources([resource_data])
         resource_data['_id'] = str(result.inserted_id)
+        _invalidate_resource_caches()
+        
+        # Generate the preview and file hash in the background
+        jobs = _enqueue_post_upload_jobs(resource_data['_id'], uid)
         
         # Convert datetime objects to strings for JSON response
         resource_data['created_at'] = resource_data['created_at'].isoformat()
@@ -104,20 +454,375 @@ def upload_resource():
         
         return jsonify({
             'message': 'Resource uploaded successfully',
-            'resource': resource_data
+            'resource': resource_data,
+            'jobs': jobs
         }), 201
     
     except Exception as e:
         print(f"Error uploading resource: {e}")
         return jsonify({'error': 'Failed to upload resource'}), 500
 
+@resources_bp.route('/bulk-upload', methods=['POST'])
+@verify_firebase_token
+def bulk_upload_resources():
+    """
+    Upload several resources in one request
+    Expects files under 'files' and a JSON list of per-file metadata under 'metadata'
+    (same fields as the single upload, in the same order as the files)
+    """
+    try:
+        uid = request.uid
+        
+        files = request.files.getlist('files')
+        if not files:
+            return jsonify({'error': 'No files provided'}), 400
+        
+        if len(files) > Config.MAX_BULK_UPLOAD_FILES:
+            return jsonify({'error': f'Maximum {Config.MAX_BULK_UPLOAD_FILES} files allowed per bulk upload'}), 400
+        
+        try:
+            metadata_list = json.loads(request.form.get('metadata', '[]'))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Metadata must be a valid JSON list'}), 400
+        
+        if not isinstance(metadata_list, list) or len(metadata_list) != len(files):
+            return jsonify({'error': 'Metadata must be a list with one entry per file'}), 400
+        
+        results = [None] * len(files)
+        pending = []  # (index, file, form_data, file_size)
+        
+        # Validate every file and its metadata before touching storage
+        for index, (file, form_data) in enumerate(zip(files, metadata_list)):
+            file_name = file.filename or ''
+            if not file_name:
+                results[index] = {'index': index, 'file_name': file_name, 'success': False, 'error': 'No file selected'}
+                continue
+            
+            if not isinstance(form_data, dict):
+                results[index] = {'index': index, 'file_name': file_name, 'success': False, 'error': 'Metadata entry must be an object'}
+                continue
+            
+            form_data = _parse_tags(dict(form_data))
+            
+            is_valid, error_msg = Resource.validate_resource_data(form_data)
+            if is_valid:
+                file_size = _get_file_size(file)
+                is_valid, error_msg = Resource.validate_file(file_name, file_size, file.content_type)
+            
+            if not is_valid:
+                results[index] = {'index': index, 'file_name': file_name, 'success': False, 'error': error_msg}
+                continue
+            
+            pending.append((index, file, form_data, file_size))
+        
+        # Stream valid files into GridFS concurrently
+        uploaded_at = datetime.utcnow()
+        upload_results = storage_service.upload_files(
+            [(file, {'uid': uid, 'uploaded_at': uploaded_at}) for _, file, _, _ in pending],
+            max_workers=Config.BULK_UPLOAD_WORKERS
+        )
+        
+        # Look up the uploader's profile once for the whole batch
+        branch, college, uploader = _get_uploader_info(uid)
+        
+        documents = []
+        stored = []  # (index, file_id, resource_data) aligned with documents
+        for (index, file, form_data, file_size), (file_id, error) in zip(pending, upload_results):
+            if error:
+                print(f"Error storing bulk upload file {file.filename}: {error}")
+                results[index] = {'index': index, 'file_name': file.filename, 'success': False, 'error': 'Failed to store file'}
+                continue
+            
+            resource_data = _build_resource_document(
+                form_data, uid, branch, college, uploader,
+                file_id, file.filename, file_size, file.content_type
+            )
+            documents.append(resource_data)
+            stored.append((index, file_id, resource_data))
+        
+        # Save all resource metadata in one round trip
+        failed_positions = set()
+        if documents:
+            try:
+                db.resources.insert_many(documents, ordered=False)
+            except BulkWriteError as bwe:
+                failed_positions = {error['index'] for error in bwe.details.get('writeErrors', [])}
+            inserted = [document for position, document in enumerate(documents) if position not in failed_positions]
+            ranking_service.sync_resources(inserted)
+            index_resources(inserted)
+            _invalidate_resource_caches()
+        
+        for position, (index, file_id, resource_data) in enumerate(stored):
+            if position in failed_positions:
+                # Do not leave the stored file behind without its metadata
+                storage_service.delete_file(str(file_id))
+                results[index] = {'index': index, 'file_name': resource_data['file_name'], 'success': False, 'error': 'Failed to save resource metadata'}
+                continue
+            
+            resource_data['_id'] = str(resource_data['_id'])
+            resource_data['created_at'] = resource_data['created_at'].isoformat()
+            resource_data['updated_at'] = resource_data['updated_at'].isoformat()
+            results[index] = {
+                'index': index,
+                'file_name': resource_data['file_name'],
+                'success': True,
+                'resource': resource_data,
+                # Generate the preview and file hash in the background
+                'jobs': _enqueue_post_upload_jobs(resource_data['_id'], uid)
+            }
+        
+        uploaded_count = sum(1 for result in results if result['success'])
+        failed_count = len(results) - uploaded_count
+        
+        if uploaded_count == 0:
+            status_code = 400
+        elif failed_count:
+            status_code = 207
+        else:
+            status_code = 201
+        
+        return jsonify({
+            'message': f'{uploaded_count} of {len(results)} resources uploaded successfully',
+            'uploaded': uploaded_count,
+            'failed': failed_count,
+            'results': results
+        }), status_code
+    
+    except Exception as e:
+        print(f"Error bulk uploading resources: {e}")
+        return jsonify({'error': 'Failed to upload resources'}), 500
+
+def _serialize_upload_session(session):
+    """Convert an upload session document into a JSON-safe status dict"""
+    return {
+        'session_id': str(session['_id']),
+        'file_name': session['file_name'],
+        'file_size': session['file_size'],
+        'chunk_size': session['chunk_size'],
+        'committed_offset': session['committed_offset'],
+        'complete': session['committed_offset'] >= session['file_size'],
+        'expires_at': session['expires_at'].isoformat()
+    }
+
+def _parse_upload_offset():
+    """
+    Get the byte offset of a chunk from the Content-Range header
+    ("bytes <start>-<end>/<total>") or the 'offset' query parameter
+    Returns: offset or None if missing/invalid
+    """
+    content_range = request.headers.get('Content-Range')
+    try:
+        if content_range:
+            unit, _, byte_range = content_range.partition(' ')
+            if unit != 'bytes':
+                return None
+            return int(byte_range.split('-')[0])
+        return int(request.args.get('offset', ''))
+    except (ValueError, TypeError):
+        return None
+
+@resources_bp.route('/uploads', methods=['POST'])
+@verify_firebase_token
+def create_upload_session():
+    """
+    Start a resumable upload
+    Expects JSON with file_name, file_size, file_type and the resource metadata
+    """
+    try:
+        uid = request.uid
+        data = request.json or {}
+        
+        file_name = str(data.get('file_name', '')).strip()
+        file_type = str(data.get('file_type', '')).strip()
+        try:
+            file_size = int(data.get('file_size'))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'File size must be a valid number'}), 400
+        
+        if not file_name:
+            return jsonify({'error': 'No file selected'}), 400
+        if file_size <= 0:
+            return jsonify({'error': 'File is empty'}), 400
+        
+        form_data = {key: value for key, value in data.items() if key not in ('file_name', 'file_size', 'file_type')}
+        
+        # Validate resource metadata
+        is_valid, error_msg = Resource.validate_resource_data(form_data)
+        if not is_valid:
+            return jsonify({'error': error_msg}), 400
+        
+        # Validate file
+        is_valid, error_msg = Resource.validate_file(
+            file_name,
+            file_size,
+            file_type,
+            max_size=Config.MAX_RESUMABLE_FILE_SIZE
+        )
+        if not is_valid:
+            return jsonify({'error': error_msg}), 400
+        
+        session = upload_session_service.create_session(uid, form_data, file_name, file_size, file_type)
+        
+        return jsonify({
+            'message': 'Upload session created',
+            'session': _serialize_upload_session(session)
+        }), 201
+    
+    except Exception as e:
+        print(f"Error creating upload session: {e}")
+        return jsonify({'error': 'Failed to create upload session'}), 500
+
+@resources_bp.route('/uploads/<session_id>', methods=['GET'])
+@verify_firebase_token
+def get_upload_session(session_id):
+    """Get the committed offset of a resumable upload"""
+    try:
+        session = upload_session_service.get_session(session_id, request.uid)
+        if not session:
+            return jsonify({'error': 'Upload session not found'}), 404
+        
+        return jsonify({'session': _serialize_upload_session(session)}), 200
+    
+    except Exception as e:
+        print(f"Error fetching upload session: {e}")
+        return jsonify({'error': 'Failed to fetch upload session'}), 500
+
+@resources_bp.route('/uploads/<session_id>', methods=['PUT'])
+@verify_firebase_token
+def upload_chunk(session_id):
+    """
+    Append raw bytes to a resumable upload
+    The offset must equal the committed offset reported by the session
+    """
+    try:
+        session = upload_session_service.get_session(session_id, request.uid)
+        if not session:
+            return jsonify({'error': 'Upload session not found'}), 404
+        
+        offset = _parse_upload_offset()
+        if offset is None:
+            return jsonify({'error': 'A valid offset or Content-Range header is required'}), 400
+        
+        if offset != session['committed_offset']:
+            return jsonify({
+                'error': 'Offset does not match the committed offset',
+                'session': _serialize_upload_session(session)
+            }), 409
+        
+        if request.content_length and offset + request.content_length > session['file_size']:
+            return jsonify({'error': 'Chunk extends past the declared file size'}), 400
+        
+        # Chunks are read from the request body and written to GridFS one at a time
+        session['committed_offset'] = upload_session_service.write_chunks(session, offset, request.stream)
+        
+        return jsonify({'session': _serialize_upload_session(session)}), 200
+    
+    except Exception as e:
+        print(f"Error uploading chunk: {e}")
+        return jsonify({'error': 'Failed to upload chunk'}), 500
+
+@resources_bp.route('/uploads/<session_id>/complete', methods=['POST'])
+@verify_firebase_token
+def complete_upload_session(session_id):
+    """Finalize a resumable upload and create the resource"""
+    try:
+        uid = request.uid
+        
+        session = upload_session_service.get_session(session_id, uid)
+        if not session:
+            return jsonify({'error': 'Upload session not found'}), 404
+        
+        if session['committed_offset'] < session['file_size']:
+            return jsonify({
+                'error': 'Upload is not complete',
+                'session': _serialize_upload_session(session)
+            }), 409
+        
+        # Concurrent completes would both insert the GridFS file document
+        session = upload_session_service.claim_session(session)
+        if not session:
+            return jsonify({'error': 'Upload is already being completed'}), 409
+        
+        try:
+            # Make the uploaded chunks visible as a GridFS file (once; retries reuse it)
+            file_id = upload_session_service.complete_session(session)
+            
+            # Get user profile to add branch and college info
+            branch, college, uploader = _get_uploader_info(uid)
+            
+            resource_data = _build_resource_document(
+                session['form_data'], uid, branch, college, uploader,
+                file_id, session['file_name'], session['file_size'], session['file_type']
+            )
+            
+            # Save resource metadata to database
+            result = db.resources.insert_one(resource_data)
+        except Exception:
+            # Let the client retry the completion
+            upload_session_service.release_session(session)
+            raise
+        
+        ranking_service.sync_resources([resource_data])
+        index_resources([resource_data])
+        upload_session_service.delete_session(session)
+        _invalidate_resource_caches()
+        
+        resource_data['_id'] = str(result.inserted_id)
+        
+        # Generate the preview and file hash in the background
+        jobs = _enqueue_post_upload_jobs(resource_data['_id'], uid)
+        resource_data['created_at'] = resource_data['created_at'].isoformat()
+        resource_data['updated_at'] = resource_data['updated_at'].isoformat()
+        
+        return jsonify({
+            'message': 'Resource uploaded successfully',
+            'resource': resource_data,
+            'jobs': jobs
+        }), 201
+    
+    except Exception as e:
+        print(f"Error completing upload session: {e}")
+        return jsonify({'error': 'Failed to complete upload'}), 500
+
+@resources_bp.route('/uploads/<session_id>', methods=['DELETE'])
+@verify_firebase_token
+def abort_upload_session(session_id):
+    """Abort a resumable upload and discard its chunks"""
+    try:
+        session = upload_session_service.get_session(session_id, request.uid)
+        if not session:
+            return jsonify({'error': 'Upload session not found'}), 404
+        
+        if upload_session_service.is_completing(session):
+            return jsonify({'error': 'Upload is being completed'}), 409
+        
+        upload_session_service.delete_session(session, discard_chunks=True)
+        
+        return jsonify({'message': 'Upload session aborted'}), 200
+    
+    except Exception as e:
+        print(f"Error aborting upload session: {e}")
+        return jsonify({'error': 'Failed to abort upload session'}), 500
+
 @resources_bp.route('/my-resources', methods=['GET'])
 @verify_firebase_token
 def get_my_resources():
-    """Get all resources uploaded by the authenticated user"""
+    """
+    Get all resources uploaded by the authenticated user
+    With Accept: application/x-ndjson the resources are streamed one per line
+    
+    Every JSON response carries a cursor. Passing it back as ?since=<cursor>
+    returns only the resources created or updated since, plus the ids of
+    deleted ones; a cursor older than the tombstone retention gets the full
+    list with reset=true.
+    """
     try:
         uid = request.uid
         
+        since = request.args.get('since')
+        if since:
+            return _sync_my_resources(uid, since)
+        
         # Get query parameters for filtering
         resource_type = request.args.get('type')
         semester = request.args.get('semester')
@@ -133,48 +838,65 @@ def get_my_resources():
             query['semester'] = int(semester)
         
         if search:
-            # Search in title, subject, and tags
+            # Search in title, subject, tags and document text
             query['$or'] = [
                 {'title': {'$regex': search, '$options': 'i'}},
                 {'subject': {'$regex': search, '$options': 'i'}},
                 {'tags': {'$regex': search, '$options': 'i'}}
             ]
+            content_clause = _content_search_clause(search)
+            if content_clause:
+                query['$or'].append(content_clause)
         
-        # Fetch resources
-        resources = list(db.resources.find(query).sort('created_at', -1))
+        cursor = db.resources.find(query).sort('created_at', -1)
+        if _wants_ndjson():
+            return _stream_ndjson(cursor, _serialize_listed_resources, 'Failed to fetch resources')
         
-        # Convert ObjectId and datetime to strings
-        for resource in resources:
-            resource['_id'] = str(resource['_id'])
-            resource['created_at'] = resource['created_at'].isoformat()
-            resource['updated_at'] = resource['updated_at'].isoformat()
-            # Ensure new fields exist for display
-            resource['views'] = resource.get('views', 0)
-            resource['downloads'] = resource.get('downloads', 0)
-            resource['avg_rating'] = resource.get('avg_rating', 0.0)
+        # Fetch resources
+        sync_cursor = datetime.utcnow().isoformat()
+        resources = _serialize_listed_resources(list(cursor))
         
-        return jsonify({'resources': resources}), 200
+        return jsonify({'resources': resources, 'cursor': sync_cursor}), 200
     
     except Exception as e:
         print(f"Error fetching resources: {e}")
         return jsonify({'error': 'Failed to fetch resources'}), 500
 
+def _sync_my_resources(uid, since):
+    """Delta response of get_my_resources for a sync cursor"""
+    try:
+        since = _parse_sync_cursor(since)
+    except ValueError:
+        return jsonify({'error': 'Invalid sync cursor'}), 400
+    
+    if any(request.args.get(param) for param in ('type', 'semester', 'search')):
+        # A filtered copy cannot tell edits that leave the filter from deletions
+        return jsonify({'error': 'since cannot be combined with filters'}), 400
+    
+    # Read the new cursor before the changes so nothing written meanwhile is skipped next time
+    sync_cursor = datetime.utcnow().isoformat()
+    
+    if since < datetime.utcnow() - timedelta(days=Config.SYNC_TOMBSTONE_RETENTION_DAYS):
+        # Deletions that old are forgotten; the client must replace its copy
+        resources = _serialize_listed_resources(list(db.resources.find({'uid': uid}).sort('created_at', -1)))
+        return jsonify({'resources': resources, 'deleted': [], 'cursor': sync_cursor, 'reset': True}), 200
+    
+    resources, deleted = _get_resource_changes(uid, since)
+    return jsonify({'resources': resources, 'deleted': deleted, 'cursor': sync_cursor, 'reset': False}), 200
+
 @resources_bp.route('/<resource_id>', methods=['GET'])
 @verify_firebase_token
 def get_resource(resource_id):
     """Get a single resource by ID"""
     try:
         # Fetch resource
-        resource = db.resources.find_one({'_id': ObjectId(resource_id)})
+        resource = _find_resource(resource_id)
         
         if not resource:
             return jsonify({'error': 'Resource not found'}), 404
             
-        # Increment views
-        db.resources.update_one(
-            {'_id': ObjectId(resource_id)},
-            {'$inc': {'views': 1}}
-        )
+        # Increment views (written in batches by the counter buffer)
+        counter_buffer.increment(resource_id, 'views')
         resource['views'] = resource.get('views', 0) + 1
         
         # Convert ObjectId and datetime to strings
@@ -190,57 +912,33 @@ def get_resource(resource_id):
 
 @resources_bp.route('/download/<resource_id>', methods=['GET'])
 @verify_firebase_token
+@limit_concurrent_streams
 def download_resource(resource_id):
     """Download a resource file with access control"""
     try:
         uid = request.uid
         
         # Fetch resource metadata
-        resource = db.resources.find_one({'_id': ObjectId(resource_id)})
+        resource = _find_resource(resource_id)
         
         if not resource:
             return jsonify({'error': 'Resource not found'}), 404
         
         # Check access control for private resources
-        if resource.get('privacy', 'Private') == 'Private':
-            # Get current user's college
-            current_user_profile = db.profiles.find_one({'uid': uid})
-            if not current_user_profile:
-                return jsonify({'error': 'User profile not found. Please complete your profile.'}), 403
-            
-            # Get uploader's college
-            uploader_profile = db.profiles.find_one({'uid': resource['uid']})
-            if not uploader_profile:
-                return jsonify({'error': 'Resource uploader profile not found'}), 404
-            
-            # Compare colleges (case-insensitive)
-            current_college = current_user_profile.get('college', '').strip().lower()
-            uploader_college = uploader_profile.get('college', '').strip().lower()
-            
-            if current_college != uploader_college:
-                return jsonify({
-                    'error': 'Access denied. This is a private resource available only to students from the same college.'
-                }), 403
+        access_error = _check_resource_access(resource, uid)
+        if access_error:
+            return access_error
         
-        # Increment download count
-        db.resources.update_one(
-            {'_id': ObjectId(resource_id)},
-            {'$inc': {'downloads': 1}}
-        )
+        # Increment download count and record the downloader (written in batches by the counter buffer)
+        counter_buffer.record_download(uid, resource_id)
         
-        # Get file from GridFS
-        file_data = storage_service.get_file(resource['file_id'])
+        # Send file from the local cache or GridFS
+        response = _send_resource_file(resource, as_attachment=True)
         
-        if not file_data:
+        if response is None:
             return jsonify({'error': 'File not found'}), 404
         
-        # Stream file to client
-        return send_file(
-            io.BytesIO(file_data.read()),
-            mimetype=resource['file_type'],
-            as_attachment=True,
-            download_name=resource['file_name']
-        )
+        return response
     
     except Exception as e:
         print(f"Error downloading resource: {e}")
@@ -248,62 +946,87 @@ def download_resource(resource_id):
 
 @resources_bp.route('/view/<resource_id>', methods=['GET'])
 @verify_firebase_token
+@limit_concurrent_streams
 def view_resource(resource_id):
     """View a resource file inline with access control"""
     try:
         uid = request.uid
         
         # Fetch resource metadata
-        resource = db.resources.find_one({'_id': ObjectId(resource_id)})
+        resource = _find_resource(resource_id)
         
         if not resource:
             return jsonify({'error': 'Resource not found'}), 404
         
         # Check access control for private resources
-        if resource.get('privacy', 'Private') == 'Private':
-            # Get current user's college
-            current_user_profile = db.profiles.find_one({'uid': uid})
-            if not current_user_profile:
-                return jsonify({'error': 'User profile not found. Please complete your profile.'}), 403
-            
-            # Get uploader's college
-            uploader_profile = db.profiles.find_one({'uid': resource['uid']})
-            if not uploader_profile:
-                return jsonify({'error': 'Resource uploader profile not found'}), 404
-            
-            # Compare colleges (case-insensitive)
-            current_college = current_user_profile.get('college', '').strip().lower()
-            uploader_college = uploader_profile.get('college', '').strip().lower()
-            
-            if current_college != uploader_college:
-                return jsonify({
-                    'error': 'Access denied. This is a private resource available only to students from the same college.'
-                }), 403
+        access_error = _check_resource_access(resource, uid)
+        if access_error:
+            return access_error
         
-        # Increment view count
-        db.resources.update_one(
-            {'_id': ObjectId(resource_id)},
-            {'$inc': {'views': 1}}
-        )
+        # Increment view count (written in batches by the counter buffer)
+        counter_buffer.increment(resource_id, 'views')
         
-        # Get file from GridFS
-        file_data = storage_service.get_file(resource['file_id'])
+        # Send file from the local cache or GridFS
+        response = _send_resource_file(resource, as_attachment=False)
         
-        if not file_data:
+        if response is None:
             return jsonify({'error': 'File not found'}), 404
         
-        # Stream file to client
-        return send_file(
-            io.BytesIO(file_data.read()),
-            mimetype=resource['file_type'],
-            as_attachment=False,
-            download_name=resource['file_name']
-        )
+        return response
     
     except Exception as e:
         print(f"Error viewing resource: {e}")
         return jsonify({'error': 'Failed to view resource'}), 500
 
+@resources_bp.route('/preview/<resource_id>', methods=['GET'])
+@verify_firebase_token
+def preview_resource(resource_id):
+    """Serve the small preview of a resource with access control"""
+    try:
+        uid = request.uid
+        
+        # Fetch only the fields needed to serve the preview
+        resource = db.resources.find_one(
+            {'_id': ObjectId(resource_id)},
+            {'uid': 1, 'privacy': 1, 'preview_file_id': 1, 'preview_type': 1, 'preview_status': 1}
+        )
+        
+        if not resource:
+            return jsonify({'error': 'Resource not found'}), 404
+        
+        # Check access control for private resources
+        access_error = _check_resource_access(resource, uid)
+        if access_error:
+            return access_error
+        
+        if not resource.get('preview_file_id'):
+            return jsonify({
+                'error': 'Preview not available',
+                'preview_status': resource.get('preview_status', 'unsupported')
+            }), 404
+        
+        preview_data = storage_service.get_file(resource['preview_file_id'])
+        if not preview_data:
+            return jsonify({'error': 'Preview not found'}), 404
+        
+        # Previews never change once generated, so the preview file id is a stable ETag
+        response = send_file(
+            io.BytesIO(preview_data.read()),
+            mimetype=resource['preview_type'],
+            etag=resource['preview_file_id'],
+            max_age=Config.PREVIEW_CACHE_MAX_AGE,
+            conditional=True
+        )
+        
+        # Previews of private resources must not be stored by shared caches
+        response.cache_control.public = False
+        response.cache_control.private = True
+        return response
+    
+    except Exception as e:
+        print(f"Error serving preview: {e}")
+        return jsonify({'error': 'Failed to load preview'}), 500
+
 @resources_bp.route('/<resource_id>', methods=['PUT'])
 @verify_firebase_token
 def update_resource(resource_id):
@@ -338,6 +1061,9 @@ def update_resource(resource_id):
             {'_id': ObjectId(resource_id)},
             {'$set': sanitized_data}
         )
+        ranking_service.sync_ids([resource_id])
+        index_resource_updates([(resource, sanitized_data)])
+        _invalidate_resource_caches()
         
         # Fetch updated resource
         updated_resource = db.resources.find_one({'_id': ObjectId(resource_id)})
@@ -354,10 +1080,238 @@ def update_resource(resource_id):
         print(f"Error updating resource: {e}")
         return jsonify({'error': 'Failed to update resource'}), 500
 
+# Standard branches list - keep in sync with frontend
+STANDARD_BRANCHES = ['CSE', 'ECE', 'ME', 'CE', 'EE', 'IT', 'AIDS']
+
+# Filter dimensions with facet counts: resource field -> query parameter
+FACET_FIELDS = {
+    'resource_type': 'type',
+    'semester': 'semester',
+    'branch': 'branch',
+    'year': 'year',
+    'privacy': 'privacy'
+}
+
+# Query parameters that affect facet counts
+FACET_PARAMS = ['type', 'semester', 'subject', 'branch', 'year', 'privacy', 'search']
+
+# Browse parameters that select resources (privacy, sort and page are keyed separately)
+BROWSE_CACHE_PARAMS = ['type', 'semester', 'subject', 'branch', 'year', 'search']
+
+def _build_access_query(privacy, current_college):
+    """Build the access predicate: Public OR (Private AND same college), narrowed by the privacy filter"""
+    if privacy == 'Public':
+        return {'privacy': 'Public'}
+    elif privacy == 'Private':
+        # Private resources are only visible if they belong to the same college
+        return {
+            'privacy': 'Private', 
+            'college': {'$regex': f'^{current_college}$', '$options': 'i'}
+        }
+    else:
+        # All accessible: Public OR (Private AND Same College)
+        return {
+            '$or': [
+                {'privacy': 'Public'},
+                {
+                    'privacy': 'Private',
+                    'college': {'$regex': f'^{current_college}$', '$options': 'i'}
+                }
+            ]
+        }
+
+def _build_browse_filters(args):
+    """Build field filters from browse query parameters (privacy is part of the access query)"""
+    filters = {}
+    if args.get('type'):
+        filters['resource_type'] = args.get('type')
+    if args.get('semester'):
+        filters['semester'] = int(args.get('semester'))
+    if args.get('subject'):
+        filters['subject'] = {'$regex': args.get('subject'), '$options': 'i'}
+    if args.get('branch'):
+        if args.get('branch') == 'General':
+            # Filter for General OR any non-standard branch (e.g., 'business', 'commerce')
+            filters['branch'] = {'$nin': STANDARD_BRANCHES}
+        else:
+            filters['branch'] = args.get('branch')
+    if args.get('year'):
+        filters['year'] = int(args.get('year'))
+    return filters
+
+def _build_search_query(search):
+    """Build the search predicate over metadata and document text"""
+    if not search:
+        return {}
+    
+    search_query = {
+        '$or': [
+            {'title': {'$regex': search, '$options': 'i'}},
+            {'subject': {'$regex': search, '$options': 'i'}},
+            {'tags': {'$regex': search, '$options': 'i'}},
+            {'branch': {'$regex': search, '$options': 'i'}}
+        ]
+    }
+    # Also match resources whose document text contains the search terms
+    content_clause = _content_search_clause(search)
+    if content_clause:
+        search_query['$or'].append(content_clause)
+    return search_query
+
+def _combine_queries(*parts):
+    """AND together non-empty query parts"""
+    parts = [part for part in parts if part]
+    if not parts:
+        return {}
+    if len(parts) == 1:
+        return parts[0]
+    return {'$and': parts}
+
+def _parse_pagination(args):
+    """
+    Parse the optional page (1-based) and limit browse parameters
+    Returns: (skip, limit); limit 0 means no limit
+    """
+    limit = int(args.get('limit', 0))
+    page = int(args.get('page', 1))
+    if limit < 0 or page < 1:
+        raise ValueError('Page and limit must be positive')
+    limit = min(limit, Config.BROWSE_MAX_PAGE_SIZE) if limit else 0
+    return (page - 1) * limit, limit
+
+def _ranked_scopes(privacy, current_college):
+    """Ranking table scopes matching the access query of a privacy filter"""
+    if privacy == 'Public':
+        return [RankingService.public_scope()]
+    if privacy == 'Private':
+        return [RankingService.college_scope(current_college)]
+    return [RankingService.public_scope(), RankingService.college_scope(current_college)]
+
+def _fetch_ranked_resources(privacy, current_college, sort_by, skip, limit):
+    """Read a page of resources in popular/rated/trending order from the ranking table"""
+    ranked_ids = ranking_service.top(_ranked_scopes(privacy, current_college), sort_by, skip, limit)
+    found = {resource['_id']: resource for resource in db.resources.find({'_id': {'$in': ranked_ids}})}
+    return [found[resource_id] for resource_id in ranked_ids if resource_id in found]
+
+def _get_facets(current_college, args):
+    """
+    Count resources per value of every filter dimension with one $facet aggregation
+    
+    Each dimension is counted with all other active filters applied (but not its own),
+    so the counts show what selecting another value would return. Results are cached
+    per college and filter set until the next write to the resources collection.
+    """
+    cache_key = (
+        current_college,
+        tuple((param, args.get(param, '')) for param in FACET_PARAMS),
+        resources_generation.get()
+    )
+    facets = facet_cache.get(cache_key)
+    if facets is not None:
+        return facets
+    
+    privacy = args.get('privacy')
+    filters = _build_browse_filters(args)
+    
+    facet_stages = {}
+    for field in FACET_FIELDS:
+        other_filters = {key: value for key, value in filters.items() if key != field}
+        privacy_query = _build_access_query(privacy, current_college) if field != 'privacy' and privacy else {}
+        facet_stages[field] = [
+            {'$match': _combine_queries(privacy_query, other_filters)},
+            {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}},
+            {'$sort': {'count': -1, '_id': 1}}
+        ]
+    
+    pipeline = [
+        {'$match': _combine_queries(_build_access_query(None, current_college), _build_search_query(args.get('search')))},
+        {'$facet': facet_stages}
+    ]
+    result = next(db.resources.aggregate(pipeline), {})
+    
+    facets = {
+        field: [{'value': bucket['_id'], 'count': bucket['count']} for bucket in result.get(field, [])]
+        for field in FACET_FIELDS
+    }
+    facet_cache.set(cache_key, facets)
+    return facets
+
+@resources_bp.route('/facets', methods=['GET'])
+@verify_firebase_token
+def get_facets():
+    """Get resource counts for every browse filter dimension"""
+    try:
+        uid = request.uid
+        
+        # Get current user's college
+        current_user_profile = db.profiles.find_one({'uid': uid})
+        if not current_user_profile:
+            return jsonify({'error': 'User profile not found. Please complete your profile to browse resources.'}), 403
+        
+        current_college = current_user_profile.get('college', '').strip().lower()
+        
+        return jsonify({'facets': _get_facets(current_college, request.args)}), 200
+    
+    except Exception as e:
+        print(f"Error fetching facets: {e}")
+        return jsonify({'error': 'Failed to fetch facets'}), 500
+
+def _browse_cache_key(args, privacy, current_college, sort_by, skip, limit):
+    """
+    Browse cache key
+    Public-only queries do not depend on the college, so every college shares them
+    """
+    scope = 'public' if privacy == 'Public' else f"college:{current_college}:{privacy or 'all'}"
+    params = []
+    for param in BROWSE_CACHE_PARAMS:
+        value = args.get(param) or ''
+        if param in ('semester', 'year') and value:
+            # Queried as integers, so '03' and '3' are the same query
+            value = str(int(value))
+        # Everything else is keyed exactly as given: subject and search are used as
+        # regexes, where whitespace and case (\S versus \s) change the match
+        params.append(value)
+    return (scope, tuple(params), sort_by, skip, limit, resources_generation.get())
+
+def _browse_sort_order(sort_by):
+    """MongoDB sort specification of a browse sort option"""
+    if sort_by == 'popular':
+        return [('downloads', -1), ('views', -1)]
+    if sort_by == 'rated':
+        return [('avg_rating', -1), ('created_at', -1)]
+    if sort_by == 'trending':
+        return [('trend_log', -1), ('created_at', -1)]
+    return [('created_at', -1)]  # Default latest
+
+def _browse_cursor(args, privacy, current_college, sort_by, skip, limit):
+    """Cursor over the resources matching a browse query"""
+    # Query logic: 
+    # (Public OR (Private AND Same College)) AND (Filters) AND (Search)
+    final_query = _combine_queries(
+        _build_access_query(privacy, current_college),
+        _build_browse_filters(args),
+        _build_search_query(args.get('search'))
+    )
+    return db.resources.find(final_query).sort(_browse_sort_order(sort_by)).skip(skip).limit(limit)
+
+def _query_browse_resources(args, privacy, current_college, sort_by, skip, limit):
+    """Run a browse query and serialize the resources"""
+    if sort_by in RANKING_SORTS and not _build_browse_filters(args) and not args.get('search'):
+        # Unfiltered ranked pages are read in index order from the ranking table
+        resources = _fetch_ranked_resources(privacy, current_college, sort_by, skip, limit)
+    else:
+        resources = list(_browse_cursor(args, privacy, current_college, sort_by, skip, limit))
+    
+    return _prepare_browse_batch(resources)
+
 @resources_bp.route('/browse', methods=['GET'])
 @verify_firebase_token
 def browse_resources():
-    """Browse all accessible resources (public + private from same college)"""
+    """
+    Browse all accessible resources (public + private from same college)
+    With Accept: application/x-ndjson the results are streamed one per line
+    (uncached, and without facets)
+    """
     try:
         uid = request.uid
         
@@ -369,128 +1323,92 @@ def browse_resources():
         current_college = current_user_profile.get('college', '').strip().lower()
         
         # Get query parameters for filtering
-        resource_type = request.args.get('type')
-        semester = request.args.get('semester')
-        subject = request.args.get('subject')
-        branch = request.args.get('branch')
-        year = request.args.get('year')
         privacy = request.args.get('privacy')
-        search = request.args.get('search')
-        sort_by = request.args.get('sort', 'latest') # latest, popular, rated
-        
-        # Build query for accessible resources
-        # Query logic: 
-        # (Public OR (Private AND Same College)) AND (Filters)
-        
-        # Base Accessibility Query
-        # To optimize, we find same college UIDs only if we are browsing private or all
-        
-        # Base Accessibility Query
-        # Optimized to use the 'college' field directly on resources
+        sort_by = request.args.get('sort', 'latest') # latest, popular, rated, trending
+        
+        try:
+            skip, limit = _parse_pagination(request.args)
+        except ValueError:
+            return jsonify({'error': 'Invalid page or limit'}), 400
+        
+        if _wants_ndjson():
+            # Large sorts may spill to disk instead of failing the query
+            cursor = _browse_cursor(request.args, privacy, current_college, sort_by, skip, limit).allow_disk_use(True)
+            return _stream_ndjson(cursor, _prepare_browse_batch, 'Failed to browse resources')
+        
+        # Identical browse queries from the same access scope share one cached result
+        cache_key = _browse_cache_key(request.args, privacy, current_college, sort_by, skip, limit)
+        resources = browse_cache.get(cache_key)
+        if resources is None:
+            resources = browse_flight.do(
+                cache_key,
+                lambda: _query_browse_resources(request.args, privacy, current_college, sort_by, skip, limit)
+            )
+            browse_cache.set(cache_key, resources)
         
-        if privacy == 'Public':
-            access_query = {'privacy': 'Public'}
-        elif privacy == 'Private':
-            # Private resources are only visible if they belong to the same college
-            access_query = {
-                'privacy': 'Private', 
-                'college': {'$regex': f'^{current_college}$', '$options': 'i'}
-            }
-        else:
-            # All accessible: Public OR (Private AND Same College)
-            access_query = {
-                '$or': [
-                    {'privacy': 'Public'},
-                    {
-                        'privacy': 'Private',
-                        'college': {'$regex': f'^{current_college}$', '$options': 'i'}
-                    }
-                ]
-            }
+        response = {'resources': resources}
+        if limit:
+            response['page'] = skip // limit + 1
+            response['limit'] = limit
         
-        # Start constructing the final query
-        # If we have a complex search or existing $or from access_query, we need to be careful with $and
+        # Optionally include filter counts computed under the same access predicate
+        if request.args.get('facets') == 'true':
+            response['facets'] = _get_facets(current_college, request.args)
         
-        filters = {}
-        if resource_type:
-            filters['resource_type'] = resource_type
-        if semester:
-            filters['semester'] = int(semester)
-        if subject:
-            filters['subject'] = {'$regex': subject, '$options': 'i'}
-        if branch:
-            if branch == 'General':
-                # Filter for General OR any non-standard branch (e.g., 'business', 'commerce')
-                # Standard branches list - keep in sync with frontend
-                standard_branches = ['CSE', 'ECE', 'ME', 'CE', 'EE', 'IT', 'AIDS']
-                filters['branch'] = {'$nin': standard_branches}
-            else:
-                filters['branch'] = branch
-        if year:
-            filters['year'] = int(year)
-            
-        # Search query
-        search_query = {}
-        if search:
-            search_query = {
-                '$or': [
-                    {'title': {'$regex': search, '$options': 'i'}},
-                    {'subject': {'$regex': search, '$options': 'i'}},
-                    {'tags': {'$regex': search, '$options': 'i'}},
-                    {'branch': {'$regex': search, '$options': 'i'}}
-                ]
-            }
-            
-        # Combine all parts
-        # If access_query uses $or, search_query uses $or, we need to wrap them in an $and
-        
-        final_query = {'$and': []}
-        final_query['$and'].append(access_query)
-        if filters:
-            final_query['$and'].append(filters)
-        if search_query:
-            final_query['$and'].append(search_query)
-            
-        # Optimization: if $and has only one element, unwrap it. 
-        # But for safety and simplicity, keeping it wrapped is fine for MongoDB.
-        if not filters and not search_query:
-             # Just access query
-             final_query = access_query
-        
-        # Sorting
-        sort_order = [('created_at', -1)] # Default latest
-        if sort_by == 'popular':
-            sort_order = [('downloads', -1), ('views', -1)]
-        elif sort_by == 'rated':
-            sort_order = [('avg_rating', -1), ('created_at', -1)]
-        
-        # Fetch resources
-        resources = list(db.resources.find(final_query).sort(sort_order))
-        
-        # Enrich resources with uploader information
-        for resource in resources:
-            resource['_id'] = str(resource['_id'])
-            resource['created_at'] = resource['created_at'].isoformat()
-            resource['updated_at'] = resource['updated_at'].isoformat()
-            resource['views'] = resource.get('views', 0)
-            resource['downloads'] = resource.get('downloads', 0)
-            resource['avg_rating'] = resource.get('avg_rating', 0.0)
-            
-            # Get uploader profile
-            uploader_profile = db.profiles.find_one({'uid': resource['uid']})
-            if uploader_profile:
-                resource['uploader_name'] = uploader_profile.get('name', 'Anonymous')
-                resource['uploader_college'] = uploader_profile.get('college', 'Unknown')
-            else:
-                resource['uploader_name'] = 'Anonymous'
-                resource['uploader_college'] = 'Unknown'
-        
-        return jsonify({'resources': resources}), 200
+        return jsonify(response), 200
     
     except Exception as e:
         print(f"Error browsing resources: {e}")
         return jsonify({'error': 'Failed to browse resources'}), 500
 
+def _serialize_review(review):
+    """Convert a review document to JSON-serializable format"""
+    review['_id'] = str(review['_id'])
+    review['created_at'] = review['created_at'].isoformat()
+    review['updated_at'] = review['updated_at'].isoformat()
+    return review
+
+def _review_summary(resource_id):
+    """
+    Rating statistics of a resource, read from the (resource_id, rating) index
+    Returns: dict with avg_rating, review_count and a histogram of whole-star counts
+    """
+    histogram = {str(stars): 0 for stars in range(1, 6)}
+    total = count = 0
+    for bucket in db.reviews.aggregate([
+        {'$match': {'resource_id': str(resource_id)}},
+        {'$group': {'_id': {'$floor': '$rating'}, 'count': {'$sum': 1}, 'total': {'$sum': '$rating'}}}
+    ]):
+        histogram[str(int(bucket['_id']))] = bucket['count']
+        count += bucket['count']
+        total += bucket['total']
+    
+    return {
+        'avg_rating': total / count if count else 0.0,
+        'review_count': count,
+        'histogram': histogram
+    }
+
+def _parse_review_cursor(cursor):
+    """
+    Parse a reviews page cursor (<updated_at>_<review id> of the last review returned)
+    Returns: (datetime, ObjectId); raises ValueError if malformed
+    """
+    updated_at, _, review_id = cursor.rpartition('_')
+    if not ObjectId.is_valid(review_id):
+        raise ValueError('Invalid review id in cursor')
+    return datetime.fromisoformat(updated_at), ObjectId(review_id)
+
+def _upsert_review(resource_id, uid, review_data, current_time):
+    """Create or replace a user's review of a resource in one atomic write"""
+    query = {'resource_id': str(resource_id), 'uid': uid}
+    update = {'$set': review_data, '$setOnInsert': {'created_at': current_time}}
+    try:
+        return db.reviews.find_one_and_update(query, update, upsert=True, return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError:
+        # A concurrent first review by the same user won the insert; update it instead
+        return db.reviews.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+
 @resources_bp.route('/<resource_id>/reviews', methods=['POST'])
 @verify_firebase_token
 def add_review(resource_id):
@@ -511,15 +1429,9 @@ def add_review(resource_id):
         current_time = datetime.utcnow()
         
         # Check if resource exists
-        resource = db.resources.find_one({'_id': ObjectId(resource_id)})
+        resource = db.resources.find_one({'_id': ObjectId(resource_id)}, {'_id': 1})
         if not resource:
             return jsonify({'error': 'Resource not found'}), 404
-            
-        # Check if user already reviewed
-        existing_review = db.reviews.find_one({
-            'resource_id': str(resource_id),
-            'uid': uid
-        })
         
         review_data = {
             'resource_id': str(resource_id),
@@ -530,49 +1442,35 @@ def add_review(resource_id):
             'updated_at': current_time
         }
         
-        if existing_review:
-            # Update existing review
-            db.reviews.update_one(
-                {'_id': existing_review['_id']},
-                {'$set': review_data}
-            )
-        else:
-            # Create new review
-            review_data['created_at'] = current_time
-            db.reviews.insert_one(review_data)
-            
-        # Recalculate average rating for resource
-        pipeline = [
-            {'$match': {'resource_id': str(resource_id)}},
-            {'$group': {
-                '_id': '$resource_id',
-                'avg_rating': {'$avg': '$rating'},
-                'count': {'$sum': 1}
-            }}
-        ]
-        
-        stats = list(db.reviews.aggregate(pipeline))
+        # Insert the user's first review or replace their previous one
+        review = _upsert_review(resource_id, uid, review_data, current_time)
         
-        new_avg = 0.0
-        review_count = 0
-        if stats:
-            new_avg = stats[0]['avg_rating']
-            review_count = stats[0]['count']
+        # Recalculate average rating for resource
+        summary = _review_summary(resource_id)
+        new_avg = summary['avg_rating']
+        review_count = summary['review_count']
             
-        # Update resource stats
+        # Update resource stats and count the review towards trending
+        trend_update = trend_stage(event_log_weight(Config.TRENDING_REVIEW_WEIGHT))
         db.resources.update_one(
             {'_id': ObjectId(resource_id)},
-            {'$set': {
-                'avg_rating': new_avg,
-                'review_count': review_count
-            }}
+            [
+                {'$set': {
+                    'avg_rating': new_avg,
+                    'review_count': review_count,
+                    'updated_at': current_time
+                }},
+                trend_update
+            ]
         )
+        ranking_service.set_rating(resource_id, new_avg, trend_update)
+        _invalidate_resource_caches()
         
         return jsonify({
             'message': 'Review submitted successfully',
             'avg_rating': new_avg,
             'review_count': review_count,
-            'review': review_data
+            'review': _serialize_review(review)
         }), 200
         
     except Exception as e:
@@ -582,21 +1480,107 @@ def add_review(resource_id):
 @resources_bp.route('/<resource_id>/reviews', methods=['GET'])
 @verify_firebase_token
 def get_reviews(resource_id):
-    """Get all reviews for a resource"""
+    """
+    Get a page of reviews for a resource, newest first
+    
+    Query params: limit (default Config.REVIEWS_PAGE_SIZE), cursor (next_cursor
+    of the previous page) and summary=true to include the rating histogram.
+    """
     try:
-        reviews = list(db.reviews.find({'resource_id': resource_id}).sort('updated_at', -1))
+        try:
+            limit = int(request.args.get('limit', Config.REVIEWS_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'Invalid limit'}), 400
+        limit = max(1, min(limit, Config.REVIEWS_MAX_PAGE_SIZE))
+        
+        query = {'resource_id': resource_id}
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                updated_at, review_id = _parse_review_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            # Keyset pagination: continue strictly after the last review of the previous page
+            query['$or'] = [
+                {'updated_at': {'$lt': updated_at}},
+                {'updated_at': updated_at, '_id': {'$lt': review_id}}
+            ]
         
-        for review in reviews:
-            review['_id'] = str(review['_id'])
-            review['created_at'] = review['created_at'].isoformat()
-            review['updated_at'] = review['updated_at'].isoformat()
+        # One extra review tells whether another page follows
+        reviews = list(db.reviews.find(query).sort([('updated_at', -1), ('_id', -1)]).limit(limit + 1))
+        has_more = len(reviews) > limit
+        reviews = reviews[:limit]
+        
+        next_cursor = None
+        if has_more:
+            last = reviews[-1]
+            next_cursor = f"{last['updated_at'].isoformat()}_{last['_id']}"
+        
+        response = {
+            'reviews': [_serialize_review(review) for review in reviews],
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+        if request.args.get('summary', '').lower() == 'true':
+            response['summary'] = _review_summary(resource_id)
             
-        return jsonify({'reviews': reviews}), 200
+        return jsonify(response), 200
         
     except Exception as e:
         print(f"Error fetching reviews: {e}")
         return jsonify({'error': 'Failed to fetch reviews'}), 500
 
+@resources_bp.route('/<resource_id>/related', methods=['GET'])
+@verify_firebase_token
+def get_related_resources(resource_id):
+    """Get resources similar to a resource from its precomputed neighbor list"""
+    try:
+        uid = request.uid
+        
+        resource = db.resources.find_one({'_id': ObjectId(resource_id)}, {'uid': 1, 'privacy': 1})
+        if not resource:
+            return jsonify({'error': 'Resource not found'}), 404
+        
+        access_error = _check_resource_access(resource, uid)
+        if access_error:
+            return access_error
+        
+        # Get current user's college
+        current_user_profile = db.profiles.find_one({'uid': uid})
+        if not current_user_profile:
+            return jsonify({'error': 'User profile not found. Please complete your profile.'}), 403
+        
+        current_college = current_user_profile.get('college', '').strip().lower()
+        
+        # Neighbors are stored for everyone; only return those the user may see
+        neighbors = similarity_service.get_neighbors(resource_id)
+        found = {
+            related['_id']: related
+            for related in db.resources.find(_combine_queries(
+                {'_id': {'$in': [neighbor['resource_id'] for neighbor in neighbors]}},
+                _build_access_query(None, current_college)
+            ))
+        }
+        
+        related_resources = []
+        for neighbor in neighbors:
+            related = found.get(neighbor['resource_id'])
+            if not related:
+                continue
+            related['_id'] = str(related['_id'])
+            related['created_at'] = related['created_at'].isoformat()
+            related['updated_at'] = related['updated_at'].isoformat()
+            related['similarity'] = neighbor['score']
+            related_resources.append(related)
+            if len(related_resources) >= Config.RELATED_MAX_RESULTS:
+                break
+        
+        return jsonify({'resources': related_resources}), 200
+    
+    except Exception as e:
+        print(f"Error fetching related resources: {e}")
+        return jsonify({'error': 'Failed to fetch related resources'}), 500
+
 
 
 @resources_bp.route('/<resource_id>', methods=['DELETE'])
@@ -616,14 +1600,188 @@ def delete_resource(resource_id):
         if resource['uid'] != uid:
             return jsonify({'error': 'Unauthorized to delete this resource'}), 403
         
-        # Delete file from GridFS
+        # Delete file and its preview from GridFS
         storage_service.delete_file(resource['file_id'])
+        if resource.get('preview_file_id'):
+            storage_service.delete_file(resource['preview_file_id'])
         
         # Delete resource from database
         db.resources.delete_one({'_id': ObjectId(resource_id)})
+        db.reviews.delete_many({'resource_id': resource_id})
+        _record_tombstones(uid, [resource_id])
+        ranking_service.remove([resource_id])
+        _invalidate_resource_caches()
+        
+        # Drop its text from the search index in the background
+        job_queue.enqueue('remove_from_search_index', {'resource_ids': [resource_id]}, uid=uid)
         
         return jsonify({'message': 'Resource deleted successfully'}), 200
     
     except Exception as e:
         print(f"Error deleting resource: {e}")
         return jsonify({'error': 'Failed to delete resource'}), 500
+
+
+# Fields that may be changed through the bulk update endpoint
+BULK_UPDATABLE_FIELDS = ['title', 'subject', 'semester', 'resource_type', 'year', 'description', 'tags', 'privacy']
+
+@resources_bp.route('/bulk-update', methods=['POST'])
+@verify_firebase_token
+def bulk_update_resources():
+    """
+    Update metadata of several resources (only by owner)
+    Expects {"updates": [{"id": "<resource_id>", "privacy": "Public", ...}, ...]}
+    """
+    try:
+        uid = request.uid
+        data = request.json or {}
+        updates = data.get('updates')
+        
+        if not isinstance(updates, list) or not updates:
+            return jsonify({'error': 'Updates must be a non-empty list'}), 400
+        
+        if len(updates) > Config.MAX_BULK_OPERATION_IDS:
+            return jsonify({'error': f'Maximum {Config.MAX_BULK_OPERATION_IDS} resources allowed per bulk operation'}), 400
+        
+        results = {}
+        changes = {}
+        
+        # Validate every entry before touching the database
+        seen_ids = set()
+        for entry in updates:
+            if not isinstance(entry, dict) or 'id' not in entry:
+                return jsonify({'error': 'Each update must be an object with an id'}), 400
+            
+            resource_id = str(entry['id'])
+            if resource_id in seen_ids:
+                return jsonify({'error': f'Resource {resource_id} appears more than once; merge its updates into one entry'}), 400
+            seen_ids.add(resource_id)
+            fields = {field: entry[field] for field in BULK_UPDATABLE_FIELDS if field in entry}
+            
+            if not fields:
+                results[resource_id] = {'id': resource_id, 'success': False, 'error': 'No updatable fields provided'}
+                continue
+            
+            is_valid, error_msg = Resource.validate_resource_data(fields, partial=True)
+            if not is_valid:
+                results[resource_id] = {'id': resource_id, 'success': False, 'error': error_msg}
+                continue
+            
+            changes[resource_id] = Resource.sanitize_resource_data(fields, partial=True)
+        
+        object_ids, invalid_ids = _parse_resource_ids(changes.keys())
+        for resource_id in invalid_ids:
+            changes.pop(resource_id)
+            results[resource_id] = {'id': resource_id, 'success': False, 'error': 'Invalid resource id'}
+        
+        # Check ownership of every resource in one query (with the stored terms for autocomplete)
+        owned, forbidden = _get_owned_resources(object_ids.values(), uid, {'uid': 1, 'tags': 1, 'subject': 1})
+        
+        operations = []
+        updated_ids = []
+        current_time = datetime.utcnow()
+        for resource_id, sanitized_data in changes.items():
+            if resource_id in forbidden:
+                results[resource_id] = {'id': resource_id, 'success': False, 'error': 'Unauthorized to update this resource'}
+            elif resource_id not in owned:
+                results[resource_id] = {'id': resource_id, 'success': False, 'error': 'Resource not found'}
+            else:
+                sanitized_data['updated_at'] = current_time
+                operations.append(UpdateOne(
+                    {'_id': object_ids[resource_id], 'uid': uid},
+                    {'$set': sanitized_data}
+                ))
+                updated_ids.append(resource_id)
+        
+        # Apply all changes in one round trip
+        if operations:
+            db.resources.bulk_write(operations, ordered=False)
+            ranking_service.sync_ids(updated_ids)
+            index_resource_updates((owned[resource_id], changes[resource_id]) for resource_id in updated_ids)
+            _invalidate_resource_caches()
+        
+        for resource_id in updated_ids:
+            results[resource_id] = {'id': resource_id, 'success': True}
+        
+        updated_count = len(updated_ids)
+        return jsonify({
+            'message': f'{updated_count} of {len(results)} resources updated successfully',
+            'updated': updated_count,
+            'failed': len(results) - updated_count,
+            'results': list(results.values())
+        }), 200 if updated_count == len(results) else 207
+    
+    except BulkWriteError as bwe:
+        print(f"Error bulk updating resources: {bwe.details}")
+        return jsonify({'error': 'Failed to update resources'}), 500
+    except Exception as e:
+        print(f"Error bulk updating resources: {e}")
+        return jsonify({'error': 'Failed to update resources'}), 500
+
+@resources_bp.route('/bulk-delete', methods=['POST'])
+@verify_firebase_token
+def bulk_delete_resources():
+    """
+    Delete several resources (only by owner)
+    Expects {"ids": ["<resource_id>", ...]}
+    """
+    try:
+        uid = request.uid
+        data = request.json or {}
+        ids = data.get('ids')
+        
+        if not isinstance(ids, list) or not ids:
+            return jsonify({'error': 'Ids must be a non-empty list'}), 400
+        
+        if len(ids) > Config.MAX_BULK_OPERATION_IDS:
+            return jsonify({'error': f'Maximum {Config.MAX_BULK_OPERATION_IDS} resources allowed per bulk operation'}), 400
+        
+        object_ids, invalid_ids = _parse_resource_ids(dict.fromkeys(str(resource_id) for resource_id in ids))
+        results = {
+            resource_id: {'id': resource_id, 'success': False, 'error': 'Invalid resource id'}
+            for resource_id in invalid_ids
+        }
+        
+        # Check ownership of every resource in one query
+        owned, forbidden = _get_owned_resources(object_ids.values(), uid, {'uid': 1, 'file_id': 1, 'preview_file_id': 1})
+        
+        for resource_id in object_ids:
+            if resource_id in forbidden:
+                results[resource_id] = {'id': resource_id, 'success': False, 'error': 'Unauthorized to delete this resource'}
+            elif resource_id not in owned:
+                results[resource_id] = {'id': resource_id, 'success': False, 'error': 'Resource not found'}
+        
+        if owned:
+            # Delete files and previews from GridFS in batches
+            file_ids = []
+            for resource in owned.values():
+                file_ids.extend(resource[field] for field in ('file_id', 'preview_file_id') if resource.get(field))
+            storage_service.delete_files(file_ids, batch_size=Config.GRIDFS_DELETE_BATCH_SIZE)
+            
+            # Delete resources from database
+            db.resources.delete_many({
+                '_id': {'$in': [object_ids[resource_id] for resource_id in owned]},
+                'uid': uid
+            })
+            db.reviews.delete_many({'resource_id': {'$in': list(owned)}})
+            _record_tombstones(uid, owned)
+            ranking_service.remove(owned)
+            _invalidate_resource_caches()
+            
+            # Drop their text from the search index in the background
+            job_queue.enqueue('remove_from_search_index', {'resource_ids': list(owned)}, uid=uid)
+            
+            for resource_id in owned:
+                results[resource_id] = {'id': resource_id, 'success': True}
+        
+        deleted_count = len(owned)
+        return jsonify({
+            'message': f'{deleted_count} of {len(results)} resources deleted successfully',
+            'deleted': deleted_count,
+            'failed': len(results) - deleted_count,
+            'results': list(results.values())
+        }), 200 if deleted_count == len(results) else 207
+    
+    except Exception as e:
+        print(f"Error bulk deleting resources: {e}")
+        return jsonify({'error': 'Failed to delete resources'}), 500
@@ -0,0 +1,168 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Iterable
+from config import Config
+import heapq
+import threading
+import time
+
+def _normalize(value) -> str:
+    """Normalize a term for prefix matching"""
+    return str(value or '').strip().lower()
+
+class PrefixIndex:
+    """
+    Sorted array of normalized terms with popularity weights
+    
+    Completions are the terms in [bisect_left(prefix), bisect_left(prefix + max char)),
+    ranked by weight.
+    """
+    
+    def __init__(self, counts: Dict[str, int] = None):
+        """Build the index from display value -> weight"""
+        entries = {}  # normalized term -> [display value, weight]
+        for value, weight in (counts or {}).items():
+            key = _normalize(value)
+            if not key:
+                continue
+            entry = entries.setdefault(key, [str(value).strip(), 0])
+            # Show the most common spelling of the term
+            if weight > entry[1]:
+                entry[0] = str(value).strip()
+            entry[1] += weight
+        self.entries = entries
+        self.terms = sorted(entries)
+    
+    def add(self, value, weight: int = 1) -> None:
+        """Add weight to a term, inserting it if new (callers hold the index lock)"""
+        key = _normalize(value)
+        if not key:
+            return
+        entry = self.entries.get(key)
+        if entry:
+            entry[1] += weight
+        else:
+            self.entries[key] = [str(value).strip(), weight]
+            insort(self.terms, key)
+    
+    def complete(self, prefix: str, limit: int, scan_limit: int) -> List[Dict]:
+        """Return up to limit terms starting with prefix, most popular first"""
+        key = _normalize(prefix)
+        terms, entries = self.terms, self.entries
+        start = bisect_left(terms, key)
+        end = min(bisect_left(terms, key + '\uffff'), start + scan_limit)
+        best = heapq.nlargest(limit, terms[start:end], key=lambda term: entries[term][1])
+        return [{'value': entries[term][0], 'count': entries[term][1]} for term in best]
+
+class AutocompleteIndex:
+    """
+    In-process prefix indexes for tags, subjects and colleges
+    
+    Built from a few aggregations at startup, updated in place as this
+    process handles writes, and rebuilt in the background every
+    AUTOCOMPLETE_REFRESH_INTERVAL to pick up writes made by other processes
+    (and drop terms that are no longer used).
+    """
+    
+    FIELDS = ('tags', 'subjects', 'colleges')
+    
+    def __init__(self, db):
+        """Initialize with database connection and build the indexes"""
+        self.db = db
+        self.indexes = {field: PrefixIndex() for field in self.FIELDS}
+        self.lock = threading.Lock()
+        self.refreshing = False
+        self.built_at = 0
+        self.rebuild()
+    
+    def rebuild(self) -> None:
+        """Rebuild every index from the database"""
+        tags = self.db.resources.aggregate([
+            {'$unwind': '$tags'},
+            {'$group': {'_id': '$tags', 'count': {'$sum': 1}}}
+        ])
+        subjects = self.db.resources.aggregate([
+            {'$group': {'_id': '$subject', 'count': {'$sum': 1}}}
+        ])
+        colleges = self.db.profiles.aggregate([
+            {'$group': {'_id': '$college', 'count': {'$sum': 1}}}
+        ])
+        
+        indexes = {
+            field: PrefixIndex({row['_id']: row['count'] for row in rows if row['_id']})
+            for field, rows in (('tags', tags), ('subjects', subjects), ('colleges', colleges))
+        }
+        with self.lock:
+            self.indexes = indexes
+            self.built_at = time.monotonic()
+    
+    def complete(self, field: str, prefix: str, limit: int = None) -> List[Dict]:
+        """
+        Get completions for a prefix
+        
+        Args:
+            field: 'tags', 'subjects' or 'colleges'
+            prefix: Text typed so far
+            limit: Maximum suggestions
+        
+        Returns:
+            list: [{'value': ..., 'count': ...}], most popular first
+        """
+        self._refresh_if_stale()
+        return self.indexes[field].complete(
+            prefix,
+            limit or Config.AUTOCOMPLETE_MAX_RESULTS,
+            Config.AUTOCOMPLETE_SCAN_LIMIT
+        )
+    
+    def add_resource(self, resource: dict) -> None:
+        """Count the tags and subject of a new or updated resource"""
+        with self.lock:
+            for tag in resource.get('tags') or []:
+                self.indexes['tags'].add(tag)
+            if resource.get('subject'):
+                self.indexes['subjects'].add(resource['subject'])
+    
+    def add_resources(self, resources: Iterable[dict]) -> None:
+        """Count the tags and subjects of several resources"""
+        for resource in resources:
+            self.add_resource(resource)
+    
+    def add_resource_update(self, previous: dict, update: dict) -> None:
+        """Count only the tags and subject an update adds to a stored resource"""
+        previous_tags = {_normalize(tag) for tag in previous.get('tags') or []}
+        added = {}
+        if 'tags' in update:
+            added['tags'] = [tag for tag in update['tags'] or [] if _normalize(tag) not in previous_tags]
+        if 'subject' in update and _normalize(update['subject']) != _normalize(previous.get('subject')):
+            added['subject'] = update['subject']
+        self.add_resource(added)
+    
+    def add_college(self, college: str) -> None:
+        """Count the college of a new or updated profile"""
+        with self.lock:
+            self.indexes['colleges'].add(college)
+    
+    def refresh(self) -> None:
+        """Start a background rebuild now (e.g. after a bulk write), unless one is running"""
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        threading.Thread(target=self._refresh, name='autocomplete-refresh', daemon=True).start()
+    
+    def _refresh_if_stale(self) -> None:
+        """Start a background rebuild once the indexes are older than the refresh interval"""
+        if time.monotonic() - self.built_at < Config.AUTOCOMPLETE_REFRESH_INTERVAL:
+            return
+        self.refresh()
+    
+    def _refresh(self) -> None:
+        """Rebuild in the background; the old indexes keep serving meanwhile"""
+        try:
+            self.rebuild()
+        except Exception as e:
+            print(f"Error rebuilding autocomplete index: {e}")
+            # Wait a full interval before retrying
+            self.built_at = time.monotonic()
+        finally:
+            self.refreshing = False
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import threading
+import time
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL"""
+    
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Args:
+            max_size: Maximum number of entries before the least recently used is evicted
+            ttl: Seconds an entry stays valid
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond max_size"""
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self.lock:
+            self.entries.clear()
+
+class GenerationCounter:
+    """
+    Monotonic counter stored in MongoDB and bumped on every write to a collection
+    
+    Cache keys include the current generation, so once a write bumps it no
+    process can serve an entry computed before the write.
+    """
+    
+    def __init__(self, db, name: str):
+        """Initialize the counter called name"""
+        self.collection = db.cache_generations
+        self.name = name
+    
+    def get(self) -> int:
+        """Get the current generation"""
+        counter = self.collection.find_one({'_id': self.name})
+        return counter['generation'] if counter else 0
+    
+    def bump(self) -> None:
+        """Advance the generation, invalidating every entry keyed on the old one"""
+        self.collection.update_one({'_id': self.name}, {'$inc': {'generation': 1}}, upsert=True)
@@ -0,0 +1,127 @@
+from typing import BinaryIO
+import zlib
+
+# Value of metadata.encoding for files stored deflate-compressed; their
+# uncompressed size is kept in metadata.logical_length
+DEFLATE_ENCODING = 'deflate'
+
+class DeflatingReader:
+    """
+    Readable stream compressing another stream on the fly
+    
+    Lets a backend store compressed data with its usual block-by-block copy,
+    without holding the whole file in memory.
+    """
+    
+    BLOCK_SIZE = 256 * 1024
+    
+    def __init__(self, source: BinaryIO, level: int = 6):
+        """
+        Args:
+            source: Stream of uncompressed data
+            level: zlib compression level (1-9)
+        """
+        self.source = source
+        self.compressor = zlib.compressobj(level)
+        self.buffer = bytearray()
+        self.finished = False
+    
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size compressed bytes (all remaining bytes by default)"""
+        while not self.finished and (size is None or size < 0 or len(self.buffer) < size):
+            block = self.source.read(self.BLOCK_SIZE)
+            if block:
+                self.buffer += self.compressor.compress(block)
+            else:
+                self.buffer += self.compressor.flush()
+                self.finished = True
+        
+        if size is None or size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+class InflatingFile:
+    """
+    A compressed stored file read back as its original bytes
+    
+    Wraps a StoredFile holding deflate data and exposes the same attributes,
+    with length set to the uncompressed size and stored_length to the size
+    in the backend. Byte ranges are served by decompressing from the start
+    and discarding everything before the range.
+    """
+    
+    BLOCK_SIZE = 256 * 1024
+    
+    def __init__(self, stored_file, start: int = 0, end: int = None):
+        """
+        Args:
+            stored_file: StoredFile over the whole compressed file
+            start: First uncompressed byte to read
+            end: Byte after the last one to read (defaults to the end of the file)
+        """
+        self.stored_file = stored_file
+        self.stored_length = stored_file.length
+        self.length = stored_file.metadata.get('logical_length', stored_file.length)
+        self.content_type = stored_file.content_type
+        self.filename = stored_file.filename
+        self.metadata = stored_file.metadata
+        self.upload_date = stored_file.upload_date
+        
+        self.decompressor = zlib.decompressobj()
+        self.buffer = bytearray()
+        
+        end = self.length if end is None else min(end, self.length)
+        self._skip(start)
+        self.remaining = max(0, end - start)
+    
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes of the range (all remaining bytes by default)"""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if not size:
+            return b''
+        data = self._take(size)
+        self.remaining -= len(data)
+        return data
+    
+    def close(self) -> None:
+        """Close the underlying stored file"""
+        self.stored_file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _take(self, size: int) -> bytes:
+        """Decompress until size bytes are buffered (or the data ends) and return them"""
+        while len(self.buffer) < size:
+            if self.decompressor.unconsumed_tail:
+                # Output was capped on the previous call; keep draining the input already read
+                block = self.decompressor.unconsumed_tail
+            else:
+                block = self.stored_file.read(self.BLOCK_SIZE)
+                if not block:
+                    self.buffer += self.decompressor.flush()
+                    break
+            self.buffer += self.decompressor.decompress(block, max(size - len(self.buffer), self.BLOCK_SIZE))
+        
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+    
+    def _skip(self, count: int) -> None:
+        """Decompress and discard count bytes"""
+        while count > 0:
+            skipped = len(self._take(min(count, self.BLOCK_SIZE)))
+            if not skipped:
+                break
+            count -= skipped
+
+def is_compressed(stored_file) -> bool:
+    """Check whether a stored file (or stat() attributes) holds deflate data"""
+    metadata = stored_file.get('metadata') if isinstance(stored_file, dict) else stored_file.metadata
+    return (metadata or {}).get('encoding') == DEFLATE_ENCODING
@@ -0,0 +1,127 @@
+from collections import defaultdict
+from bson import ObjectId
+from datetime import datetime
+from pymongo import UpdateOne
+from config import Config
+from services.trending import event_log_weight, trend_stage
+import atexit
+import threading
+import time
+
+# Trending weight of one increment of each counter
+TREND_WEIGHTS = {
+    'views': Config.TRENDING_VIEW_WEIGHT,
+    'downloads': Config.TRENDING_DOWNLOAD_WEIGHT
+}
+
+class CounterBuffer:
+    """
+    Buffers view/download counter increments in memory and writes them
+    to MongoDB in periodic batches instead of once per request
+    
+    Each flush also folds the buffered events into the resource's
+    time-decayed trending score (see services/trending.py).
+    """
+    
+    def __init__(self, db, flush_interval: float = None):
+        """Initialize with database connection and start the background flusher"""
+        self.db = db
+        self.flush_interval = flush_interval or Config.COUNTER_FLUSH_INTERVAL
+        self.pending = defaultdict(lambda: defaultdict(int))  # resource_id -> field -> delta
+        self.pending_downloads = set()  # (uid, resource_id) pairs for co-download similarity
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        
+        self.thread = threading.Thread(target=self._run, name='counter-flush', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+    
+    def increment(self, resource_id: str, field: str, amount: int = 1) -> None:
+        """Record a counter increment to be written on the next flush"""
+        with self.lock:
+            self.pending[str(resource_id)][field] += amount
+    
+    def record_download(self, uid: str, resource_id: str) -> None:
+        """Record a download: increments the counter and remembers who downloaded the resource"""
+        with self.lock:
+            self.pending[str(resource_id)]['downloads'] += 1
+            self.pending_downloads.add((uid, str(resource_id)))
+    
+    def flush(self) -> int:
+        """
+        Write all buffered increments with one bulk_write
+        
+        Returns:
+            int: Number of resources updated
+        """
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(lambda: defaultdict(int))
+            downloads, self.pending_downloads = self.pending_downloads, set()
+        
+        self._flush_downloads(downloads)
+        
+        if not pending:
+            return 0
+        
+        flushed_at = time.time()
+        operations = [
+            UpdateOne({'_id': ObjectId(resource_id)}, self._build_update(fields, flushed_at))
+            for resource_id, fields in pending.items()
+        ]
+        try:
+            self.db.resources.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Put the increments back so they are retried on the next flush
+            print(f"Error flushing counters: {e}")
+            with self.lock:
+                for resource_id, fields in pending.items():
+                    for field, amount in fields.items():
+                        self.pending[resource_id][field] += amount
+            return 0
+        
+        # Keep the ranking table in step; a missed update is repaired by the periodic rebuild
+        try:
+            self.db.resource_rankings.bulk_write(operations, ordered=False)
+        except Exception as e:
+            print(f"Error flushing ranking counters: {e}")
+        return len(operations)
+    
+    @staticmethod
+    def _build_update(fields, flushed_at: float) -> list:
+        """Update pipeline adding the counter deltas and their trending weight"""
+        update = [{'$set': {
+            field: {'$add': [{'$ifNull': [f'${field}', 0]}, amount]}
+            for field, amount in fields.items()
+        }}]
+        weight = sum(TREND_WEIGHTS.get(field, 0) * amount for field, amount in fields.items())
+        if weight > 0:
+            update.append(trend_stage(event_log_weight(weight, flushed_at)))
+        return update
+    
+    def _flush_downloads(self, downloads) -> None:
+        """Upsert (uid, resource) download records; losing some only weakens co-download similarity"""
+        if not downloads:
+            return
+        downloaded_at = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {'uid': uid, 'resource_id': ObjectId(resource_id)},
+                {'$set': {'downloaded_at': downloaded_at}},
+                upsert=True
+            )
+            for uid, resource_id in downloads
+        ]
+        try:
+            self.db.user_downloads.bulk_write(operations, ordered=False)
+        except Exception as e:
+            print(f"Error flushing download records: {e}")
+    
+    def close(self) -> None:
+        """Stop the background flusher and write what is left"""
+        self.stop_event.set()
+        self.flush()
+    
+    def _run(self) -> None:
+        """Flush periodically until closed"""
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
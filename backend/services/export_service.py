@@ -0,0 +1,295 @@
+from bson import ObjectId, json_util
+from datetime import datetime, timedelta
+from typing import Iterator, Iterable, BinaryIO, Optional
+from pymongo import ReplaceOne
+from config import Config
+from services.ranking_service import RankingService
+from services.job_queue import JobQueue
+from services.cache import GenerationCounter
+import tarfile
+
+# Collections exported as NDJSON; documents are written with MongoDB Extended
+# JSON so ObjectIds and dates survive the round trip
+EXPORT_COLLECTIONS = ('resources', 'reviews')
+
+# Export of the deletions recorded since an incremental export's since
+DELETIONS_EXPORT = 'deletions'
+
+class ExportService:
+    """
+    Streaming export and import of the library
+    
+    Resources and reviews are streamed as NDJSON straight from cursors, and
+    files as a tar archive straight from storage, so memory use does not
+    depend on the size of the library. Files are exported exactly as stored
+    (compressed files stay compressed). Passing since exports only documents
+    with updated_at >= since, and the files they reference; imports replace
+    documents by _id, so applying overlapping exports is harmless.
+    
+    Deletions travel as tombstones: an incremental export also carries the
+    resources (with their reviews and files) and individual reviews deleted
+    since then, and importing it deletes them again. Tombstones expire after
+    Config.SYNC_TOMBSTONE_RETENTION_DAYS, so older since values are refused.
+    
+    The full-content search index is not exported: an imported resource gets
+    an extract_text job that rebuilds its entry, queued once both the
+    resource and its file have been imported.
+    """
+    
+    BATCH_SIZE = 500
+    BLOCK_SIZE = 1024 * 1024
+    
+    def __init__(self, db, storage_service):
+        """Initialize with database connection and storage service"""
+        self.db = db
+        self.storage_service = storage_service
+        self.ranking_service = RankingService(db)
+        self.job_queue = JobQueue(db)
+        self.resources_generation = GenerationCounter(db, 'resources')
+    
+    def iter_documents(self, collection: str, since: Optional[datetime] = None) -> Iterator[dict]:
+        """Yield the documents of a collection in updated_at order"""
+        query = {'updated_at': {'$gte': since}} if since else {}
+        cursor = self.db[collection].find(query).sort([('updated_at', 1), ('_id', 1)]).batch_size(self.BATCH_SIZE)
+        yield from cursor
+    
+    def iter_ndjson(self, collection: str, since: Optional[datetime] = None) -> Iterator[bytes]:
+        """Yield the documents of a collection as NDJSON lines"""
+        for document in self.iter_documents(collection, since):
+            yield (json_util.dumps(document, json_options=json_util.RELAXED_JSON_OPTIONS) + '\n').encode('utf-8')
+    
+    def iter_deletions(self, since: datetime) -> Iterator[bytes]:
+        """
+        Yield the tombstones of resources and reviews deleted since a time as NDJSON lines
+        
+        Each line is {"collection": ..., "_id": ..., "deleted_at": ...}.
+        """
+        if since < self.oldest_incremental_since():
+            raise ValueError('since is older than the tombstone retention; take a full export')
+        
+        sources = (
+            ('resources', self.db.resource_tombstones, 'resource_id'),
+            ('reviews', self.db.review_tombstones, 'review_id')
+        )
+        for collection, tombstones, id_field in sources:
+            for tombstone in tombstones.find({'deleted_at': {'$gte': since}}).sort('deleted_at', 1).batch_size(self.BATCH_SIZE):
+                line = {'collection': collection, '_id': ObjectId(tombstone[id_field]), 'deleted_at': tombstone['deleted_at']}
+                yield (json_util.dumps(line, json_options=json_util.RELAXED_JSON_OPTIONS) + '\n').encode('utf-8')
+    
+    @staticmethod
+    def oldest_incremental_since() -> datetime:
+        """Oldest since whose deletions are all still recorded"""
+        return datetime.utcnow() - timedelta(days=Config.SYNC_TOMBSTONE_RETENTION_DAYS)
+    
+    def iter_files_tar(self, since: Optional[datetime] = None) -> Iterator[bytes]:
+        """
+        Yield a tar archive of the files referenced by the exported resources
+        
+        Every file is stored as files/<id>, preceded by files/<id>.json holding
+        its filename, content type and metadata.
+        """
+        projection = {'file_id': 1, 'preview_file_id': 1}
+        query = {'updated_at': {'$gte': since}} if since else {}
+        for resource in self.db.resources.find(query, projection).batch_size(self.BATCH_SIZE):
+            for file_id in (resource.get('file_id'), resource.get('preview_file_id')):
+                if file_id:
+                    yield from self._iter_tar_file(str(file_id))
+        # End-of-archive marker: two zero blocks
+        yield b'\0' * (2 * tarfile.BLOCKSIZE)
+    
+    def import_ndjson(self, collection: str, lines: Iterable[bytes]) -> int:
+        """
+        Upsert NDJSON documents by _id in batches
+        
+        Returns:
+            int: Number of documents imported
+        """
+        if collection not in EXPORT_COLLECTIONS:
+            raise ValueError(f"Unknown export collection: {collection}")
+        
+        imported = 0
+        batch = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            batch.append(json_util.loads(line))
+            if len(batch) >= self.BATCH_SIZE:
+                imported += self._write_batch(collection, batch)
+                batch = []
+        if batch:
+            imported += self._write_batch(collection, batch)
+        return imported
+    
+    def import_deletions(self, lines: Iterable[bytes]) -> dict:
+        """
+        Apply the tombstones written by iter_deletions
+        
+        A deleted resource takes its reviews and files with it. Tombstones are
+        recorded here too, so exports taken from this library carry them on.
+        
+        Returns:
+            dict: Number of resources and reviews deleted
+        """
+        counts = {'resources': 0, 'reviews': 0}
+        batches = {'resources': [], 'reviews': []}
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            tombstone = json_util.loads(line)
+            batch = batches.get(tombstone.get('collection'))
+            if batch is None:
+                continue
+            batch.append(tombstone['_id'])
+            if len(batch) >= self.BATCH_SIZE:
+                counts[tombstone['collection']] += self._delete_batch(tombstone['collection'], batch)
+                batch.clear()
+        for collection, batch in batches.items():
+            if batch:
+                counts[collection] += self._delete_batch(collection, batch)
+        return counts
+    
+    def import_files_tar(self, stream: BinaryIO) -> dict:
+        """
+        Restore the files of a tar archive written by iter_files_tar
+        
+        Returns:
+            dict: Number of files restored and skipped (already present)
+        """
+        counts = {'restored': 0, 'skipped': 0}
+        restored_ids = []
+        attributes = {}
+        # Stream mode reads the archive front to back without seeking
+        with tarfile.open(fileobj=stream, mode='r|') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                name = member.name.rsplit('/', 1)[-1]
+                if name.endswith('.json'):
+                    attributes = json_util.loads(archive.extractfile(member).read())
+                    continue
+                if not ObjectId.is_valid(name):
+                    continue
+                
+                restored = self.storage_service.restore_file(ObjectId(name), archive.extractfile(member), attributes)
+                counts['restored' if restored else 'skipped'] += 1
+                attributes = {}
+                if restored:
+                    restored_ids.append(name)
+                if len(restored_ids) >= self.BATCH_SIZE:
+                    self._queue_text_extraction(self.db.resources.find({'file_id': {'$in': restored_ids}}, {'uid': 1}))
+                    restored_ids = []
+        if restored_ids:
+            self._queue_text_extraction(self.db.resources.find({'file_id': {'$in': restored_ids}}, {'uid': 1}))
+        return counts
+    
+    def _write_batch(self, collection: str, documents: list) -> int:
+        """Replace or insert a batch of documents"""
+        if collection == 'resources':
+            for document in documents:
+                # Set again once this library's search index holds the text
+                document.pop('text_indexed_at', None)
+                document.pop('text_token_count', None)
+        
+        self.db[collection].bulk_write(
+            [ReplaceOne({'_id': document['_id']}, document, upsert=True) for document in documents],
+            ordered=False
+        )
+        if collection == 'resources':
+            self.ranking_service.sync_resources(documents)
+            # Files imported later queue their resources in import_files_tar
+            self._queue_text_extraction(
+                document for document in documents
+                if document.get('file_id') and self.storage_service.file_exists(document['file_id'])
+            )
+            self.resources_generation.bump()
+        return len(documents)
+    
+    def _queue_text_extraction(self, resources: Iterable[dict]) -> None:
+        """Queue the extract_text job of imported resources (once per resource)"""
+        for resource in resources:
+            resource_id = str(resource['_id'])
+            self.job_queue.enqueue(
+                'extract_text',
+                {'resource_id': resource_id},
+                idempotency_key=f'extract_text:{resource_id}',
+                uid=resource.get('uid')
+            )
+    
+    def _delete_batch(self, collection: str, ids: list) -> int:
+        """Delete a batch of tombstoned resources or reviews"""
+        deleted_at = datetime.utcnow()
+        if collection == 'reviews':
+            reviews = list(self.db.reviews.find({'_id': {'$in': ids}}, {'resource_id': 1}))
+            self.db.reviews.delete_many({'_id': {'$in': ids}})
+            if reviews:
+                self.db.review_tombstones.insert_many([
+                    {'review_id': str(review['_id']), 'resource_id': review['resource_id'], 'deleted_at': deleted_at}
+                    for review in reviews
+                ])
+            return len(reviews)
+        
+        resources = list(self.db.resources.find({'_id': {'$in': ids}}, {'uid': 1, 'file_id': 1, 'preview_file_id': 1}))
+        if not resources:
+            return 0
+        resource_ids = [str(resource['_id']) for resource in resources]
+        file_ids = []
+        for resource in resources:
+            file_ids.extend(resource[field] for field in ('file_id', 'preview_file_id') if resource.get(field))
+        
+        self.storage_service.delete_files(file_ids, batch_size=Config.GRIDFS_DELETE_BATCH_SIZE)
+        self.db.resources.delete_many({'_id': {'$in': [resource['_id'] for resource in resources]}})
+        self.db.reviews.delete_many({'resource_id': {'$in': resource_ids}})
+        self.db.resource_tombstones.insert_many([
+            {'resource_id': str(resource['_id']), 'uid': resource.get('uid'), 'deleted_at': deleted_at}
+            for resource in resources
+        ])
+        self.ranking_service.remove(resource_ids)
+        self.job_queue.enqueue('remove_from_search_index', {'resource_ids': resource_ids})
+        self.resources_generation.bump()
+        return len(resources)
+    
+    def _iter_tar_file(self, file_id: str) -> Iterator[bytes]:
+        """Yield the tar members of one stored file (nothing if it is missing)"""
+        stored_file = self.storage_service.get_stored_file(file_id)
+        if not stored_file:
+            print(f"Export: file {file_id} is referenced but missing from storage")
+            return
+        
+        with stored_file:
+            mtime = stored_file.upload_date.timestamp() if stored_file.upload_date else 0
+            sidecar = json_util.dumps({
+                'filename': stored_file.filename,
+                'content_type': stored_file.content_type,
+                'metadata': stored_file.metadata
+            }, json_options=json_util.RELAXED_JSON_OPTIONS).encode('utf-8')
+            yield self._tar_header(f'files/{file_id}.json', len(sidecar), mtime)
+            yield sidecar + self._tar_padding(len(sidecar))
+            
+            yield self._tar_header(f'files/{file_id}', stored_file.length, mtime)
+            written = 0
+            while True:
+                block = stored_file.read(self.BLOCK_SIZE)
+                if not block:
+                    break
+                written += len(block)
+                yield block
+            if written != stored_file.length:
+                # The header already promised length bytes; the archive cannot be continued
+                raise Exception(f"File {file_id} ended after {written} of {stored_file.length} bytes")
+            yield self._tar_padding(written)
+    
+    @staticmethod
+    def _tar_header(name: str, size: int, mtime: float) -> bytes:
+        """Header block(s) of a regular tar member"""
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = mtime
+        info.mode = 0o644
+        return info.tobuf(format=tarfile.PAX_FORMAT)
+    
+    @staticmethod
+    def _tar_padding(size: int) -> bytes:
+        """Zero bytes completing the last block of a member of the given size"""
+        return b'\0' * (-size % tarfile.BLOCKSIZE)
@@ -0,0 +1,238 @@
+from typing import Optional, BinaryIO
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction is only serialized within a process
+    fcntl = None
+
+class FileCache:
+    """
+    Size-bounded local disk cache of stored files, shared by every process
+    using the same directory
+    
+    Files are kept under <cache_dir>/<last two id chars>/<file id>. The
+    directory itself is the index: every hit touches the file's mtime, and
+    a fill evicts the least recently used files, under a lock file shared by
+    all processes, until the total size fits in max_bytes. Files used in the
+    last evict_grace seconds are never evicted, so a path just handed to the
+    web server (X-Sendfile / X-Accel-Redirect) stays in place long enough to
+    be opened. Fills are written to a temporary file and renamed into place,
+    so readers never see a partial file; temporary files are only removed
+    once they are older than stale_fill_age, since they may be another
+    process's fill in progress. Copies are checked against the SHA-256
+    recorded for the resource (once the hash_file job has stored it).
+    """
+    
+    BLOCK_SIZE = 1024 * 1024
+    FILL_PREFIX = '.fill-'
+    LOCK_NAME = '.lock'
+    
+    def __init__(self, cache_dir: str, max_bytes: int, max_file_size: int = None,
+                 evict_grace: float = 60, stale_fill_age: float = 60 * 60):
+        """
+        Args:
+            cache_dir: Directory holding the cached files
+            max_bytes: Total size of cached files before eviction
+            max_file_size: Largest file worth caching (defaults to a quarter of max_bytes)
+            evict_grace: Seconds after its last use during which a file is not evicted
+            stale_fill_age: Seconds after which a temporary fill file is assumed abandoned
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size or max_bytes // 4
+        self.evict_grace = evict_grace
+        self.stale_fill_age = stale_fill_age
+        self.hashes = {}  # file_id -> SHA-256 verified by this process
+        self.lock = threading.Lock()
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._evict()
+    
+    def contains(self, file_id: str) -> bool:
+        """Check whether a file is cached"""
+        return os.path.exists(self._path(str(file_id)))
+    
+    def fill(self, file_id: str, source: BinaryIO, size: int, expected_hash: str = None) -> bool:
+        """
+        Copy a file into the cache
+        
+        Args:
+            file_id: Stored file ID
+            source: Readable file object positioned at the start (e.g. GridOut)
+            size: File length in bytes
+            expected_hash: SHA-256 recorded for the file, if already computed
+        
+        Returns:
+            bool: True if the file is now cached
+        """
+        file_id = str(file_id)
+        if self.contains(file_id):
+            return True
+        if size > self.max_file_size:
+            return False
+        
+        path = self._path(file_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=self.FILL_PREFIX)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                while True:
+                    block = source.read(self.BLOCK_SIZE)
+                    if not block:
+                        break
+                    digest.update(block)
+                    temp_file.write(block)
+            
+            sha256 = digest.hexdigest()
+            if expected_hash and sha256 != expected_hash:
+                print(f"Cached copy of file {file_id} does not match its stored hash; not caching")
+                os.remove(temp_path)
+                return False
+            
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        self.hashes[file_id] = sha256
+        self._evict()
+        return True
+    
+    def open(self, file_id: str, expected_hash: str = None) -> Optional[BinaryIO]:
+        """
+        Open a cached file as a read-only memory map
+        
+        Args:
+            file_id: Stored file ID
+            expected_hash: SHA-256 recorded for the file; unverified copies are checked against it
+        
+        Returns:
+            File-like object (the caller closes it), or None on a miss
+        """
+        file_id = str(file_id)
+        path = self._path(file_id)
+        try:
+            with open(path, 'rb') as cached_file:
+                # Mark the file recently used for every process's eviction
+                os.utime(path)
+                if os.fstat(cached_file.fileno()).st_size == 0:
+                    mapped = io.BytesIO(b'')
+                else:
+                    mapped = mmap.mmap(cached_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # Not cached, or evicted by another process sharing the directory
+            self.hashes.pop(file_id, None)
+            return None
+        
+        if expected_hash and self.hashes.get(file_id) != expected_hash:
+            actual_hash = hashlib.sha256(mapped.getvalue() if isinstance(mapped, io.BytesIO) else mapped).hexdigest()
+            if actual_hash != expected_hash:
+                mapped.close()
+                print(f"Cached copy of file {file_id} does not match its stored hash; evicting")
+                self.evict(file_id)
+                return None
+            self.hashes[file_id] = actual_hash
+        
+        return mapped
+    
+    def locate(self, file_id: str, expected_hash: str = None) -> Optional[str]:
+        """
+        Get the path of a cached file after the same checks as open()
+        
+        Returns:
+            str: Absolute path, or None on a miss
+        """
+        cached_file = self.open(file_id, expected_hash)
+        if cached_file is None:
+            return None
+        cached_file.close()
+        return os.path.abspath(self._path(str(file_id)))
+    
+    def evict(self, file_id: str) -> None:
+        """Remove a file from the cache (e.g. when the stored file is deleted)"""
+        file_id = str(file_id)
+        self.hashes.pop(file_id, None)
+        try:
+            os.remove(self._path(file_id))
+        except OSError:
+            pass
+    
+    def _evict(self) -> None:
+        """
+        Remove least recently used files until the cache fits, and abandoned fills
+        
+        The directory is scanned under the shared lock, so the size limit holds
+        across every process using it.
+        """
+        with self.lock, self._shared_lock():
+            now = time.time()
+            files = []
+            total_bytes = 0
+            for shard in os.listdir(self.cache_dir):
+                shard_dir = os.path.join(self.cache_dir, shard)
+                if not os.path.isdir(shard_dir):
+                    continue
+                for name in os.listdir(shard_dir):
+                    path = os.path.join(shard_dir, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if name.startswith(self.FILL_PREFIX):
+                        if now - stat.st_mtime > self.stale_fill_age:
+                            self._remove(path)
+                        continue
+                    files.append((stat.st_mtime, path, name, stat.st_size))
+                    total_bytes += stat.st_size
+            
+            for mtime, path, file_id, size in sorted(files):
+                if total_bytes <= self.max_bytes or now - mtime < self.evict_grace:
+                    break
+                # Open memory maps and file descriptors stay valid after the file is unlinked
+                self._remove(path)
+                self.hashes.pop(file_id, None)
+                total_bytes -= size
+    
+    def _shared_lock(self):
+        """Context manager holding the cache directory's lock file"""
+        return _LockFile(os.path.join(self.cache_dir, self.LOCK_NAME))
+    
+    @staticmethod
+    def _remove(path: str) -> None:
+        """Delete a file that may already be gone"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def _path(self, file_id: str) -> str:
+        """Location of a cached file"""
+        return os.path.join(self.cache_dir, file_id[-2:], file_id)
+
+class _LockFile:
+    """Exclusive advisory lock on a file, shared between processes"""
+    
+    def __init__(self, path: str):
+        """Initialize with the lock file's path"""
+        self.path = path
+        self.file = None
+    
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        return self
+    
+    def __exit__(self, *exc_info):
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        self.file.close()
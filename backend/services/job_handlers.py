@@ -0,0 +1,184 @@
+from bson import ObjectId
+from datetime import datetime
+from typing import Callable, Dict, Any
+from config import Config
+from services.storage_service import StorageService
+from services.preview_service import PreviewService
+from services.upload_session_service import UploadSessionService
+from services.search_index import SearchIndex
+from services.text_extraction import extract_text as extract_file_text
+from services.ranking_service import RankingService
+from services.similarity_service import SimilarityService
+from services.orphan_collector import OrphanCollector
+from services.cache import GenerationCounter
+from models import UserProfile
+
+# Registered job handlers: job type -> handler(context, payload)
+HANDLERS: Dict[str, Callable] = {}
+
+# Maintenance jobs enqueued by the worker scheduler: (job type, interval in seconds)
+PERIODIC_JOBS = [
+    ('cleanup_upload_sessions', Config.UPLOAD_SESSION_GC_INTERVAL),
+    ('cleanup_orphan_files', Config.ORPHAN_CLEANUP_INTERVAL),
+    ('rebuild_rankings', Config.RANKING_REBUILD_INTERVAL),
+    ('compute_related_resources', Config.RELATED_REBUILD_INTERVAL)
+]
+
+def job_handler(job_type: str):
+    """Decorator registering a function as the handler of a job type"""
+    def decorator(f):
+        HANDLERS[job_type] = f
+        return f
+    return decorator
+
+class JobContext:
+    """Services shared by the job handlers of one worker process"""
+    
+    def __init__(self, db):
+        """Initialize services with the worker's database connection"""
+        self.db = db
+        self.storage_service = StorageService(db)
+        self.preview_service = PreviewService(db, self.storage_service)
+        self.upload_session_service = UploadSessionService(db, self.storage_service)
+        self.search_index = SearchIndex()
+        self.ranking_service = RankingService(db)
+        self.similarity_service = SimilarityService(db)
+
+@job_handler('hash_file')
+def hash_file(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute the SHA-256 of a resource's file and store it on the resource"""
+    resource = context.db.resources.find_one({'_id': ObjectId(payload['resource_id'])}, {'file_id': 1})
+    if not resource:
+        return {'status': 'missing'}
+    
+    file_hash = context.storage_service.compute_hash(resource['file_id'])
+    if not file_hash:
+        raise Exception(f"File {resource['file_id']} not found")
+    
+    # Only record the hash if the resource still points at the file that was hashed
+    context.db.resources.update_one(
+        {'_id': resource['_id'], 'file_id': resource['file_id']},
+        {'$set': {'file_hash': file_hash}}
+    )
+    return {'status': 'hashed', 'file_hash': file_hash}
+
+@job_handler('generate_preview')
+def generate_preview(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate the preview of a resource"""
+    try:
+        return {'status': context.preview_service.generate_preview(payload['resource_id'])}
+    except Exception:
+        # Reported to clients until a retry succeeds
+        context.db.resources.update_one(
+            {'_id': ObjectId(payload['resource_id'])},
+            {'$set': {'preview_status': 'failed', 'updated_at': datetime.utcnow()}}
+        )
+        raise
+
+@job_handler('extract_text')
+def extract_text(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the text of a resource's file and add it to the full-content search index"""
+    resource = context.db.resources.find_one(
+        {'_id': ObjectId(payload['resource_id'])},
+        {'file_id': 1, 'file_name': 1, 'file_type': 1}
+    )
+    if not resource:
+        return {'status': 'missing'}
+    
+    file_data = context.storage_service.get_file(resource['file_id'])
+    if not file_data:
+        raise Exception(f"File {resource['file_id']} not found")
+    
+    text = extract_file_text(file_data, resource.get('file_name'), resource.get('file_type'))
+    if text is None:
+        return {'status': 'unsupported'}
+    
+    resource_id = str(resource['_id'])
+    token_count = context.search_index.add_document(resource_id, text)
+    
+    result = context.db.resources.update_one(
+        {'_id': resource['_id']},
+        {'$set': {'text_indexed_at': datetime.utcnow(), 'text_token_count': token_count}}
+    )
+    if result.matched_count == 0:
+        # Resource was deleted while its text was being extracted
+        context.search_index.remove_documents([resource_id])
+        return {'status': 'missing'}
+    
+    return {'status': 'indexed', 'tokens': token_count}
+
+@job_handler('remove_from_search_index')
+def remove_from_search_index(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Remove deleted resources from the full-content search index"""
+    return {'removed': context.search_index.remove_documents(payload['resource_ids'])}
+
+@job_handler('sync_uploader_info')
+def sync_uploader_info(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy uploaders' current name and college onto their resources
+    
+    The profile is read when the job runs, so jobs queued by several quick
+    edits all write the latest values. Without a uid in the payload,
+    resources stored before these fields existed are backfilled.
+    """
+    if payload.get('uid'):
+        uids = [payload['uid']]
+    else:
+        uids = context.db.resources.distinct('uid', {'uploader_name': {'$exists': False}})
+    
+    updated = sum(_sync_uploader_resources(context, uid) for uid in uids)
+    if updated:
+        # Cached browse pages still carry the old values
+        GenerationCounter(context.db, 'resources').bump()
+    return {'updated': updated}
+
+def _sync_uploader_resources(context: JobContext, uid: str) -> int:
+    """Update the stale uploader fields of one user's resources in batches"""
+    uploader = UserProfile.uploader_fields(context.db.profiles.find_one({'uid': uid}, {'name': 1, 'college': 1}))
+    stale = {'uid': uid, '$or': [{field: {'$ne': value}} for field, value in uploader.items()]}
+    
+    updated = 0
+    while True:
+        batch = [resource['_id'] for resource in context.db.resources.find(stale, {'_id': 1}).limit(Config.UPLOADER_SYNC_BATCH_SIZE)]
+        if not batch:
+            return updated
+        # updated_at lets delta sync and incremental exports pick the change up
+        result = context.db.resources.update_many(
+            {'_id': {'$in': batch}},
+            {'$set': {**uploader, 'updated_at': datetime.utcnow()}}
+        )
+        updated += result.modified_count
+
+@job_handler('rebuild_rankings')
+def rebuild_rankings(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Recompute the ranking table from the resources collection"""
+    return {'rows': context.ranking_service.rebuild()}
+
+@job_handler('compute_related_resources')
+def compute_related_resources(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Recompute the related-resource lists of every resource"""
+    return {'resources': context.similarity_service.compute()}
+
+@job_handler('cleanup_upload_sessions')
+def cleanup_upload_sessions(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Remove abandoned resumable upload sessions and their chunks"""
+    removed = 0
+    while True:
+        batch = context.upload_session_service.cleanup_expired_sessions()
+        removed += batch
+        if batch == 0:
+            break
+    return {'removed': removed}
+
+@job_handler('cleanup_orphan_files')
+def cleanup_orphan_files(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reclaim unreferenced files, stray GridFS chunks, reviews and downloads of
+    deleted resources, and resources of deleted profiles
+    
+    Files and chunks younger than Config.ORPHAN_GRACE_HOURS are skipped so
+    uploads that are still being recorded are never touched. With dry_run
+    in the payload nothing is deleted and the report lists what would be.
+    """
+    collector = OrphanCollector(context.db, context.storage_service, batch_size=payload.get('batch_size'))
+    return collector.collect(dry_run=bool(payload.get('dry_run')))
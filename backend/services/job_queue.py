@@ -0,0 +1,200 @@
+from bson import ObjectId
+from datetime import datetime, timedelta
+from typing import Optional, Any, Dict
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config import Config
+import random
+
+class JobQueue:
+    """Persistent background job queue backed by a MongoDB collection"""
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    
+    # Job priorities (higher runs first)
+    PRIORITY_HIGH = 10
+    PRIORITY_NORMAL = 5
+    PRIORITY_LOW = 0
+    
+    def __init__(self, db):
+        """Initialize with database connection"""
+        self.jobs = db.jobs
+    
+    @staticmethod
+    def create_indexes(db) -> None:
+        """Create the indexes the queue relies on"""
+        # Claiming picks the highest priority job that is due
+        db.jobs.create_index([('status', 1), ('priority', -1), ('run_at', 1)])
+        db.jobs.create_index(
+            'idempotency_key',
+            unique=True,
+            partialFilterExpression={'idempotency_key': {'$type': 'string'}}
+        )
+        db.jobs.create_index('uid')
+        # Finished jobs are removed automatically after the retention period
+        db.jobs.create_index('finished_at', expireAfterSeconds=Config.JOB_RETENTION_DAYS * 24 * 60 * 60)
+    
+    def enqueue(self, job_type: str, payload: Dict[str, Any] = None, priority: int = PRIORITY_NORMAL,
+                idempotency_key: str = None, uid: str = None, run_at: datetime = None,
+                max_attempts: int = None) -> dict:
+        """
+        Add a job to the queue
+        
+        Args:
+            job_type: Name of a registered job handler
+            payload: Arguments passed to the handler
+            priority: Higher priorities are claimed first
+            idempotency_key: Jobs sharing a key are only enqueued once
+            uid: Firebase UID of the user the job belongs to (for the status endpoint)
+            run_at: Earliest time the job may run (defaults to now)
+            max_attempts: Attempts before the job is marked failed
+        
+        Returns:
+            dict: The queued job, or the existing job with the same idempotency key
+        """
+        current_time = datetime.utcnow()
+        job = {
+            'type': job_type,
+            'payload': payload or {},
+            'priority': priority,
+            'status': self.STATUS_QUEUED,
+            'attempts': 0,
+            'max_attempts': max_attempts or Config.JOB_MAX_ATTEMPTS,
+            'uid': uid,
+            'run_at': run_at or current_time,
+            'created_at': current_time,
+            'updated_at': current_time
+        }
+        if idempotency_key:
+            job['idempotency_key'] = idempotency_key
+        
+        try:
+            result = self.jobs.insert_one(job)
+            job['_id'] = result.inserted_id
+            return job
+        except DuplicateKeyError:
+            return self.jobs.find_one({'idempotency_key': idempotency_key})
+    
+    def claim(self, worker_id: str) -> Optional[dict]:
+        """
+        Atomically claim the next due job
+        
+        Args:
+            worker_id: Identifier of the claiming worker
+        
+        Returns:
+            dict or None if no job is due
+        """
+        current_time = datetime.utcnow()
+        return self.jobs.find_one_and_update(
+            {'status': self.STATUS_QUEUED, 'run_at': {'$lte': current_time}},
+            {
+                '$set': {
+                    'status': self.STATUS_RUNNING,
+                    'locked_by': worker_id,
+                    'locked_at': current_time,
+                    'updated_at': current_time
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('priority', -1), ('run_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+    
+    def complete(self, job: dict, result: Any = None) -> None:
+        """Mark a claimed job as succeeded"""
+        current_time = datetime.utcnow()
+        self.jobs.update_one(
+            {'_id': job['_id'], 'locked_by': job.get('locked_by')},
+            {
+                '$set': {
+                    'status': self.STATUS_SUCCEEDED,
+                    'result': result,
+                    'finished_at': current_time,
+                    'updated_at': current_time
+                },
+                '$unset': {'locked_by': '', 'locked_at': ''}
+            }
+        )
+    
+    def fail(self, job: dict, error: str) -> None:
+        """
+        Record a failed attempt
+        
+        The job is retried with exponential backoff (plus jitter) until it
+        runs out of attempts, after which it is marked failed.
+        """
+        current_time = datetime.utcnow()
+        update = {
+            'last_error': error,
+            'updated_at': current_time
+        }
+        
+        if job['attempts'] < job['max_attempts']:
+            delay = min(
+                Config.JOB_RETRY_BASE_DELAY * (2 ** (job['attempts'] - 1)),
+                Config.JOB_RETRY_MAX_DELAY
+            )
+            update['status'] = self.STATUS_QUEUED
+            update['run_at'] = current_time + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+        else:
+            update['status'] = self.STATUS_FAILED
+            update['finished_at'] = current_time
+        
+        self.jobs.update_one(
+            {'_id': job['_id'], 'locked_by': job.get('locked_by')},
+            {'$set': update, '$unset': {'locked_by': '', 'locked_at': ''}}
+        )
+    
+    def heartbeat(self, job: dict) -> None:
+        """Refresh the lock of a long-running claimed job so requeue_stale leaves it alone"""
+        current_time = datetime.utcnow()
+        self.jobs.update_one(
+            {'_id': job['_id'], 'locked_by': job.get('locked_by')},
+            {'$set': {'locked_at': current_time, 'updated_at': current_time}}
+        )
+    
+    def requeue_stale(self, timeout_seconds: int = None) -> int:
+        """
+        Release jobs whose worker died while running them
+        
+        Returns:
+            int: Number of jobs put back in the queue
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=timeout_seconds or Config.JOB_LOCK_TIMEOUT)
+        result = self.jobs.update_many(
+            {'status': self.STATUS_RUNNING, 'locked_at': {'$lt': cutoff}},
+            {
+                '$set': {'status': self.STATUS_QUEUED, 'run_at': datetime.utcnow()},
+                '$unset': {'locked_by': '', 'locked_at': ''}
+            }
+        )
+        return result.modified_count
+    
+    def get(self, job_id: str) -> Optional[dict]:
+        """Get a job by id"""
+        try:
+            return self.jobs.find_one({'_id': ObjectId(job_id)})
+        except Exception:
+            return None
+    
+    @staticmethod
+    def serialize(job: dict) -> dict:
+        """Convert a job document into a JSON-safe status dict"""
+        return {
+            'job_id': str(job['_id']),
+            'type': job['type'],
+            'status': job['status'],
+            'priority': job['priority'],
+            'attempts': job['attempts'],
+            'max_attempts': job['max_attempts'],
+            'last_error': job.get('last_error'),
+            'result': job.get('result'),
+            'run_at': job['run_at'].isoformat(),
+            'created_at': job['created_at'].isoformat(),
+            'updated_at': job['updated_at'].isoformat(),
+            'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None
+        }
@@ -0,0 +1,240 @@
+from bson import ObjectId
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+from config import Config
+from services.ranking_service import RankingService
+from services.job_queue import JobQueue
+import time
+
+class OrphanCollector:
+    """
+    Finds and reclaims data that nothing references any more
+    
+    - files: stored files that are neither a resource file nor a preview
+    - chunks: GridFS chunks without a file document (an upload that died
+      inside fs.put), other than the chunks of live resumable uploads
+    - reviews and downloads: rows pointing at deleted resources
+    - resources: resources of users whose profile was deleted more than
+      Config.ORPHAN_PROFILE_GRACE_DAYS ago
+    
+    Work is done in batches with a pause after each one so a sweep does not
+    compete with user traffic. With dry_run the orphans are only counted
+    and sampled.
+    """
+    
+    SWEEPS = ('resources', 'reviews', 'downloads', 'files', 'chunks')
+    
+    SAMPLE_SIZE = 10
+    
+    def __init__(self, db, storage_service, batch_size: int = None, pause: float = None):
+        """
+        Args:
+            db: Database connection
+            storage_service: StorageService used to delete files
+            batch_size: Items checked per batch
+            pause: Seconds to sleep after each batch
+        """
+        self.db = db
+        self.storage_service = storage_service
+        self.ranking_service = RankingService(db)
+        self.job_queue = JobQueue(db)
+        self.batch_size = batch_size or Config.ORPHAN_GC_BATCH_SIZE
+        self.pause = Config.ORPHAN_GC_PAUSE if pause is None else pause
+    
+    def collect(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Run every sweep
+        
+        A sweep that fails is reported with its error and does not stop the others.
+        
+        Returns:
+            dict: Per-sweep report of items scanned, orphans found (or deleted) and a sample of them
+        """
+        sweeps = {
+            'resources': self.collect_resources_of_deleted_profiles,
+            'reviews': self.collect_reviews,
+            'downloads': self.collect_downloads,
+            'files': self.collect_files,
+            'chunks': self.collect_chunks
+        }
+        report = {'dry_run': dry_run}
+        # Resources go first so the files and reviews they leave behind are swept in the same run
+        for name in self.SWEEPS:
+            try:
+                report[name] = sweeps[name](dry_run)
+            except Exception as e:
+                print(f"Error collecting orphan {name}: {e}")
+                report[name] = {**self._new_report(), 'error': str(e)}
+        return report
+    
+    def collect_files(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Delete stored files (in any backend) older than the grace period that no resource references"""
+        cutoff = datetime.utcnow() - timedelta(hours=Config.ORPHAN_GRACE_HOURS)
+        report = self._new_report()
+        for batch in self._batches(str(file_id) for file_id in self.storage_service.iter_file_ids(uploaded_before=cutoff)):
+            referenced = set()
+            for resource in self.db.resources.find(
+                {'$or': [{'file_id': {'$in': batch}}, {'preview_file_id': {'$in': batch}}]},
+                {'file_id': 1, 'preview_file_id': 1}
+            ):
+                referenced.add(resource.get('file_id'))
+                referenced.add(resource.get('preview_file_id'))
+            
+            orphans = [file_id for file_id in batch if file_id not in referenced]
+            if orphans and not dry_run:
+                self.storage_service.delete_files(orphans, batch_size=Config.GRIDFS_DELETE_BATCH_SIZE)
+            self._record(report, batch, orphans)
+        return report
+    
+    def collect_chunks(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Delete GridFS chunks whose file document was never written"""
+        gridfs = self.storage_service.gridfs
+        cutoff = ObjectId.from_datetime(datetime.utcnow() - timedelta(hours=Config.ORPHAN_GRACE_HOURS))
+        report = self._new_report()
+        
+        # Streamed (and spilled to disk if needed) instead of one distinct reply capped at 16MB
+        files_ids = (row['_id'] for row in gridfs.chunks_collection.aggregate(
+            [{'$group': {'_id': '$files_id'}}], allowDiskUse=True
+        ))
+        for batch in self._batches(files_ids):
+            candidates = set(batch)
+            candidates -= {doc['_id'] for doc in gridfs.files_collection.find({'_id': {'$in': batch}}, {'_id': 1})}
+            # Resumable uploads write chunks long before the file document
+            candidates -= {session['file_id'] for session in self.db.upload_sessions.find(
+                {'file_id': {'$in': list(candidates)}}, {'file_id': 1}
+            )}
+            
+            orphans = []
+            for file_id in candidates:
+                # Chunk ids record when the chunk was written, even for files under fixed ids
+                newest = gridfs.chunks_collection.find_one({'files_id': file_id}, {'_id': 1}, sort=[('_id', -1)])
+                if newest and newest['_id'] < cutoff:
+                    orphans.append(file_id)
+            
+            if orphans and not dry_run:
+                gridfs.chunks_collection.delete_many({'files_id': {'$in': orphans}})
+            self._record(report, batch, [str(file_id) for file_id in orphans])
+        return report
+    
+    def collect_reviews(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Delete reviews of deleted resources"""
+        report = self._new_report()
+        resource_ids = (row['_id'] for row in self.db.reviews.aggregate(
+            [{'$group': {'_id': '$resource_id'}}], allowDiskUse=True
+        ))
+        for batch in self._batches(resource_ids):
+            orphans = self._missing_resources(batch)
+            if orphans and not dry_run:
+                self.db.reviews.delete_many({'resource_id': {'$in': orphans}})
+            self._record(report, batch, orphans)
+        return report
+    
+    def collect_downloads(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Delete download records of deleted resources (they only feed co-download similarity)"""
+        report = self._new_report()
+        resource_ids = (row['_id'] for row in self.db.user_downloads.aggregate(
+            [{'$group': {'_id': '$resource_id'}}], allowDiskUse=True
+        ))
+        for batch in self._batches(resource_ids):
+            orphans = self._missing_resources(batch)
+            if orphans and not dry_run:
+                self.db.user_downloads.delete_many({'resource_id': {'$in': [ObjectId(resource_id) for resource_id in orphans]}})
+            self._record(report, batch, orphans)
+        return report
+    
+    def collect_resources_of_deleted_profiles(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Delete the resources of users whose profile was deleted before the grace period
+        
+        A user who recreates their profile within the grace period keeps their resources.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=Config.ORPHAN_PROFILE_GRACE_DAYS)
+        report = self._new_report()
+        
+        for deleted_profile in list(self.db.deleted_profiles.find({'deleted_at': {'$lt': cutoff}})):
+            uid = deleted_profile['uid']
+            if self.db.profiles.find_one({'uid': uid}, {'_id': 1}):
+                # Profile was recreated; nothing to collect
+                if not dry_run:
+                    self.db.deleted_profiles.delete_one({'_id': deleted_profile['_id']})
+                continue
+            
+            cursor = self.db.resources.find({'uid': uid}, {'file_id': 1, 'preview_file_id': 1})
+            for batch in self._batches(cursor):
+                resource_ids = [str(resource['_id']) for resource in batch]
+                if not dry_run:
+                    self._delete_resources(uid, batch)
+                self._record(report, resource_ids, resource_ids)
+            
+            if not dry_run:
+                self.db.deleted_profiles.delete_one({'_id': deleted_profile['_id']})
+        
+        # Resources whose uploader never had a profile are reported, not deleted
+        report['without_profile'] = self._count_resources_without_profile()
+        return report
+    
+    def _delete_resources(self, uid: str, resources: List[dict]) -> None:
+        """Delete resources the way the delete endpoints do"""
+        resource_ids = [str(resource['_id']) for resource in resources]
+        file_ids = []
+        for resource in resources:
+            file_ids.extend(resource[field] for field in ('file_id', 'preview_file_id') if resource.get(field))
+        
+        self.storage_service.delete_files(file_ids, batch_size=Config.GRIDFS_DELETE_BATCH_SIZE)
+        self.db.resources.delete_many({'_id': {'$in': [resource['_id'] for resource in resources]}})
+        self.db.reviews.delete_many({'resource_id': {'$in': resource_ids}})
+        self.db.resource_tombstones.insert_many([
+            {'resource_id': resource_id, 'uid': uid, 'deleted_at': datetime.utcnow()}
+            for resource_id in resource_ids
+        ])
+        self.ranking_service.remove(resource_ids)
+        self.job_queue.enqueue('remove_from_search_index', {'resource_ids': resource_ids})
+    
+    def _missing_resources(self, resource_ids: list) -> List[str]:
+        """The ids in resource_ids (strings or ObjectIds) that have no resource document"""
+        object_ids = {}
+        for resource_id in resource_ids:
+            try:
+                object_ids[str(resource_id)] = ObjectId(resource_id)
+            except Exception:
+                continue
+        existing = {
+            str(resource['_id'])
+            for resource in self.db.resources.find({'_id': {'$in': list(object_ids.values())}}, {'_id': 1})
+        }
+        return [resource_id for resource_id in object_ids if resource_id not in existing]
+    
+    def _count_resources_without_profile(self) -> int:
+        """Count resources whose uploader has no profile"""
+        # Count per uploader first; only the (small) profile lookups are joined
+        result = list(self.db.resources.aggregate([
+            {'$group': {'_id': '$uid', 'count': {'$sum': 1}}},
+            {'$lookup': {'from': 'profiles', 'localField': '_id', 'foreignField': 'uid', 'as': 'profile'}},
+            {'$match': {'profile': []}},
+            {'$group': {'_id': None, 'count': {'$sum': '$count'}}}
+        ], allowDiskUse=True))
+        return result[0]['count'] if result else 0
+    
+    def _batches(self, items):
+        """Split an iterable into lists of batch_size, pausing after each batch is handled"""
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+                time.sleep(self.pause)
+        if batch:
+            yield batch
+    
+    def _new_report(self) -> Dict[str, Any]:
+        """Empty sweep report"""
+        return {'scanned': 0, 'orphans': 0, 'sample': []}
+    
+    def _record(self, report: Dict[str, Any], batch: list, orphans: list) -> None:
+        """Add a handled batch to a sweep report"""
+        report['scanned'] += len(batch)
+        report['orphans'] += len(orphans)
+        room = self.SAMPLE_SIZE - len(report['sample'])
+        if room > 0:
+            report['sample'].extend(str(orphan) for orphan in orphans[:room])
@@ -0,0 +1,147 @@
+from bson import ObjectId
+from datetime import datetime
+from typing import Optional, Tuple
+from config import Config
+import io
+
+# Optional dependencies: previews for their types are skipped when missing
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+PDF_TYPES = ['application/pdf']
+IMAGE_TYPES = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp']
+TEXT_TYPES = ['text/plain']
+
+class PreviewService:
+    """Service for generating small previews of stored resource files"""
+    
+    def __init__(self, db, storage_service):
+        """Initialize with database connection and storage service"""
+        self.db = db
+        self.storage_service = storage_service
+    
+    @staticmethod
+    def get_preview_kind(file_name: str, file_type: str) -> Optional[str]:
+        """
+        Decide which kind of preview a file gets
+        
+        Returns:
+            'pdf', 'image', 'text' or None if previews are not supported
+        """
+        file_name = (file_name or '').lower()
+        if file_type in PDF_TYPES or file_name.endswith('.pdf'):
+            return 'pdf'
+        if file_type in IMAGE_TYPES or file_name.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
+            return 'image'
+        if file_type in TEXT_TYPES or file_name.endswith('.txt'):
+            return 'text'
+        return None
+    
+    def generate_preview(self, resource_id: str) -> str:
+        """
+        Generate and store the preview of a resource
+        
+        Args:
+            resource_id: String representation of the resource ObjectId
+        
+        Returns:
+            str: The resulting preview status ('ready', 'unsupported' or 'missing')
+        """
+        resource = self.db.resources.find_one({'_id': ObjectId(resource_id)})
+        if not resource:
+            return 'missing'
+        
+        kind = self.get_preview_kind(resource.get('file_name'), resource.get('file_type'))
+        file_data = self.storage_service.get_file(resource['file_id']) if kind else None
+        
+        preview = None
+        if kind == 'pdf' and fitz:
+            preview = self._render_pdf(file_data.read())
+        elif kind == 'image' and Image:
+            preview = self._render_image(file_data.read())
+        elif kind == 'text':
+            preview = self._render_text(file_data)
+        
+        if not preview:
+            self.db.resources.update_one(
+                {'_id': resource['_id']},
+                {'$set': {'preview_status': 'unsupported', 'updated_at': datetime.utcnow()}}
+            )
+            return 'unsupported'
+        
+        data, content_type = preview
+        
+        # Store the preview next to the original file, tagged with what it previews
+        preview_file_id = self.storage_service.store_data(
+            data,
+            filename=f"preview_{resource['file_id']}",
+            content_type=content_type,
+            metadata={
+                'preview_of': resource['file_id'],
+                'resource_id': str(resource['_id']),
+                'created_at': datetime.utcnow()
+            }
+        )
+        
+        # Replace any earlier preview (e.g. when regenerating)
+        previous = self.db.resources.find_one_and_update(
+            {'_id': resource['_id']},
+            {'$set': {
+                'preview_file_id': str(preview_file_id),
+                'preview_type': content_type,
+                'preview_status': 'ready',
+                'updated_at': datetime.utcnow()
+            }},
+            projection={'preview_file_id': 1}
+        )
+        if previous is None:
+            # Resource was deleted while the preview was being generated
+            self.storage_service.delete_file(str(preview_file_id))
+            return 'missing'
+        if previous.get('preview_file_id'):
+            self.storage_service.delete_file(previous['preview_file_id'])
+        
+        return 'ready'
+    
+    @staticmethod
+    def _render_pdf(data: bytes) -> Optional[Tuple[bytes, str]]:
+        """Render the first page of a PDF as a PNG"""
+        document = fitz.open(stream=data, filetype='pdf')
+        try:
+            if document.page_count == 0:
+                return None
+            page = document[0]
+            zoom = Config.PREVIEW_MAX_DIMENSION / max(page.rect.width, page.rect.height)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            return pixmap.tobytes('png'), 'image/png'
+        finally:
+            document.close()
+    
+    @staticmethod
+    def _render_image(data: bytes) -> Optional[Tuple[bytes, str]]:
+        """Downscale an image to a JPEG thumbnail"""
+        image = Image.open(io.BytesIO(data))
+        image.thumbnail((Config.PREVIEW_MAX_DIMENSION, Config.PREVIEW_MAX_DIMENSION))
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=80, optimize=True)
+        return output.getvalue(), 'image/jpeg'
+    
+    @staticmethod
+    def _render_text(file_data) -> Optional[Tuple[bytes, str]]:
+        """Keep the beginning of a text file as a snippet"""
+        # UTF-8 uses at most 4 bytes per character
+        raw = file_data.read(Config.PREVIEW_TEXT_LENGTH * 4)
+        snippet = raw.decode('utf-8', errors='replace')[:Config.PREVIEW_TEXT_LENGTH]
+        if not snippet.strip():
+            return None
+        return snippet.encode('utf-8'), 'text/plain; charset=utf-8'
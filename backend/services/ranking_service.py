@@ -0,0 +1,164 @@
+from bson import ObjectId
+from typing import List, Iterable
+from pymongo import ReplaceOne
+
+# Sort orders served from the ranking table: sort name -> index key
+RANKING_SORTS = {
+    'popular': [('downloads', -1), ('views', -1), ('_id', -1)],
+    'rated': [('avg_rating', -1), ('created_at', -1), ('_id', -1)],
+    'trending': [('trend_log', -1), ('_id', -1)]
+}
+
+class RankingService:
+    """
+    Materialized ranking table for the popular, rated and trending browse sorts
+    
+    Every resource has one row in resource_rankings holding its access scope
+    ('public', or 'college:<name>' for private resources) and the fields it is
+    ranked by. Rows are kept current as resources, counters and ratings change,
+    and compound indexes on (scope, sort keys) let the top pages of a sort be
+    read in index order instead of sorting the filtered resources in memory.
+    """
+    
+    def __init__(self, db):
+        """Initialize with database connection"""
+        self.db = db
+        self.rankings = db.resource_rankings
+    
+    @staticmethod
+    def create_indexes(db) -> None:
+        """Create one index per ranking sort, prefixed by scope"""
+        for sort_name, keys in RANKING_SORTS.items():
+            db.resource_rankings.create_index([('scope', 1)] + keys, name=f'scope_{sort_name}')
+    
+    @staticmethod
+    def public_scope() -> str:
+        """Scope of public resources"""
+        return 'public'
+    
+    @staticmethod
+    def college_scope(college: str) -> str:
+        """Scope of private resources of a college"""
+        return f"college:{(college or '').strip().lower()}"
+    
+    @classmethod
+    def scope_for(cls, resource: dict) -> str:
+        """Access scope of a resource"""
+        if resource.get('privacy', 'Private') == 'Public':
+            return cls.public_scope()
+        return cls.college_scope(resource.get('college'))
+    
+    @classmethod
+    def build_row(cls, resource: dict) -> dict:
+        """Build the ranking row of a resource document"""
+        return {
+            '_id': resource['_id'] if isinstance(resource['_id'], ObjectId) else ObjectId(resource['_id']),
+            'scope': cls.scope_for(resource),
+            'downloads': resource.get('downloads', 0),
+            'views': resource.get('views', 0),
+            'avg_rating': resource.get('avg_rating', 0.0),
+            'trend_log': resource.get('trend_log'),
+            'created_at': resource.get('created_at')
+        }
+    
+    def sync_resources(self, resources: Iterable[dict]) -> None:
+        """Insert or replace the ranking rows of full resource documents in one round trip"""
+        operations = [
+            ReplaceOne({'_id': row['_id']}, row, upsert=True)
+            for row in (self.build_row(resource) for resource in resources)
+        ]
+        if operations:
+            self.rankings.bulk_write(operations, ordered=False)
+    
+    def sync_ids(self, resource_ids: Iterable) -> None:
+        """Refresh the ranking rows of resources after their metadata changed"""
+        object_ids = [ObjectId(resource_id) for resource_id in resource_ids]
+        if object_ids:
+            self.sync_resources(self.db.resources.find(
+                {'_id': {'$in': object_ids}},
+                {'privacy': 1, 'college': 1, 'downloads': 1, 'views': 1, 'avg_rating': 1, 'trend_log': 1, 'created_at': 1}
+            ))
+    
+    def set_rating(self, resource_id: str, avg_rating: float, trend_update: dict = None) -> None:
+        """Update the rating a resource is ranked by, optionally folding in a trending event stage"""
+        update = [{'$set': {'avg_rating': avg_rating}}]
+        if trend_update:
+            update.append(trend_update)
+        self.rankings.update_one({'_id': ObjectId(resource_id)}, update)
+    
+    def remove(self, resource_ids: Iterable) -> None:
+        """Remove the ranking rows of deleted resources"""
+        object_ids = [ObjectId(resource_id) for resource_id in resource_ids]
+        if object_ids:
+            self.rankings.delete_many({'_id': {'$in': object_ids}})
+    
+    def top(self, scopes: List[str], sort_by: str, skip: int = 0, limit: int = 0) -> List[ObjectId]:
+        """
+        Read a page of resource ids in ranking order
+        
+        With several scopes MongoDB merges the per-scope index ranges
+        (SORT_MERGE), so no blocking sort stage is needed.
+        
+        Args:
+            scopes: Access scopes visible to the caller
+            sort_by: 'popular', 'rated' or 'trending'
+            skip: Rows to skip
+            limit: Maximum rows (0 for all)
+        
+        Returns:
+            list: Resource ObjectIds, best first
+        """
+        cursor = self.rankings.find(
+            {'scope': {'$in': scopes}},
+            {'_id': 1}
+        ).sort(RANKING_SORTS[sort_by]).skip(skip).limit(limit)
+        return [row['_id'] for row in cursor]
+    
+    def rebuild(self) -> int:
+        """
+        Recompute every ranking row from the resources collection
+        
+        Used to backfill the table and as a periodic safety net; regular
+        updates are applied incrementally.
+        
+        Returns:
+            int: Number of ranking rows after the rebuild
+        """
+        self.db.resources.aggregate([
+            {'$project': {
+                'scope': {
+                    '$cond': [
+                        {'$eq': ['$privacy', 'Public']},
+                        'public',
+                        {'$concat': ['college:', {'$toLower': {'$trim': {'input': {'$ifNull': ['$college', '']}}}}]}
+                    ]
+                },
+                'downloads': {'$ifNull': ['$downloads', 0]},
+                'views': {'$ifNull': ['$views', 0]},
+                'avg_rating': {'$ifNull': ['$avg_rating', 0.0]},
+                'trend_log': {'$ifNull': ['$trend_log', None]},
+                'created_at': 1
+            }},
+            {'$merge': {'into': 'resource_rankings', 'on': '_id', 'whenMatched': 'replace', 'whenNotMatched': 'insert'}}
+        ])
+        
+        # Drop rows of resources deleted while no incremental update reached the table
+        existing = set()
+        stale = []
+        for row in self.rankings.find({}, {'_id': 1}).batch_size(1000):
+            existing.add(row['_id'])
+            if len(existing) >= 1000:
+                stale.extend(self._missing_resources(existing))
+                existing = set()
+        stale.extend(self._missing_resources(existing))
+        if stale:
+            self.rankings.delete_many({'_id': {'$in': stale}})
+        
+        return self.rankings.count_documents({})
+    
+    def _missing_resources(self, ids) -> List[ObjectId]:
+        """Return the ids that no longer exist in the resources collection"""
+        if not ids:
+            return []
+        found = {resource['_id'] for resource in self.db.resources.find({'_id': {'$in': list(ids)}}, {'_id': 1})}
+        return [resource_id for resource_id in ids if resource_id not in found]
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+import threading
+import time
+
+class TokenBucketLimiter:
+    """
+    Token buckets per key (uid or IP address)
+    
+    Each bucket holds up to burst tokens and refills continuously at rate
+    tokens per second; a request is admitted if it can take its cost. Buckets
+    live in process memory, so limits apply per worker process, and the least
+    recently used buckets are dropped beyond max_keys (a dropped bucket
+    starts over full).
+    """
+    
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        """
+        Args:
+            rate: Tokens added per second (0 disables the limiter)
+            burst: Bucket capacity
+            max_keys: Buckets kept before the least recently used are dropped
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()  # key -> [tokens, last refill time]
+        self.lock = threading.Lock()
+    
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """
+        Take cost tokens from a bucket
+        
+        Returns:
+            float: 0 if admitted, otherwise seconds until the bucket holds enough tokens
+        """
+        if self.rate <= 0:
+            return 0.0
+        
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                self.buckets.move_to_end(key)
+            
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / self.rate
+            self.buckets[key] = [tokens, now]
+            
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+class ConcurrencyLimiter:
+    """Non-blocking counting semaphore: callers over the limit are turned away instead of queued"""
+    
+    def __init__(self, limit: int):
+        """Initialize with the number of concurrent holders allowed (0 disables the limiter)"""
+        self.limit = limit
+        self.active = 0
+        self.lock = threading.Lock()
+    
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free"""
+        with self.lock:
+            if self.limit and self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+    
+    def release(self) -> None:
+        """Give back a slot taken with try_acquire"""
+        with self.lock:
+            self.active = max(0, self.active - 1)
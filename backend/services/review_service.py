@@ -0,0 +1,88 @@
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from services.ranking_service import RankingService
+from bson import ObjectId
+
+class ReviewService:
+    """Index setup and repair of the reviews collection"""
+    
+    def __init__(self, db):
+        """Initialize with database connection"""
+        self.db = db
+        self.ranking_service = RankingService(db)
+    
+    @classmethod
+    def create_indexes(cls, db) -> None:
+        """
+        Create the indexes of the reviews collection
+        
+        Before reviews were written with an atomic upsert a user could end up
+        with two reviews of a resource; if the unique index cannot be built
+        because of such pairs, they are deduplicated first.
+        """
+        try:
+            db.reviews.create_index([('resource_id', 1), ('uid', 1)], unique=True)
+        except (DuplicateKeyError, OperationFailure):
+            removed = cls(db).dedupe()
+            print(f"🧹 Removed {removed} duplicate reviews")
+            db.reviews.create_index([('resource_id', 1), ('uid', 1)], unique=True)
+        
+        # Newest-first pages, rating summaries (covered by the index), and incremental exports
+        db.reviews.create_index([('resource_id', 1), ('updated_at', -1), ('_id', -1)])
+        db.reviews.create_index([('resource_id', 1), ('rating', 1)])
+        db.reviews.create_index('updated_at')
+    
+    def dedupe(self) -> int:
+        """
+        Keep only the newest review of every (resource, user) pair
+        
+        Ratings of the affected resources are recomputed, and the removed
+        reviews are recorded as tombstones for incremental exports.
+        
+        Returns:
+            int: Number of reviews removed
+        """
+        duplicates = self.db.reviews.aggregate([
+            {'$sort': {'updated_at': -1, '_id': -1}},
+            {'$group': {
+                '_id': {'resource_id': '$resource_id', 'uid': '$uid'},
+                'review_ids': {'$push': '$_id'},
+                'count': {'$sum': 1}
+            }},
+            {'$match': {'count': {'$gt': 1}}}
+        ], allowDiskUse=True)
+        
+        removed = 0
+        resource_ids = set()
+        deleted_at = datetime.utcnow()
+        for duplicate in duplicates:
+            stale_ids = duplicate['review_ids'][1:]
+            self.db.reviews.delete_many({'_id': {'$in': stale_ids}})
+            self.db.review_tombstones.insert_many([
+                {'review_id': str(review_id), 'resource_id': duplicate['_id']['resource_id'], 'deleted_at': deleted_at}
+                for review_id in stale_ids
+            ])
+            removed += len(stale_ids)
+            resource_ids.add(duplicate['_id']['resource_id'])
+        
+        for resource_id in resource_ids:
+            self.refresh_rating(resource_id)
+        return removed
+    
+    def refresh_rating(self, resource_id: str) -> None:
+        """Recompute the average rating and review count of a resource from its reviews"""
+        if not ObjectId.is_valid(resource_id):
+            return
+        stats = list(self.db.reviews.aggregate([
+            {'$match': {'resource_id': resource_id}},
+            {'$group': {'_id': None, 'avg_rating': {'$avg': '$rating'}, 'count': {'$sum': 1}}}
+        ]))
+        avg_rating = stats[0]['avg_rating'] if stats else 0.0
+        review_count = stats[0]['count'] if stats else 0
+        
+        result = self.db.resources.update_one(
+            {'_id': ObjectId(resource_id)},
+            {'$set': {'avg_rating': avg_rating, 'review_count': review_count, 'updated_at': datetime.utcnow()}}
+        )
+        if result.matched_count:
+            self.ranking_service.set_rating(resource_id, avg_rating)
@@ -0,0 +1,551 @@
+from typing import Dict, List, Iterable
+from contextlib import contextmanager
+from config import Config
+import threading
+import heapq
+import json
+import zlib
+import time
+import os
+import re
+
+# Portable exclusive file lock for index writers (worker processes and the web app)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+MAX_TOKEN_LENGTH = 40
+LIVE_FILE_PATTERN = re.compile(r'live_(\d+)\.(json|log)')
+
+# Postings blocks at least this large are zlib-compressed
+COMPRESSION_THRESHOLD = 64
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens; a token's index is its position"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) <= MAX_TOKEN_LENGTH]
+
+def _encode_varint(value: int, out: bytearray) -> None:
+    """Append an unsigned LEB128 varint"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _decode_varints(data: bytes) -> List[int]:
+    """Decode a buffer of consecutive unsigned LEB128 varints"""
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+def _encode_postings(postings: Dict[int, List[int]]) -> bytes:
+    """
+    Encode the positional postings of one term
+    
+    Layout (all varints): doc count, then per document in ascending order
+    the doc number delta, the position count and the position deltas.
+    The block is prefixed with a flag byte telling whether it is zlib-compressed.
+    """
+    out = bytearray()
+    _encode_varint(len(postings), out)
+    previous_doc = 0
+    for doc_num in sorted(postings):
+        positions = postings[doc_num]
+        _encode_varint(doc_num - previous_doc, out)
+        _encode_varint(len(positions), out)
+        previous_position = 0
+        for position in positions:
+            _encode_varint(position - previous_position, out)
+            previous_position = position
+        previous_doc = doc_num
+    
+    raw = bytes(out)
+    if len(raw) >= COMPRESSION_THRESHOLD:
+        compressed = zlib.compress(raw)
+        if len(compressed) < len(raw):
+            return b'\x01' + compressed
+    return b'\x00' + raw
+
+def _decode_postings(block: bytes) -> Dict[int, List[int]]:
+    """Decode a block written by _encode_postings"""
+    raw = zlib.decompress(block[1:]) if block[:1] == b'\x01' else block[1:]
+    values = _decode_varints(raw)
+    
+    postings = {}
+    index = 1
+    doc_num = 0
+    for _ in range(values[0]):
+        doc_num += values[index]
+        count = values[index + 1]
+        index += 2
+        positions = []
+        position = 0
+        for delta in values[index:index + count]:
+            position += delta
+            positions.append(position)
+        index += count
+        postings[doc_num] = positions
+    return postings
+
+class _Segment:
+    """An immutable index segment: a term dictionary plus a postings file"""
+    
+    def __init__(self, directory: str, name: str):
+        """Load the term dictionary and open the postings file"""
+        self.name = name
+        with open(os.path.join(directory, f'{name}.dict'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.docs = meta['docs']  # doc number -> resource id
+        self.terms = meta['terms']  # term -> [offset, length]
+        self.postings_file = open(os.path.join(directory, f'{name}.post'), 'rb')
+        self.lock = threading.Lock()
+    
+    def postings(self, term: str) -> Dict[int, List[int]]:
+        """Get the positional postings of a term (doc number -> positions)"""
+        entry = self.terms.get(term)
+        if not entry:
+            return {}
+        offset, length = entry
+        with self.lock:
+            self.postings_file.seek(offset)
+            block = self.postings_file.read(length)
+        return _decode_postings(block)
+    
+    def close(self) -> None:
+        """Close the postings file"""
+        self.postings_file.close()
+
+class _LiveMap:
+    """
+    Resource id -> name of the segment holding its live copy
+    
+    Stored as a snapshot (live_<generation>.json) plus an append-only log
+    (live_<generation>.log) of the changes since, merges included; the
+    snapshot is rewritten only once the log holds more entries than the map.
+    The manifest records how many bytes of the log are committed; bytes past
+    that were written by a writer that failed before committing and are
+    ignored (and overwritten). Each reader and writer caches the map and
+    only reads new log entries.
+    """
+    
+    def __init__(self, directory: str):
+        """Initialize for the index in directory"""
+        self.directory = directory
+        self.reset()
+    
+    def reset(self) -> None:
+        """Forget the cached map so the next load reads it from disk"""
+        self.docs = None
+        self.generation = None
+        self.offset = 0
+    
+    def load(self, manifest: dict) -> Dict[str, str]:
+        """Bring the cached map up to date with a manifest"""
+        generation = manifest.get('live_generation', 0)
+        size = manifest.get('live_log_size', 0)
+        if self.docs is None or generation != self.generation or size < self.offset:
+            self.docs = {}
+            if generation:
+                with open(self._path(generation, 'json'), 'r', encoding='utf-8') as f:
+                    self.docs = json.load(f)
+            self.generation = generation
+            self.offset = 0
+        
+        if size > self.offset:
+            with open(self._path(generation, 'log'), 'rb') as f:
+                f.seek(self.offset)
+                entries = f.read(size - self.offset)
+            for line in entries.splitlines():
+                resource_id, name = json.loads(line)
+                if name:
+                    self.docs[resource_id] = name
+                else:
+                    self.docs.pop(resource_id, None)
+            self.offset = size
+        return self.docs
+    
+    def append(self, manifest: dict, entries: List[list]) -> None:
+        """Append [resource id, segment name or None] changes to the log; they count once the manifest is written"""
+        generation = manifest.get('live_generation', 0)
+        size = manifest.get('live_log_size', 0)
+        data = b''.join(json.dumps(entry, separators=(',', ':')).encode('utf-8') + b'\n' for entry in entries)
+        with open(self._path(generation, 'log'), 'a+b') as f:
+            f.truncate(size)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        manifest['live_log_size'] = size + len(data)
+        manifest['live_log_entries'] = manifest.get('live_log_entries', 0) + len(entries)
+        self.offset = manifest['live_log_size']
+    
+    def snapshot(self, manifest: dict) -> None:
+        """Write the whole map as a new generation with an empty log"""
+        generation = manifest.get('live_generation', 0) + 1
+        path = self._path(generation, 'json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.docs, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        manifest.update({'live_generation': generation, 'live_log_size': 0, 'live_log_entries': 0})
+        self.generation = generation
+        self.offset = 0
+    
+    def _path(self, generation: int, extension: str) -> str:
+        """Location of a snapshot or log file"""
+        return os.path.join(self.directory, f'live_{generation:08d}.{extension}')
+
+class SearchIndex:
+    """
+    Compressed on-disk inverted index with positional postings
+    
+    Every indexed document is written as a new immutable segment; the live
+    map (see _LiveMap) points each resource id at the segment holding its
+    live copy, so re-indexing or deleting a document never rewrites other
+    segments. The manifest lists the segments with their live document
+    counts. Small segments are merged in the background of writes,
+    dropping postings of deleted or replaced documents.
+    """
+    
+    def __init__(self, index_dir: str = None):
+        """Initialize the index in index_dir (created if missing)"""
+        self.index_dir = index_dir or Config.SEARCH_INDEX_DIR
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.index_dir, 'manifest.json')
+        self.lock_path = os.path.join(self.index_dir, 'write.lock')
+        
+        # Reader and writer state cached per process
+        self.segments: Dict[str, _Segment] = {}
+        self.manifest = None
+        self.manifest_mtime = None
+        self.reader_live = _LiveMap(self.index_dir)
+        self.reader_lock = threading.Lock()
+        self.writer_live = _LiveMap(self.index_dir)
+    
+    def add_document(self, resource_id: str, text: str) -> int:
+        """
+        Index (or re-index) the text of a resource
+        
+        Returns:
+            int: Number of tokens indexed
+        """
+        resource_id = str(resource_id)
+        tokens = tokenize(text or '')
+        
+        with self._transaction() as (manifest, live):
+            if tokens:
+                postings = {}
+                for position, token in enumerate(tokens):
+                    postings.setdefault(token, {0: []})[0].append(position)
+                
+                name = self._new_segment_name(manifest)
+                self._write_segment(name, [resource_id], ((term, postings[term]) for term in sorted(postings)))
+                manifest['segments'][name] = 0
+                self._set_live(manifest, live, [(resource_id, name)])
+            elif resource_id in live:
+                self._set_live(manifest, live, [(resource_id, None)])
+            
+            self._commit(manifest, live)
+        
+        return len(tokens)
+    
+    def remove_documents(self, resource_ids: Iterable[str]) -> int:
+        """
+        Remove resources from the index
+        
+        Their postings stay in the segment files until the segment is merged
+        but are ignored by searches from now on.
+        
+        Returns:
+            int: Number of documents removed
+        """
+        with self._transaction() as (manifest, live):
+            removed = [(resource_id, None) for resource_id in dict.fromkeys(map(str, resource_ids)) if resource_id in live]
+            if removed:
+                self._set_live(manifest, live, removed)
+                self._commit(manifest, live)
+        return len(removed)
+    
+    @contextmanager
+    def _transaction(self):
+        """Hold the write lock with the current manifest and live map"""
+        with self._write_lock():
+            manifest = self._read_manifest()
+            try:
+                live = self.writer_live.load(manifest)
+                yield manifest, live
+            except Exception:
+                # The cached map may hold changes that were never committed
+                self.writer_live.reset()
+                raise
+    
+    def _set_live(self, manifest: dict, live: Dict[str, str], changes: List[tuple]) -> None:
+        """Point resource ids at segments (None removes them), keeping the live counts and log in step"""
+        segments = manifest['segments']
+        for resource_id, name in changes:
+            previous = live.pop(resource_id, None)
+            if previous in segments:
+                segments[previous] -= 1
+            if name:
+                live[resource_id] = name
+                segments[name] += 1
+        self.writer_live.append(manifest, [list(change) for change in changes])
+    
+    def _commit(self, manifest: dict, live: Dict[str, str]) -> None:
+        """Compact, snapshot the live map once its log outgrows it, and write the manifest"""
+        self._compact(manifest, live)
+        if manifest.get('live_log_entries', 0) > len(live):
+            self.writer_live.snapshot(manifest)
+        self._write_manifest(manifest)
+    
+    def _compact(self, manifest: dict, live: Dict[str, str]) -> None:
+        """Drop segments without live documents and merge small segments"""
+        segments = manifest['segments']
+        remaining = [name for name, count in segments.items() if count > 0]
+        if len(remaining) > Config.SEARCH_MAX_SEGMENTS:
+            # Merge the smaller half so large segments are rewritten rarely
+            remaining.sort(key=segments.get)
+            self._merge_segments(manifest, live, remaining[:max(2, len(remaining) // 2)])
+        
+        # Merged segments are left without live documents too
+        obsolete = [name for name, count in segments.items() if count <= 0]
+        for name in obsolete:
+            segments.pop(name)
+        manifest['obsolete'] = sorted(set(manifest.get('obsolete', [])) | set(obsolete))
+    
+    def _merge_segments(self, manifest: dict, live: Dict[str, str], names: List[str]) -> None:
+        """
+        Merge segments into a new one, keeping only live documents
+        
+        Terms are merged one at a time so memory stays bounded by the
+        largest single postings list rather than the whole index.
+        """
+        segments = [_Segment(self.index_dir, name) for name in names]
+        try:
+            docs = []
+            remaps = []  # per segment: old doc number -> new doc number
+            for segment in segments:
+                remap = {}
+                for doc_num, resource_id in enumerate(segment.docs):
+                    if live.get(resource_id) == segment.name:
+                        remap[doc_num] = len(docs)
+                        docs.append(resource_id)
+                remaps.append(remap)
+            
+            if not docs:
+                return
+            
+            def merged_terms():
+                for term in sorted(set().union(*(segment.terms.keys() for segment in segments))):
+                    postings = {}
+                    for segment, remap in zip(segments, remaps):
+                        for doc_num, positions in segment.postings(term).items():
+                            if doc_num in remap:
+                                postings[remap[doc_num]] = positions
+                    if postings:
+                        yield term, postings
+            
+            name = self._new_segment_name(manifest)
+            self._write_segment(name, docs, merged_terms())
+            manifest['segments'][name] = 0
+            self._set_live(manifest, live, [(resource_id, name) for resource_id in docs])
+        finally:
+            for segment in segments:
+                segment.close()
+    
+    def _write_segment(self, name: str, docs: List[str], terms) -> None:
+        """Write a segment's postings and dictionary files atomically"""
+        post_path = os.path.join(self.index_dir, f'{name}.post')
+        dict_path = os.path.join(self.index_dir, f'{name}.dict')
+        
+        dictionary = {}
+        offset = 0
+        with open(post_path + '.tmp', 'wb') as f:
+            for term, postings in terms:
+                block = _encode_postings(postings)
+                f.write(block)
+                dictionary[term] = [offset, len(block)]
+                offset += len(block)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(post_path + '.tmp', post_path)
+        
+        with open(dict_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'docs': docs, 'terms': dictionary}, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(dict_path + '.tmp', dict_path)
+    
+    def _read_manifest(self) -> dict:
+        """Read the manifest, or an empty one for a new index"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'next_segment': 1, 'segments': {}, 'obsolete': [], 'live_generation': 0, 'live_log_size': 0}
+    
+    def _write_manifest(self, manifest: dict) -> None:
+        """Atomically replace the manifest, then delete files of obsolete segments and live map generations"""
+        with open(self.manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+        
+        # Files still open elsewhere (Windows) are retried on the next write
+        still_obsolete = []
+        for name in manifest.get('obsolete', []):
+            try:
+                for extension in ('post', 'dict'):
+                    path = os.path.join(self.index_dir, f'{name}.{extension}')
+                    if os.path.exists(path):
+                        os.remove(path)
+            except OSError:
+                still_obsolete.append(name)
+        if still_obsolete != manifest.get('obsolete', []):
+            manifest['obsolete'] = still_obsolete
+            with open(self.manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, separators=(',', ':'))
+            os.replace(self.manifest_path + '.tmp', self.manifest_path)
+        
+        generation = manifest.get('live_generation', 0)
+        for file_name in os.listdir(self.index_dir):
+            match = LIVE_FILE_PATTERN.fullmatch(file_name)
+            if match and int(match.group(1)) < generation:
+                try:
+                    os.remove(os.path.join(self.index_dir, file_name))
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def _new_segment_name(manifest: dict) -> str:
+        """Allocate the next segment name"""
+        number = manifest['next_segment']
+        manifest['next_segment'] = number + 1
+        return f'seg_{number:08d}'
+    
+    @contextmanager
+    def _write_lock(self):
+        """Hold an exclusive lock across processes while the index is modified"""
+        with open(self.lock_path, 'a+b') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.05)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    
+    def search(self, query: str, limit: int = None) -> List[str]:
+        """
+        Find resources whose text contains every query term
+        
+        Quoted parts of the query ("shortest path") must appear as exact phrases.
+        
+        Returns:
+            list: Resource ids, best matches first
+        """
+        limit = limit or Config.SEARCH_MAX_CONTENT_HITS
+        phrases = [tokenize(phrase) for phrase in PHRASE_PATTERN.findall(query)]
+        words = tokenize(PHRASE_PATTERN.sub(' ', query))
+        clauses = [phrase for phrase in phrases if phrase] + [[word] for word in dict.fromkeys(words)]
+        if not clauses:
+            return []
+        
+        for attempt in range(2):
+            try:
+                live, segments = self._open_for_reading()
+                break
+            except FileNotFoundError:
+                # A merge removed a segment or live map generation between reading the manifest and opening it
+                self.manifest_mtime = None
+                self.reader_live.reset()
+                if attempt:
+                    raise
+        
+        scores = {}
+        for segment in segments:
+            for doc_num, score in self._search_segment(segment, clauses).items():
+                resource_id = segment.docs[doc_num]
+                if live.get(resource_id) == segment.name:
+                    scores[resource_id] = score
+        
+        return heapq.nlargest(limit, scores, key=scores.get)
+    
+    @staticmethod
+    def _search_segment(segment: _Segment, clauses: List[List[str]]) -> Dict[int, int]:
+        """Match all clauses against one segment; returns doc number -> score"""
+        matches = None
+        for clause in clauses:
+            term_postings = [segment.postings(term) for term in clause]
+            candidates = set(term_postings[0])
+            for postings in term_postings[1:]:
+                candidates &= postings.keys()
+            if matches is not None:
+                candidates &= matches.keys()
+            
+            clause_matches = {}
+            for doc_num in candidates:
+                if len(clause) == 1:
+                    occurrences = len(term_postings[0][doc_num])
+                else:
+                    # Count start positions where each following term is at the next position
+                    following = [set(postings[doc_num]) for postings in term_postings[1:]]
+                    occurrences = sum(
+                        1 for start in term_postings[0][doc_num]
+                        if all(start + offset in positions for offset, positions in enumerate(following, 1))
+                    )
+                if occurrences:
+                    clause_matches[doc_num] = occurrences
+            
+            matches = clause_matches if matches is None else {
+                doc_num: matches[doc_num] + count for doc_num, count in clause_matches.items()
+            }
+            if not matches:
+                return {}
+        return matches or {}
+    
+    def _open_for_reading(self):
+        """Load the current manifest and live map and open its segments (cached per process)"""
+        with self.reader_lock:
+            try:
+                mtime = os.stat(self.manifest_path).st_mtime_ns
+            except FileNotFoundError:
+                return {}, []
+            
+            if mtime != self.manifest_mtime:
+                manifest = self._read_manifest()
+                self.reader_live.load(manifest)
+                self.manifest = manifest
+                self.manifest_mtime = mtime
+                
+                # Open new segments and close the ones that were merged away
+                for name in list(self.segments):
+                    if name not in self.manifest['segments']:
+                        self.segments.pop(name).close()
+                for name in self.manifest['segments']:
+                    if name not in self.segments:
+                        self.segments[name] = _Segment(self.index_dir, name)
+            
+            return self.reader_live.docs, list(self.segments.values())
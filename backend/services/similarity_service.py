@@ -0,0 +1,180 @@
+from bson import ObjectId
+from datetime import datetime
+from typing import List, Dict, Any
+from pymongo import ReplaceOne
+from scipy import sparse
+from config import Config
+import numpy as np
+
+# Weight of each metadata feature kind before IDF scaling
+FEATURE_WEIGHTS = {
+    'tag': 1.0,
+    'subject': 2.0,
+    'branch': 0.5,
+    'semester': 0.5
+}
+
+def _get_features(resource: dict) -> set:
+    """Metadata features of a resource as (kind, value) pairs"""
+    features = set()
+    for tag in resource.get('tags') or []:
+        if isinstance(tag, str) and tag.strip():
+            features.add(('tag', tag.strip().lower()))
+    if resource.get('subject'):
+        features.add(('subject', str(resource['subject']).strip().lower()))
+    if resource.get('branch'):
+        features.add(('branch', str(resource['branch']).strip().lower()))
+    if resource.get('semester') is not None:
+        features.add(('semester', str(resource['semester'])))
+    return features
+
+def _normalize_rows(matrix):
+    """Scale every row of a sparse matrix to unit length (empty rows stay empty)"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return sparse.diags(inverse) @ matrix
+
+class SimilarityService:
+    """
+    Precomputed related-resource lists
+    
+    Similarity is the cosine of IDF-weighted metadata vectors (tags, subject,
+    branch, semester) blended with the cosine of co-download vectors (which
+    users downloaded a resource). It is computed offline in row blocks with
+    sparse matrix products, and the top neighbors of every resource are
+    stored in resource_neighbors so serving is a single _id lookup.
+    
+    Features shared by a large part of the library are dropped from the
+    metadata vectors (see Config.RELATED_MAX_FEATURE_SHARE): every pair of
+    resources sharing one would get a nonzero score, making each block
+    product dense and the run quadratic in the library size.
+    """
+    
+    def __init__(self, db):
+        """Initialize with database connection"""
+        self.db = db
+        self.neighbors = db.resource_neighbors
+    
+    def get_neighbors(self, resource_id: str) -> List[Dict[str, Any]]:
+        """Get the stored neighbors of a resource, most similar first"""
+        entry = self.neighbors.find_one({'_id': ObjectId(resource_id)}, {'neighbors': 1})
+        return entry['neighbors'] if entry else []
+    
+    def compute(self, top_k: int = None, block_size: int = None) -> int:
+        """
+        Recompute the neighbor lists of every resource
+        
+        Args:
+            top_k: Neighbors stored per resource
+            block_size: Resources scored per sparse matrix product
+        
+        Returns:
+            int: Number of neighbor lists written
+        """
+        top_k = top_k or Config.RELATED_TOP_K
+        block_size = block_size or Config.RELATED_BLOCK_SIZE
+        started_at = datetime.utcnow()
+        
+        resource_ids, features = self._build_feature_matrix()
+        co_downloads = self._build_co_download_matrix(resource_ids)
+        co_download_weight = Config.RELATED_CO_DOWNLOAD_WEIGHT
+        
+        written = 0
+        for start in range(0, len(resource_ids), block_size):
+            end = min(start + block_size, len(resource_ids))
+            scores = (
+                (1 - co_download_weight) * (features[start:end] @ features.T)
+                + co_download_weight * (co_downloads[start:end] @ co_downloads.T)
+            ).tocsr()
+            
+            operations = []
+            for row in range(end - start):
+                position = start + row
+                row_start, row_end = scores.indptr[row], scores.indptr[row + 1]
+                columns = scores.indices[row_start:row_end]
+                values = scores.data[row_start:row_end]
+                
+                # A resource is not related to itself
+                keep = (columns != position) & (values > 0)
+                columns, values = columns[keep], values[keep]
+                
+                if len(values) > top_k:
+                    best = np.argpartition(-values, top_k)[:top_k]
+                    columns, values = columns[best], values[best]
+                order = np.argsort(-values, kind='stable')
+                
+                operations.append(ReplaceOne(
+                    {'_id': resource_ids[position]},
+                    {
+                        'neighbors': [
+                            {'resource_id': resource_ids[column], 'score': round(float(value), 4)}
+                            for column, value in zip(columns[order], values[order])
+                        ],
+                        'computed_at': started_at
+                    },
+                    upsert=True
+                ))
+            
+            if operations:
+                self.neighbors.bulk_write(operations, ordered=False)
+                written += len(operations)
+        
+        # Lists of resources deleted since the last run were not rewritten
+        self.neighbors.delete_many({'computed_at': {'$lt': started_at}})
+        return written
+    
+    def _build_feature_matrix(self):
+        """
+        Build the resources x features matrix with IDF weighting
+        Returns: (list of resource ObjectIds, row-normalized CSR matrix)
+        """
+        resource_ids = []
+        vocabulary = {}
+        rows, columns, values = [], [], []
+        
+        cursor = self.db.resources.find({}, {'tags': 1, 'subject': 1, 'branch': 1, 'semester': 1}).batch_size(1000)
+        for position, resource in enumerate(cursor):
+            resource_ids.append(resource['_id'])
+            for feature in _get_features(resource):
+                rows.append(position)
+                columns.append(vocabulary.setdefault(feature, len(vocabulary)))
+                values.append(FEATURE_WEIGHTS[feature[0]])
+        
+        matrix = sparse.csr_matrix(
+            (np.array(values, dtype=np.float32), (rows, columns)),
+            shape=(len(resource_ids), len(vocabulary))
+        )
+        
+        # Features shared by few resources are stronger evidence of similarity
+        document_frequency = np.bincount(np.array(columns, dtype=np.int64), minlength=len(vocabulary))
+        idf = np.log((1 + len(resource_ids)) / (1 + document_frequency)) + 1
+        
+        # Leave out features too common to be worth a (dense) product
+        limit = max(Config.RELATED_MAX_FEATURE_SHARE * len(resource_ids), Config.RELATED_MIN_FEATURE_LIMIT)
+        idf[document_frequency > limit] = 0
+        
+        weighted = (matrix @ sparse.diags(idf.astype(np.float32))).tocsr()
+        weighted.eliminate_zeros()
+        return resource_ids, _normalize_rows(weighted).tocsr()
+    
+    def _build_co_download_matrix(self, resource_ids: List[ObjectId]):
+        """
+        Build the resources x users download matrix
+        Returns: row-normalized CSR matrix aligned with resource_ids
+        """
+        positions = {resource_id: position for position, resource_id in enumerate(resource_ids)}
+        users = {}
+        rows, columns = [], []
+        
+        for download in self.db.user_downloads.find({}, {'uid': 1, 'resource_id': 1}).batch_size(5000):
+            position = positions.get(download['resource_id'])
+            if position is None:
+                continue
+            rows.append(position)
+            columns.append(users.setdefault(download['uid'], len(users)))
+        
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(len(resource_ids), len(users))
+        )
+        return _normalize_rows(matrix).tocsr()
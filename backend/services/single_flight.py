@@ -0,0 +1,61 @@
+from typing import Any, Callable, Hashable
+import threading
+
+class _Call:
+    """An in-flight call whose outcome is shared with waiting callers"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests into one execution
+    
+    The first caller for a key (the leader) runs the function; callers
+    arriving with the same key while it runs wait for and share its result,
+    or get its exception re-raised. Nothing is cached once the call ends.
+    """
+    
+    def __init__(self, timeout: float = None):
+        """
+        Args:
+            timeout: Seconds a waiting caller waits for the leader before giving up
+        """
+        self.timeout = timeout
+        self.calls = {}  # key -> _Call
+        self.lock = threading.Lock()
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key
+        
+        Raises:
+            TimeoutError: If the leader did not finish within the timeout
+            Exception: Whatever fn raised in the leader
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self.calls[key] = call
+        
+        if not leader:
+            if not call.done.wait(self.timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight request {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
@@ -0,0 +1,312 @@
+from abc import ABC, abstractmethod
+from gridfs import GridFS
+from gridfs.errors import NoFile
+from bson import ObjectId, json_util
+from typing import Optional, BinaryIO, Iterator, List, Dict
+from datetime import datetime
+from config import Config
+import os
+import tempfile
+
+class StoredFile:
+    """
+    A stored file opened for reading, optionally limited to a byte range
+    
+    Exposes the file's attributes (length, content_type, filename, metadata,
+    upload_date) the way GridOut does, so callers do not depend on the backend.
+    """
+    
+    def __init__(self, stream: BinaryIO, attributes: dict, start: int = 0, end: int = None):
+        """
+        Args:
+            stream: Seekable stream over the whole file
+            attributes: Result of the backend's stat()
+            start: First byte to read
+            end: Byte after the last one to read (defaults to the end of the file)
+        """
+        self.stream = stream
+        self.length = attributes['length']
+        self.content_type = attributes.get('content_type')
+        self.filename = attributes.get('filename')
+        self.metadata = attributes.get('metadata') or {}
+        self.upload_date = attributes.get('upload_date')
+        
+        end = self.length if end is None else min(end, self.length)
+        if start:
+            self.stream.seek(start)
+        self.remaining = max(0, end - start)
+    
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes of the range (all remaining bytes by default)"""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if not size:
+            return b''
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+    
+    def close(self) -> None:
+        """Close the underlying stream"""
+        self.stream.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+class StorageBackend(ABC):
+    """
+    Interface of a blob store holding files under ObjectIds
+    
+    Every backend must support put, get (with byte ranges), stat, exists,
+    delete and listing of file ids for garbage collection and migration.
+    """
+    
+    name = None
+    
+    @abstractmethod
+    def put(self, file_id: ObjectId, stream: BinaryIO, filename: str, content_type: str,
+            metadata: dict = None, chunk_size: int = None) -> None:
+        """Store the contents of stream under file_id (chunk_size is a hint for chunked stores)"""
+    
+    @abstractmethod
+    def get(self, file_id: ObjectId, start: int = 0, end: int = None) -> Optional[StoredFile]:
+        """Open a file (or the byte range [start, end)) for reading; None if missing"""
+    
+    @abstractmethod
+    def stat(self, file_id: ObjectId) -> Optional[dict]:
+        """Get length, content_type, filename, metadata and upload_date of a file; None if missing"""
+    
+    def exists(self, file_id: ObjectId) -> bool:
+        """Check whether a file is stored"""
+        return self.stat(file_id) is not None
+    
+    @abstractmethod
+    def delete(self, file_ids: List[ObjectId]) -> int:
+        """Delete files; returns the number that existed"""
+    
+    @abstractmethod
+    def iter_file_ids(self, uploaded_before: datetime = None) -> Iterator[ObjectId]:
+        """Yield the ids of stored files, optionally only those uploaded before a time"""
+    
+    @abstractmethod
+    def usage(self) -> Dict[str, dict]:
+        """
+        Get stored and logical (uncompressed) sizes per content type
+        
+        Returns:
+            dict: content_type -> {'files', 'stored_bytes', 'logical_bytes'}
+        """
+
+class GridFSBackend(StorageBackend):
+    """Files stored in MongoDB GridFS"""
+    
+    name = 'gridfs'
+    
+    def __init__(self, db):
+        """Initialize GridFS with database connection"""
+        self.fs = GridFS(db, collection=Config.GRIDFS_COLLECTION)
+        self.files_collection = db[f'{Config.GRIDFS_COLLECTION}.files']
+        self.chunks_collection = db[f'{Config.GRIDFS_COLLECTION}.chunks']
+    
+    def put(self, file_id, stream, filename, content_type, metadata=None, chunk_size=None):
+        self.fs.put(
+            stream,
+            _id=file_id,
+            filename=filename,
+            content_type=content_type,
+            metadata=metadata or {},
+            chunk_size=chunk_size or Config.STORAGE_DEFAULT_CHUNK_SIZE
+        )
+    
+    def get(self, file_id, start=0, end=None):
+        try:
+            grid_out = self.fs.get(file_id)
+        except NoFile:
+            return None
+        return StoredFile(grid_out, self._attributes(grid_out), start, end)
+    
+    def stat(self, file_id):
+        file_doc = self.files_collection.find_one({'_id': file_id})
+        if not file_doc:
+            return None
+        return {
+            'length': file_doc['length'],
+            'content_type': file_doc.get('contentType'),
+            'filename': file_doc.get('filename'),
+            'metadata': file_doc.get('metadata') or {},
+            'upload_date': file_doc.get('uploadDate')
+        }
+    
+    def exists(self, file_id):
+        return self.fs.exists(file_id)
+    
+    def delete(self, file_ids):
+        if not file_ids:
+            return 0
+        # Remove the file documents first so readers never see a file without chunks
+        result = self.files_collection.delete_many({'_id': {'$in': list(file_ids)}})
+        self.chunks_collection.delete_many({'files_id': {'$in': list(file_ids)}})
+        return result.deleted_count
+    
+    def iter_file_ids(self, uploaded_before=None):
+        query = {'uploadDate': {'$lt': uploaded_before}} if uploaded_before else {}
+        for file_doc in self.files_collection.find(query, {'_id': 1}).batch_size(1000):
+            yield file_doc['_id']
+    
+    def usage(self):
+        rows = self.files_collection.aggregate([
+            {'$group': {
+                '_id': '$contentType',
+                'files': {'$sum': 1},
+                'stored_bytes': {'$sum': '$length'},
+                'logical_bytes': {'$sum': {'$ifNull': ['$metadata.logical_length', '$length']}}
+            }}
+        ])
+        return {row.pop('_id'): row for row in rows}
+    
+    @staticmethod
+    def _attributes(grid_out) -> dict:
+        """stat() attributes of an open GridOut"""
+        return {
+            'length': grid_out.length,
+            'content_type': grid_out.content_type,
+            'filename': grid_out.filename,
+            'metadata': grid_out.metadata or {},
+            'upload_date': grid_out.upload_date
+        }
+
+class LocalFileBackend(StorageBackend):
+    """
+    Files stored on the local filesystem
+    
+    A file lives at <root>/<last two id chars>/<previous two>/<id> with its
+    attributes in a .json sidecar. Both are written to temporary files and
+    renamed into place, and the sidecar is written last, so a file is only
+    visible once it is complete.
+    """
+    
+    name = 'local'
+    BLOCK_SIZE = 1024 * 1024
+    
+    def __init__(self, root: str):
+        """Initialize with the storage root directory"""
+        self.root = root
+    
+    def put(self, file_id, stream, filename, content_type, metadata=None, chunk_size=None):
+        path = self._path(file_id)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        
+        length = self._write_atomic(path, lambda target: self._copy(stream, target))
+        attributes = {
+            'length': length,
+            'content_type': content_type,
+            'filename': filename,
+            'metadata': metadata or {},
+            'upload_date': datetime.utcnow()
+        }
+        encoded = json_util.dumps(attributes).encode('utf-8')
+        self._write_atomic(path + '.json', lambda target: target.write(encoded))
+    
+    def get(self, file_id, start=0, end=None):
+        attributes = self.stat(file_id)
+        if attributes is None:
+            return None
+        try:
+            stream = open(self._path(file_id), 'rb')
+        except FileNotFoundError:
+            return None
+        return StoredFile(stream, attributes, start, end)
+    
+    def stat(self, file_id):
+        try:
+            with open(self._path(file_id) + '.json', 'rb') as sidecar:
+                return json_util.loads(sidecar.read())
+        except FileNotFoundError:
+            return None
+    
+    def delete(self, file_ids):
+        deleted = 0
+        for file_id in file_ids:
+            path = self._path(file_id)
+            try:
+                # Remove the sidecar first so readers never see a file without data
+                os.remove(path + '.json')
+                deleted += 1
+            except FileNotFoundError:
+                pass
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return deleted
+    
+    def iter_file_ids(self, uploaded_before=None):
+        if not os.path.isdir(self.root):
+            return
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith('.json') or not ObjectId.is_valid(name[:-5]):
+                    continue
+                file_id = ObjectId(name[:-5])
+                if uploaded_before:
+                    attributes = self.stat(file_id)
+                    if not attributes or attributes['upload_date'] >= uploaded_before:
+                        continue
+                yield file_id
+    
+    def usage(self):
+        totals = {}
+        for file_id in self.iter_file_ids():
+            attributes = self.stat(file_id)
+            if not attributes:
+                continue
+            row = totals.setdefault(attributes.get('content_type'), {'files': 0, 'stored_bytes': 0, 'logical_bytes': 0})
+            row['files'] += 1
+            row['stored_bytes'] += attributes['length']
+            row['logical_bytes'] += (attributes.get('metadata') or {}).get('logical_length', attributes['length'])
+        return totals
+    
+    def _path(self, file_id) -> str:
+        """Location of a file's data"""
+        name = str(file_id)
+        return os.path.join(self.root, name[-2:], name[-4:-2], name)
+    
+    def _copy(self, stream, target) -> int:
+        """Copy a stream into an open file, returning the byte count"""
+        length = 0
+        while True:
+            block = stream.read(self.BLOCK_SIZE)
+            if not block:
+                return length
+            target.write(block)
+            length += len(block)
+    
+    @staticmethod
+    def _write_atomic(path: str, write):
+        """Write a file through a temporary file that is renamed over path"""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as target:
+                result = write(target)
+                target.flush()
+                os.fsync(target.fileno())
+            os.replace(temp_path, path)
+            return result
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+def create_backend(name: str, db) -> StorageBackend:
+    """Create the storage backend called name"""
+    if name == GridFSBackend.name:
+        return GridFSBackend(db)
+    if name == LocalFileBackend.name:
+        return LocalFileBackend(Config.LOCAL_STORAGE_DIR)
+    raise ValueError(f"Unknown storage backend: {name}")
+
+BACKEND_NAMES = [GridFSBackend.name, LocalFileBackend.name]
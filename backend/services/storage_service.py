@@ -1,68 +1,291 @@
-from gridfs import GridFS
-from bson import ObjectId
-from typing import Optional, BinaryIO
+from bson import ObjectId, Binary
+from typing import Optional, BinaryIO, List, Tuple, Iterator, Dict
 from werkzeug.datastructures import FileStorage
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from datetime import datetime
+from services.file_cache import FileCache
+from services.storage_backends import StorageBackend, StoredFile, GridFSBackend, create_backend, BACKEND_NAMES
+from services.compression import DeflatingReader, InflatingFile, DEFLATE_ENCODING, is_compressed
+import hashlib
 import io
+import os
 
 class StorageService:
-    """Service for managing file storage using MongoDB GridFS"""
+    """
+    Service for managing file storage
+    
+    New files are written to the backend named by Config.STORAGE_BACKEND.
+    Reads and deletes also look in the other backends, so files can be
+    migrated between backends while the application is running.
+    Resumable uploads are always staged as GridFS chunks.
+    
+    Files of the types in Config.STORAGE_COMPRESSED_TYPES are stored
+    deflate-compressed and decompressed on the fly by get_file, so callers
+    always see the original bytes; GridFS chunk sizes follow
+    Config.STORAGE_CHUNK_SIZES.
+    """
     
     def __init__(self, db):
-        """Initialize GridFS with database connection"""
-        self.fs = GridFS(db)
+        """Initialize the storage backends with database connection"""
+        self.db = db
+        self.backends = {name: create_backend(name, db) for name in BACKEND_NAMES}
+        self.backend = self.backends[Config.STORAGE_BACKEND]
+        
+        # GridFS collections used to stage resumable uploads
+        self.gridfs = self.backends[GridFSBackend.name]
+        self.files_collection = self.gridfs.files_collection
+        self.chunks_collection = self.gridfs.chunks_collection
+        self._file_cache = None
+    
+    @property
+    def file_cache(self) -> Optional[FileCache]:
+        """Local disk cache of hot files (created on first use; None if disabled)"""
+        if self._file_cache is None and Config.FILE_CACHE_MAX_BYTES > 0:
+            self._file_cache = FileCache(
+                Config.FILE_CACHE_DIR, Config.FILE_CACHE_MAX_BYTES, Config.FILE_CACHE_MAX_FILE_SIZE,
+                evict_grace=Config.FILE_CACHE_EVICT_GRACE, stale_fill_age=Config.FILE_CACHE_STALE_FILL_AGE
+            )
+        return self._file_cache
     
     def upload_file(self, file: FileStorage, metadata: dict = None) -> ObjectId:
         """
-        Upload a file to GridFS
+        Upload a file to the storage backend
         
         Args:
             file: FileStorage object from Flask request
             metadata: Optional metadata dictionary
         
         Returns:
-            ObjectId: The GridFS file ID
+            ObjectId: The stored file ID
         """
         try:
-            # Read file content
-            file_content = file.read()
-            
-            # Reset file pointer for potential re-reads
-            file.seek(0)
+            # Stream from the start of the file; the backend reads it block by block
+            length = file.stream.seek(0, os.SEEK_END)
+            file.stream.seek(0)
             
             # Store file with metadata
-            file_id = self.fs.put(
-                file_content,
-                filename=file.filename,
-                content_type=file.content_type,
-                metadata=metadata or {}
-            )
+            file_id = ObjectId()
+            self._put(file_id, file.stream, length, file.filename, file.content_type, metadata)
+            
+            # Reset file pointer for potential re-reads
+            file.stream.seek(0)
             
             return file_id
         
         except Exception as e:
             raise Exception(f"Failed to upload file: {str(e)}")
     
-    def get_file(self, file_id: str):
+    def store_data(self, data: bytes, filename: str, content_type: str, metadata: dict = None) -> ObjectId:
+        """
+        Store raw bytes generated by the backend (e.g. previews)
+        
+        Args:
+            data: File content
+            filename: Name to store the file under
+            content_type: MIME type of the content
+            metadata: Optional metadata dictionary
+        
+        Returns:
+            ObjectId: The stored file ID
+        """
+        try:
+            file_id = ObjectId()
+            self._put(file_id, io.BytesIO(data), len(data), filename, content_type, metadata)
+            return file_id
+        except Exception as e:
+            raise Exception(f"Failed to store file: {str(e)}")
+    
+    def store_stream(self, stream: BinaryIO, length: int, filename: str, content_type: str,
+                     metadata: dict = None, file_id: ObjectId = None) -> ObjectId:
         """
-        Retrieve a file from GridFS
+        Store a readable stream (e.g. a local file opened by an import script)
+        
+        Args:
+            stream: Readable binary stream positioned at the start
+            length: Number of bytes the stream holds
+            filename: Name to store the file under
+            content_type: MIME type of the content
+            metadata: Optional metadata dictionary
+            file_id: ObjectId to store the file under (a new one by default)
+        
+        Returns:
+            ObjectId: The stored file ID
+        """
+        try:
+            file_id = file_id or ObjectId()
+            self._put(file_id, stream, length, filename, content_type, metadata)
+            return file_id
+        except Exception as e:
+            raise Exception(f"Failed to store file: {str(e)}")
+    
+    def upload_files(self, uploads: List[Tuple[FileStorage, dict]], max_workers: int = 4) -> List[Tuple[Optional[ObjectId], Optional[str]]]:
+        """
+        Upload several files concurrently
+        
+        Args:
+            uploads: List of (FileStorage, metadata) pairs
+            max_workers: Size of the worker pool used for the writes
+        
+        Returns:
+            List of (file_id, error_message) pairs in the same order as uploads
+        """
+        def _upload(item):
+            file, metadata = item
+            try:
+                return self.upload_file(file, metadata), None
+            except Exception as e:
+                return None, str(e)
+        
+        if not uploads:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(uploads)))) as executor:
+            return list(executor.map(_upload, uploads))
+    
+    def get_file(self, file_id: str, start: int = 0, end: int = None) -> Optional[StoredFile]:
+        """
+        Retrieve a file (or a byte range of it), decompressed if stored compressed
         
         Args:
             file_id: String representation of ObjectId
+            start: First byte to read
+            end: Byte after the last one to read (defaults to the end of the file)
         
         Returns:
-            GridOut object or None
+            StoredFile (or InflatingFile) object or None
         """
         try:
             obj_id = ObjectId(file_id)
-            if self.fs.exists(obj_id):
-                return self.fs.get(obj_id)
+            for backend in self._read_order():
+                file_data = backend.get(obj_id, start, end)
+                if not file_data:
+                    continue
+                if is_compressed(file_data):
+                    # Ranges refer to the original bytes; decompress from the start
+                    file_data.close()
+                    return InflatingFile(backend.get(obj_id), start, end)
+                return file_data
             return None
         except Exception as e:
             raise Exception(f"Failed to retrieve file: {str(e)}")
     
+    def get_stored_file(self, file_id: str) -> Optional[StoredFile]:
+        """
+        Open a file exactly as stored (still compressed if stored compressed), e.g. for backups
+        
+        Returns:
+            StoredFile object or None
+        """
+        obj_id = ObjectId(file_id)
+        for backend in self._read_order():
+            file_data = backend.get(obj_id)
+            if file_data:
+                return file_data
+        return None
+    
+    def restore_file(self, file_id: ObjectId, stream: BinaryIO, attributes: dict) -> bool:
+        """
+        Write a file read with get_stored_file back into the configured backend
+        
+        Args:
+            file_id: ObjectId of the file
+            stream: Stored bytes of the file
+            attributes: filename, content_type and metadata of the stored file
+        
+        Returns:
+            bool: True if written, False if the file already exists
+        """
+        if self.file_exists(str(file_id)):
+            return False
+        # Clear a partial copy left by an interrupted restore
+        self.backend.delete([file_id])
+        self.backend.put(
+            file_id,
+            stream,
+            filename=attributes.get('filename'),
+            content_type=attributes.get('content_type'),
+            metadata=attributes.get('metadata') or {},
+            chunk_size=self.chunk_size_for(attributes.get('content_type'))
+        )
+        return True
+    
+    def stat_file(self, file_id: str) -> Optional[dict]:
+        """
+        Get the attributes of a stored file
+        
+        Returns:
+            dict: length (as stored), logical_length (original size), content_type,
+                  filename, metadata, upload_date and backend; or None
+        """
+        obj_id = ObjectId(file_id)
+        for backend in self._read_order():
+            attributes = backend.stat(obj_id)
+            if attributes:
+                attributes['logical_length'] = attributes['metadata'].get('logical_length', attributes['length'])
+                attributes['backend'] = backend.name
+                return attributes
+        return None
+    
+    def storage_report(self) -> Dict[str, Dict[str, dict]]:
+        """
+        Get stored versus logical sizes per backend and content type
+        
+        Returns:
+            dict: backend name -> content_type -> {'files', 'stored_bytes', 'logical_bytes'}
+        """
+        return {name: backend.usage() for name, backend in self.backends.items()}
+    
+    def cache_file(self, file_id: str, expected_hash: str = None) -> bool:
+        """
+        Copy a stored file into the local disk cache unless it is already there
+        
+        Args:
+            file_id: String representation of ObjectId
+            expected_hash: SHA-256 recorded for the file; a mismatching copy is not cached
+        
+        Returns:
+            bool: True if the file is cached
+        """
+        if not self.file_cache:
+            return False
+        if self.file_cache.contains(file_id):
+            return True
+        
+        file_data = self.get_file(file_id)
+        if not file_data:
+            return False
+        try:
+            return self.file_cache.fill(file_id, file_data, file_data.length, expected_hash)
+        except Exception as e:
+            print(f"Error caching file {file_id}: {e}")
+            return False
+    
+    def open_cached_file(self, file_id: str, expected_hash: str = None) -> Optional[BinaryIO]:
+        """
+        Open the cached copy of a file as a memory map
+        
+        Returns:
+            Read-only file-like object, or None if the file is not cached
+        """
+        if not self.file_cache:
+            return None
+        return self.file_cache.open(file_id, expected_hash)
+    
+    def locate_cached_file(self, file_id: str, expected_hash: str = None) -> Optional[str]:
+        """
+        Get the path of the cached copy of a file (for sendfile or proxy offload)
+        
+        Returns:
+            str: Absolute path, or None if the file is not cached
+        """
+        if not self.file_cache:
+            return None
+        return self.file_cache.locate(file_id, expected_hash)
+    
     def delete_file(self, file_id: str) -> bool:
         """
-        Delete a file from GridFS
+        Delete a file from every backend holding a copy
         
         Args:
             file_id: String representation of ObjectId
@@ -72,16 +295,164 @@ class StorageService:
         """
         try:
             obj_id = ObjectId(file_id)
-            if self.fs.exists(obj_id):
-                self.fs.delete(obj_id)
-                return True
-            return False
+            if self._file_cache:
+                self._file_cache.evict(str(file_id))
+            deleted = [backend.delete([obj_id]) for backend in self.backends.values()]
+            return any(deleted)
         except Exception as e:
             raise Exception(f"Failed to delete file: {str(e)}")
     
+    def delete_files(self, file_ids: List[str], batch_size: int = 100) -> int:
+        """
+        Delete several files in batches from every backend
+        
+        For GridFS this removes the file documents and their chunks with one
+        delete_many per batch instead of one round trip per file.
+        
+        Args:
+            file_ids: String representations of ObjectIds
+            batch_size: Number of files removed per batch
+        
+        Returns:
+            int: Number of stored copies deleted
+        """
+        obj_ids = []
+        for file_id in file_ids:
+            try:
+                obj_ids.append(ObjectId(file_id))
+            except Exception:
+                continue
+            if self._file_cache:
+                self._file_cache.evict(str(file_id))
+        
+        deleted = 0
+        try:
+            for start in range(0, len(obj_ids), batch_size):
+                batch = obj_ids[start:start + batch_size]
+                for backend in self.backends.values():
+                    deleted += backend.delete(batch)
+            return deleted
+        except Exception as e:
+            raise Exception(f"Failed to delete files: {str(e)}")
+    
+    def write_chunk(self, file_id: ObjectId, n: int, data: bytes) -> None:
+        """
+        Write a single GridFS chunk for a file that is still being uploaded
+        
+        The write is an upsert so a chunk resent after an interrupted
+        request simply replaces the earlier copy.
+        
+        Args:
+            file_id: ObjectId reserved for the file
+            n: Zero-based chunk index
+            data: Chunk content (exactly the file's chunk size, except for the last chunk)
+        """
+        try:
+            self.chunks_collection.replace_one(
+                {'files_id': file_id, 'n': n},
+                {'files_id': file_id, 'n': n, 'data': Binary(data)},
+                upsert=True
+            )
+        except Exception as e:
+            raise Exception(f"Failed to write chunk: {str(e)}")
+    
+    def finalize_chunked_file(self, file_id: ObjectId, length: int, chunk_size: int,
+                              filename: str, content_type: str, metadata: dict = None) -> ObjectId:
+        """
+        Make a file written with write_chunk visible to readers
+        
+        Chunks are staged uncompressed at the session's chunk size, which
+        sessions take from chunk_size_for. If the storage policy of the
+        content type asks for compression (or another chunk size), the file is
+        rewritten through it under a new id; otherwise the staged GridFS file
+        is kept (and moved to the configured backend if that is not GridFS).
+        
+        Args:
+            file_id: ObjectId the chunks were written under
+            length: Total file length in bytes
+            chunk_size: Chunk size the chunks were written with
+            filename: Original file name
+            content_type: MIME type of the file
+            metadata: Optional metadata dictionary
+        
+        Returns:
+            ObjectId: The ID of the stored file (differs from file_id if it was rewritten)
+        """
+        try:
+            # Drop chunks past the end of the file left by a client that changed its mind
+            last_chunk = (length - 1) // chunk_size if length else -1
+            self.chunks_collection.delete_many({'files_id': file_id, 'n': {'$gt': last_chunk}})
+            
+            self.files_collection.insert_one({
+                '_id': file_id,
+                'length': length,
+                'chunkSize': chunk_size,
+                'uploadDate': datetime.utcnow(),
+                'filename': filename,
+                'contentType': content_type,
+                'metadata': metadata or {}
+            })
+            
+            rewrite = self.should_compress(content_type) or (
+                self.backend is self.gridfs and self.chunk_size_for(content_type) != chunk_size
+            )
+            if rewrite:
+                # A file cannot be rewritten in place under its own id; the staged copy is
+                # removed afterwards (or by the orphan sweep if this is interrupted)
+                stored_id = ObjectId()
+                with self.gridfs.get(file_id) as staged_file:
+                    self._put(stored_id, staged_file, length, filename, content_type, metadata)
+                self.gridfs.delete([file_id])
+                return stored_id
+            
+            # Move the staged file to the configured backend
+            if self.backend is not self.gridfs:
+                self.migrate_file(file_id, self.gridfs.name, self.backend.name)
+            return file_id
+        except Exception as e:
+            raise Exception(f"Failed to finalize file: {str(e)}")
+    
+    def discard_chunks(self, file_id: ObjectId) -> int:
+        """
+        Remove chunks of a file that was never finalized
+        
+        Args:
+            file_id: ObjectId the chunks were written under
+        
+        Returns:
+            int: Number of chunks removed
+        """
+        try:
+            return self.chunks_collection.delete_many({'files_id': file_id}).deleted_count
+        except Exception as e:
+            raise Exception(f"Failed to discard chunks: {str(e)}")
+    
+    def compute_hash(self, file_id: str, block_size: int = 1024 * 1024) -> Optional[str]:
+        """
+        Compute the SHA-256 of a stored file without loading it into memory
+        
+        Args:
+            file_id: String representation of ObjectId
+            block_size: Bytes read per iteration
+        
+        Returns:
+            str: Hex digest, or None if the file does not exist
+        """
+        file_data = self.get_file(file_id)
+        if not file_data:
+            return None
+        
+        digest = hashlib.sha256()
+        while True:
+            data = file_data.read(block_size)
+            if not data:
+                break
+            digest.update(data)
+        return digest.hexdigest()
+    
     def file_exists(self, file_id: str) -> bool:
         """
-        Check if a file exists in GridFS
+        Check if a file exists in any backend
         
         Args:
             file_id: String representation of ObjectId
@@ -91,6 +462,109 @@ class StorageService:
         """
         try:
             obj_id = ObjectId(file_id)
-            return self.fs.exists(obj_id)
+            return any(backend.exists(obj_id) for backend in self._read_order())
         except:
             return False
+    
+    def iter_file_ids(self, uploaded_before: datetime = None) -> Iterator[ObjectId]:
+        """Yield the ids of files stored in any backend (a file being migrated may appear twice)"""
+        for backend in self.backends.values():
+            yield from backend.iter_file_ids(uploaded_before)
+    
+    def migrate_file(self, file_id: ObjectId, source: str, target: str, delete_source: bool = True) -> str:
+        """
+        Copy a file from one backend to another
+        
+        Readers look in every backend, so the file stays readable throughout.
+        The copy is verified against the source (length and SHA-256) before
+        the source copy is removed.
+        
+        Args:
+            file_id: ObjectId of the file
+            source: Name of the backend to copy from
+            target: Name of the backend to copy to
+            delete_source: Remove the source copy after a verified copy
+        
+        Returns:
+            str: 'copied', 'present' (already in target), or 'missing' (not in source)
+        """
+        source_backend = self.backends[source]
+        target_backend = self.backends[target]
+        
+        source_file = source_backend.get(file_id)
+        if not source_file:
+            return 'missing'
+        
+        status = 'present'
+        with source_file:
+            if not target_backend.exists(file_id):
+                # Copied as stored: compressed files stay compressed
+                target_backend.put(
+                    file_id,
+                    source_file,
+                    filename=source_file.filename,
+                    content_type=source_file.content_type,
+                    metadata=source_file.metadata,
+                    chunk_size=self.chunk_size_for(source_file.content_type)
+                )
+                status = 'copied'
+        
+        if self._digest(source_backend, file_id) != self._digest(target_backend, file_id):
+            # Leave the source in place; the next run copies the file again
+            target_backend.delete([file_id])
+            raise Exception(f"Copy of file {file_id} in {target} does not match {source}")
+        
+        if delete_source:
+            source_backend.delete([file_id])
+        return status
+    
+    @staticmethod
+    def chunk_size_for(content_type: str) -> int:
+        """GridFS chunk size for a content type (exact match first, then its type family)"""
+        content_type = (content_type or '').split(';')[0].strip().lower()
+        chunk_sizes = Config.STORAGE_CHUNK_SIZES
+        if content_type in chunk_sizes:
+            return chunk_sizes[content_type]
+        return chunk_sizes.get(content_type.split('/')[0] + '/', Config.STORAGE_DEFAULT_CHUNK_SIZE)
+    
+    @staticmethod
+    def should_compress(content_type: str) -> bool:
+        """Check whether files of a content type are stored compressed"""
+        return (content_type or '').split(';')[0].strip().lower() in Config.STORAGE_COMPRESSED_TYPES
+    
+    def _put(self, file_id: ObjectId, stream: BinaryIO, length: int, filename: str,
+             content_type: str, metadata: dict = None) -> None:
+        """Write a new file to the configured backend, applying its content type's storage policy"""
+        metadata = dict(metadata or {})
+        if self.should_compress(content_type):
+            metadata['encoding'] = DEFLATE_ENCODING
+            metadata['logical_length'] = length
+            stream = DeflatingReader(stream, Config.STORAGE_COMPRESSION_LEVEL)
+        
+        self.backend.put(
+            file_id,
+            stream,
+            filename=filename,
+            content_type=content_type,
+            metadata=metadata,
+            chunk_size=self.chunk_size_for(content_type)
+        )
+    
+    def _read_order(self) -> List[StorageBackend]:
+        """Backends to look in: the configured one first"""
+        return [self.backend] + [backend for backend in self.backends.values() if backend is not self.backend]
+    
+    @staticmethod
+    def _digest(backend: StorageBackend, file_id: ObjectId) -> Optional[Tuple[int, str]]:
+        """Length and SHA-256 of a file in one backend"""
+        stored_file = backend.get(file_id)
+        if not stored_file:
+            return None
+        with stored_file:
+            digest = hashlib.sha256()
+            while True:
+                block = stored_file.read(1024 * 1024)
+                if not block:
+                    break
+                digest.update(block)
+        return stored_file.length, digest.hexdigest()
@@ -0,0 +1,111 @@
+from typing import Optional
+from xml.etree import ElementTree
+from config import Config
+import zipfile
+import io
+import re
+
+# Optional dependency: PDF text is skipped when missing
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DRAWING_NAMESPACE = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+
+def get_extraction_kind(file_name: str, file_type: str) -> Optional[str]:
+    """
+    Decide how text is extracted from a file
+    
+    Returns:
+        'pdf', 'docx', 'pptx', 'text' or None if extraction is not supported
+    """
+    file_name = (file_name or '').lower()
+    if file_type == 'application/pdf' or file_name.endswith('.pdf'):
+        return 'pdf'
+    if file_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' or file_name.endswith('.docx'):
+        return 'docx'
+    if file_type == 'application/vnd.openxmlformats-officedocument.presentationml.presentation' or file_name.endswith('.pptx'):
+        return 'pptx'
+    if file_type == 'text/plain' or file_name.endswith('.txt'):
+        return 'text'
+    return None
+
+def extract_text(file_data, file_name: str, file_type: str) -> Optional[str]:
+    """
+    Extract plain text from a stored file
+    
+    Args:
+        file_data: Readable file object (e.g. GridOut)
+        file_name: Original file name
+        file_type: MIME type of the file
+    
+    Returns:
+        str: Extracted text (truncated to Config.MAX_EXTRACTED_TEXT_LENGTH),
+        or None if the type is not supported
+    """
+    kind = get_extraction_kind(file_name, file_type)
+    
+    if kind == 'pdf' and fitz:
+        text = _extract_pdf(file_data.read())
+    elif kind == 'docx':
+        text = _extract_office_xml(file_data.read(), r'word/document\.xml', WORD_NAMESPACE + 't', WORD_NAMESPACE + 'p')
+    elif kind == 'pptx':
+        text = _extract_office_xml(file_data.read(), r'ppt/slides/slide(\d+)\.xml', DRAWING_NAMESPACE + 't', DRAWING_NAMESPACE + 'p')
+    elif kind == 'text':
+        text = file_data.read(Config.MAX_EXTRACTED_TEXT_LENGTH * 4).decode('utf-8', errors='replace')
+    else:
+        return None
+    
+    return text[:Config.MAX_EXTRACTED_TEXT_LENGTH]
+
+def _extract_pdf(data: bytes) -> str:
+    """Extract the text of every PDF page"""
+    parts = []
+    length = 0
+    document = fitz.open(stream=data, filetype='pdf')
+    try:
+        for page in document:
+            page_text = page.get_text()
+            parts.append(page_text)
+            length += len(page_text)
+            if length >= Config.MAX_EXTRACTED_TEXT_LENGTH:
+                break
+    finally:
+        document.close()
+    return '\n'.join(parts)
+
+def _extract_office_xml(data: bytes, part_pattern: str, text_tag: str, paragraph_tag: str) -> str:
+    """
+    Extract text runs from the XML parts of a DOCX/PPTX package
+    
+    Parts matching part_pattern are read in numeric order (slide1, slide2, ...)
+    and parsed incrementally so large documents are never fully built as a tree.
+    """
+    pattern = re.compile(part_pattern)
+    parts = []
+    length = 0
+    
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        names = [name for name in package.namelist() if pattern.fullmatch(name)]
+        names.sort(key=lambda name: int(pattern.fullmatch(name).groups()[0]) if pattern.groups else 0)
+        
+        for name in names:
+            with package.open(name) as part:
+                paragraph = []
+                for event, element in ElementTree.iterparse(part, events=('end',)):
+                    if element.tag == text_tag and element.text:
+                        paragraph.append(element.text)
+                    elif element.tag == paragraph_tag:
+                        if paragraph:
+                            parts.append(''.join(paragraph))
+                            length += len(parts[-1])
+                        paragraph = []
+                    element.clear()
+                if paragraph:
+                    parts.append(''.join(paragraph))
+            if length >= Config.MAX_EXTRACTED_TEXT_LENGTH:
+                break
+    
+    return '\n'.join(parts)
@@ -0,0 +1,47 @@
+from config import Config
+from typing import Optional
+import math
+import time
+
+# Trending scores decay exponentially: an event of weight w at time t adds
+# w * exp(-decay * (now - t)) to the score. Every score shares the factor
+# exp(-decay * now), so resources are ordered by
+#
+#     trend_log = log(sum of w * exp(decay * t))
+#
+# which only changes when a new event arrives. Events are folded in with a
+# log-add-exp, so stored values stay small and nothing is rescored over time.
+
+# Decay rate per second: an event's weight halves every TRENDING_HALF_LIFE_HOURS
+TRENDING_DECAY = math.log(2) / (Config.TRENDING_HALF_LIFE_HOURS * 3600)
+
+def event_log_weight(weight: float, at: Optional[float] = None) -> float:
+    """
+    Log-space contribution of an event
+    
+    Args:
+        weight: Event weight (see Config.TRENDING_*_WEIGHT)
+        at: Event time as a Unix timestamp (defaults to now)
+    """
+    if at is None:
+        at = time.time()
+    return math.log(weight) + TRENDING_DECAY * at
+
+def trend_stage(log_weight: float) -> dict:
+    """
+    Update pipeline stage folding an event into trend_log
+    
+    Computes trend_log = max(a, b) + ln(1 + exp(-|a - b|)), which is
+    log(exp(a) + exp(b)) without overflowing.
+    """
+    return {'$set': {'trend_log': {'$let': {
+        'vars': {'current': {'$ifNull': ['$trend_log', None]}, 'event': log_weight},
+        'in': {'$cond': [
+            {'$eq': ['$$current', None]},
+            '$$event',
+            {'$add': [
+                {'$max': ['$$current', '$$event']},
+                {'$ln': {'$add': [1, {'$exp': {'$multiply': [-1, {'$abs': {'$subtract': ['$$current', '$$event']}}]}}]}}
+            ]}
+        ]}
+    }}}}
@@ -0,0 +1,230 @@
+from bson import ObjectId
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from typing import Optional, BinaryIO
+from config import Config
+
+class UploadSessionService:
+    """Service for resumable chunked uploads written straight into GridFS chunks"""
+    
+    # Session status: chunks are accepted while uploading; one request at a time may be completing
+    UPLOADING = 'uploading'
+    COMPLETING = 'completing'
+    
+    def __init__(self, db, storage_service):
+        """Initialize with database connection and storage service"""
+        self.sessions = db.upload_sessions
+        self.storage_service = storage_service
+    
+    def create_session(self, uid: str, form_data: dict, file_name: str, file_size: int, file_type: str) -> dict:
+        """
+        Create a new upload session
+        
+        Args:
+            uid: Owner's Firebase UID
+            form_data: Resource metadata to use when the upload is finalized
+            file_name: Original file name
+            file_size: Total file size in bytes
+            file_type: MIME type of the file
+        
+        Returns:
+            dict: The stored session document
+        """
+        current_time = datetime.utcnow()
+        session = {
+            'uid': uid,
+            'file_id': ObjectId(),  # Reserved GridFS file id the chunks are written under
+            'file_name': file_name,
+            'file_size': file_size,
+            'file_type': file_type,
+            # Staged at the storage policy's chunk size, so only compressed types need a rewrite
+            'chunk_size': self.storage_service.chunk_size_for(file_type),
+            'committed_offset': 0,
+            'status': self.UPLOADING,
+            'form_data': form_data,
+            'created_at': current_time,
+            'updated_at': current_time,
+            'expires_at': current_time + timedelta(hours=Config.UPLOAD_SESSION_TTL_HOURS)
+        }
+        result = self.sessions.insert_one(session)
+        session['_id'] = result.inserted_id
+        return session
+    
+    def get_session(self, session_id: str, uid: str) -> Optional[dict]:
+        """
+        Get an active upload session owned by the user
+        
+        Returns:
+            dict or None if the session does not exist or has expired
+        """
+        try:
+            obj_id = ObjectId(session_id)
+        except Exception:
+            return None
+        
+        session = self.sessions.find_one({'_id': obj_id, 'uid': uid})
+        if not session or session['expires_at'] < datetime.utcnow():
+            return None
+        return session
+    
+    def write_chunks(self, session: dict, offset: int, stream: BinaryIO) -> int:
+        """
+        Write request data at the given offset, one GridFS chunk at a time
+        
+        Only whole chunks (or the final chunk of the file) are committed, so
+        memory use is bounded by the chunk size and a dropped connection
+        loses at most one chunk.
+        
+        Args:
+            session: Session document
+            offset: Byte offset of the data, must equal the committed offset
+            stream: Readable request body
+        
+        Returns:
+            int: The committed offset after the write
+        """
+        chunk_size = session['chunk_size']
+        file_size = session['file_size']
+        committed = offset
+        
+        while committed < file_size:
+            expected = min(chunk_size, file_size - committed)
+            data = self._read_exact(stream, expected)
+            
+            # A short read that does not finish the file cannot be stored as a GridFS chunk
+            if len(data) < expected:
+                break
+            
+            self.storage_service.write_chunk(session['file_id'], committed // chunk_size, data)
+            
+            # Advance the committed offset only if no concurrent request moved it
+            result = self.sessions.update_one(
+                {'_id': session['_id'], 'committed_offset': committed},
+                {'$set': {
+                    'committed_offset': committed + len(data),
+                    'updated_at': datetime.utcnow(),
+                    'expires_at': datetime.utcnow() + timedelta(hours=Config.UPLOAD_SESSION_TTL_HOURS)
+                }}
+            )
+            if result.modified_count == 0:
+                break
+            committed += len(data)
+        
+        current = self.sessions.find_one({'_id': session['_id']}, {'committed_offset': 1})
+        return current['committed_offset'] if current else committed
+    
+    def claim_session(self, session: dict) -> Optional[dict]:
+        """
+        Atomically move a fully uploaded session from uploading to completing
+        
+        Only one of several concurrent complete requests gets the session;
+        the others would insert the same GridFS file document. A claim whose
+        request died is taken over after Config.UPLOAD_COMPLETE_TIMEOUT.
+        
+        Returns:
+            dict: The claimed session, or None if another request holds it
+        """
+        current_time = datetime.utcnow()
+        return self.sessions.find_one_and_update(
+            {
+                '_id': session['_id'],
+                'committed_offset': {'$gte': session['file_size']},
+                '$or': [
+                    {'status': self.UPLOADING},
+                    {'status': self.COMPLETING, 'claimed_at': {'$lt': self._claim_cutoff()}}
+                ]
+            },
+            {'$set': {
+                'status': self.COMPLETING,
+                'claimed_at': current_time,
+                'updated_at': current_time,
+                # Keep the cleanup sweep away while the file is finalized
+                'expires_at': current_time + timedelta(hours=Config.UPLOAD_SESSION_TTL_HOURS)
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+    
+    def release_session(self, session: dict) -> None:
+        """Return a claimed session to uploading after a failed completion so it can be retried"""
+        self.sessions.update_one(
+            {'_id': session['_id'], 'status': self.COMPLETING},
+            {'$set': {'status': self.UPLOADING, 'updated_at': datetime.utcnow()}}
+        )
+    
+    def is_completing(self, session: dict) -> bool:
+        """Check whether a complete request currently holds the session"""
+        return session.get('status') == self.COMPLETING and session['claimed_at'] >= self._claim_cutoff()
+    
+    def complete_session(self, session: dict) -> ObjectId:
+        """
+        Finalize the GridFS file of a fully uploaded session (claimed with claim_session)
+        
+        The file can only be finalized once (its staged chunks may be gone
+        afterwards), so the stored file ID is saved on the session and a
+        retried completion reuses it.
+        
+        Returns:
+            ObjectId: The stored file ID (not the session's file_id if the file was rewritten)
+        """
+        if session.get('stored_file_id'):
+            return session['stored_file_id']
+        
+        stored_file_id = self.storage_service.finalize_chunked_file(
+            session['file_id'],
+            session['file_size'],
+            session['chunk_size'],
+            session['file_name'],
+            session['file_type'],
+            metadata={
+                'uid': session['uid'],
+                'uploaded_at': datetime.utcnow()
+            }
+        )
+        self.sessions.update_one({'_id': session['_id']}, {'$set': {'stored_file_id': stored_file_id}})
+        session['stored_file_id'] = stored_file_id
+        return stored_file_id
+    
+    def delete_session(self, session: dict, discard_chunks: bool = False) -> None:
+        """Remove a session, optionally discarding the chunks (or finalized file) written so far"""
+        if discard_chunks:
+            if session.get('stored_file_id'):
+                self.storage_service.delete_file(str(session['stored_file_id']))
+            self.storage_service.discard_chunks(session['file_id'])
+        self.sessions.delete_one({'_id': session['_id']})
+    
+    def cleanup_expired_sessions(self, limit: int = 100) -> int:
+        """
+        Garbage-collect abandoned sessions and their chunks
+        
+        Args:
+            limit: Maximum number of sessions removed in one sweep
+        
+        Returns:
+            int: Number of sessions removed
+        """
+        expired = self.sessions.find(
+            {'expires_at': {'$lt': datetime.utcnow()}},
+            {'file_id': 1, 'stored_file_id': 1}
+        ).limit(limit)
+        
+        removed = 0
+        for session in expired:
+            self.delete_session(session, discard_chunks=True)
+            removed += 1
+        return removed
+    
+    @staticmethod
+    def _claim_cutoff() -> datetime:
+        """Claims made before this time have timed out"""
+        return datetime.utcnow() - timedelta(seconds=Config.UPLOAD_COMPLETE_TIMEOUT)
+    
+    @staticmethod
+    def _read_exact(stream: BinaryIO, size: int) -> bytes:
+        """Read exactly size bytes unless the stream ends first"""
+        buffer = bytearray()
+        while len(buffer) < size:
+            data = stream.read(size - len(buffer))
+            if not data:
+                break
+            buffer.extend(data)
+        return bytes(buffer)
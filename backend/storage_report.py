@@ -0,0 +1,45 @@
+from pymongo import MongoClient
+from config import Config
+from services.storage_service import StorageService
+import sys
+
+def format_bytes(count):
+    """Human-readable byte count"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(count) < 1024:
+            return f"{count:.1f} {unit}" if unit != 'B' else f"{count} B"
+        count /= 1024
+    return f"{count:.1f} TB"
+
+def print_report(report):
+    """Print stored versus logical sizes per backend and content type"""
+    for backend, usage in report.items():
+        if not usage:
+            print(f"\n📦 {backend}: no files")
+            continue
+        
+        print(f"\n📦 {backend}")
+        print(f"   {'content type':<45} {'files':>7} {'logical':>12} {'stored':>12} {'saved':>7}")
+        totals = {'files': 0, 'stored_bytes': 0, 'logical_bytes': 0}
+        rows = sorted(usage.items(), key=lambda item: -item[1]['logical_bytes'])
+        for content_type, row in rows + [('total', totals)]:
+            if content_type != 'total':
+                for key in totals:
+                    totals[key] += row[key]
+            saved = 1 - row['stored_bytes'] / row['logical_bytes'] if row['logical_bytes'] else 0
+            print(f"   {str(content_type or 'unknown'):<45} {row['files']:>7} "
+                  f"{format_bytes(row['logical_bytes']):>12} {format_bytes(row['stored_bytes']):>12} {saved:>6.1%}")
+
+def main():
+    """Print stored versus logical (uncompressed) file sizes"""
+    mongo_client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
+    storage_service = StorageService(mongo_client.notehub)
+    
+    print("📊 Storage usage by backend and content type")
+    print_report(storage_service.storage_report())
+    
+    mongo_client.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
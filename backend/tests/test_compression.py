@@ -0,0 +1,73 @@
+import io
+import os
+import zlib
+import pytest
+from services.compression import DeflatingReader, InflatingFile, is_compressed, DEFLATE_ENCODING
+
+class FakeStoredFile(io.BytesIO):
+    """In-memory stand-in for a StoredFile holding compressed data"""
+    
+    def __init__(self, data, logical_length):
+        super().__init__(data)
+        self.length = len(data)
+        self.metadata = {'encoding': DEFLATE_ENCODING, 'logical_length': logical_length}
+        self.content_type = 'text/plain'
+        self.filename = 'notes.txt'
+        self.upload_date = None
+
+def _compress(data, read_size=-1):
+    """Compress data through DeflatingReader, reading read_size bytes at a time"""
+    reader = DeflatingReader(io.BytesIO(data))
+    if read_size < 0:
+        return reader.read()
+    blocks = []
+    while True:
+        block = reader.read(read_size)
+        if not block:
+            return b''.join(blocks)
+        blocks.append(block)
+
+# Compressible text plus incompressible bytes, longer than several read blocks
+SAMPLE = b'lecture notes ' * 50000 + os.urandom(300000)
+
+@pytest.mark.parametrize('read_size', [-1, 1, 4096, 255 * 1024])
+def test_deflating_reader_round_trip(read_size):
+    assert zlib.decompress(_compress(SAMPLE, read_size)) == SAMPLE
+
+def test_deflating_reader_empty_stream():
+    assert zlib.decompress(_compress(b'')) == b''
+
+def test_inflating_file_reads_whole_file():
+    with InflatingFile(FakeStoredFile(_compress(SAMPLE), len(SAMPLE))) as inflated:
+        assert inflated.length == len(SAMPLE)
+        assert inflated.stored_length < len(SAMPLE)
+        assert inflated.read() == SAMPLE
+
+@pytest.mark.parametrize('start, end', [
+    (0, 1),
+    (10, 20),
+    (InflatingFile.BLOCK_SIZE - 3, InflatingFile.BLOCK_SIZE + 3),
+    (len(SAMPLE) - 5, len(SAMPLE)),
+    (len(SAMPLE) - 5, len(SAMPLE) + 100),  # End past the file is clamped
+    (123457, None)
+])
+def test_inflating_file_byte_ranges(start, end):
+    inflated = InflatingFile(FakeStoredFile(_compress(SAMPLE), len(SAMPLE)), start, end)
+    expected = SAMPLE[start:end]
+    
+    blocks = []
+    while True:
+        block = inflated.read(7777)
+        if not block:
+            break
+        blocks.append(block)
+    assert b''.join(blocks) == expected
+
+def test_inflating_file_range_past_end_is_empty():
+    inflated = InflatingFile(FakeStoredFile(_compress(SAMPLE), len(SAMPLE)), len(SAMPLE) + 10)
+    assert inflated.read() == b''
+
+def test_is_compressed():
+    assert is_compressed({'metadata': {'encoding': DEFLATE_ENCODING}})
+    assert not is_compressed({'metadata': None})
+    assert is_compressed(FakeStoredFile(b'', 0))
@@ -0,0 +1,23 @@
+import pytest
+
+# StorageService imports the MongoDB driver
+pytest.importorskip('gridfs')
+pytest.importorskip('dotenv')
+
+from config import Config
+from services.storage_service import StorageService
+
+@pytest.mark.parametrize('content_type, chunk_size', [
+    ('application/pdf', Config.STORAGE_CHUNK_SIZES['application/pdf']),
+    ('Application/PDF; charset=binary', Config.STORAGE_CHUNK_SIZES['application/pdf']),
+    ('image/png', Config.STORAGE_CHUNK_SIZES['image/']),
+    ('text/plain', Config.STORAGE_DEFAULT_CHUNK_SIZE),
+    (None, Config.STORAGE_DEFAULT_CHUNK_SIZE)
+])
+def test_chunk_size_for(content_type, chunk_size):
+    assert StorageService.chunk_size_for(content_type) == chunk_size
+
+def test_should_compress():
+    assert StorageService.should_compress('text/plain; charset=utf-8')
+    assert not StorageService.should_compress('application/pdf')
+    assert not StorageService.should_compress(None)
@@ -0,0 +1,132 @@
+from pymongo import MongoClient
+from config import Config
+from services.job_queue import JobQueue
+from services.job_handlers import HANDLERS, PERIODIC_JOBS, JobContext
+from contextlib import contextmanager
+import multiprocessing
+import threading
+import signal
+import socket
+import time
+import os
+
+@contextmanager
+def keep_job_locked(job_queue, job):
+    """Refresh a job's lock from a background thread while its handler runs, so requeue_stale leaves it alone"""
+    done = threading.Event()
+    
+    def beat():
+        while not done.wait(Config.JOB_HEARTBEAT_INTERVAL):
+            try:
+                job_queue.heartbeat(job)
+            except Exception as e:
+                print(f"Error refreshing lock of job {job['_id']}: {e}")
+    
+    thread = threading.Thread(target=beat, name='job-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+def run_worker(worker_number, stop_event):
+    """Claim and run jobs until asked to stop"""
+    # Shutdown is coordinated by the parent process through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    
+    # Each process needs its own client; MongoClient is not fork-safe
+    mongo_client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
+    db = mongo_client.notehub
+    job_queue = JobQueue(db)
+    context = JobContext(db)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    
+    print(f"👷 Worker {worker_number} started ({worker_id})")
+    
+    while not stop_event.is_set():
+        try:
+            job = job_queue.claim(worker_id)
+        except Exception as e:
+            print(f"Error claiming job: {e}")
+            stop_event.wait(Config.JOB_POLL_INTERVAL)
+            continue
+        
+        if not job:
+            stop_event.wait(Config.JOB_POLL_INTERVAL)
+            continue
+        
+        handler = HANDLERS.get(job['type'])
+        if not handler:
+            # Retrying will not make an unknown job type runnable
+            job['attempts'] = job['max_attempts']
+            job_queue.fail(job, f"Unknown job type: {job['type']}")
+            continue
+        
+        try:
+            with keep_job_locked(job_queue, job):
+                result = handler(context, job['payload'])
+            job_queue.complete(job, result)
+        except Exception as e:
+            print(f"Error running job {job['_id']} ({job['type']}): {e}")
+            job_queue.fail(job, str(e))
+    
+    mongo_client.close()
+    print(f"👷 Worker {worker_number} stopped")
+
+def schedule_periodic_jobs(job_queue):
+    """Enqueue maintenance jobs that are due and release jobs of dead workers"""
+    now = time.time()
+    for job_type, interval in PERIODIC_JOBS:
+        # One job per interval; the idempotency key makes concurrent schedulers harmless
+        bucket = int(now // interval)
+        job_queue.enqueue(
+            job_type,
+            priority=JobQueue.PRIORITY_LOW,
+            idempotency_key=f"{job_type}:{bucket}"
+        )
+    job_queue.requeue_stale()
+
+def main():
+    """Start the worker pool and the periodic job scheduler"""
+    stop_event = multiprocessing.Event()
+    
+    def request_stop(signum, frame):
+        print("\n🛑 Stopping workers...")
+        stop_event.set()
+    
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    
+    mongo_client = MongoClient(Config.MONGODB_URI, serverSelectionTimeoutMS=5000)
+    db = mongo_client.notehub
+    JobQueue.create_indexes(db)
+    job_queue = JobQueue(db)
+    
+    # Copy uploader name and college onto resources stored before they were denormalized (once)
+    job_queue.enqueue('sync_uploader_info', idempotency_key='sync_uploader_info:backfill')
+    
+    print(f"\n🚀 Starting NoteHub job workers...")
+    print(f"👷 Workers: {Config.JOB_WORKERS}\n")
+    
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(number, stop_event), name=f"notehub-worker-{number}")
+        for number in range(Config.JOB_WORKERS)
+    ]
+    for process in processes:
+        process.start()
+    
+    while not stop_event.is_set():
+        try:
+            schedule_periodic_jobs(job_queue)
+        except Exception as e:
+            print(f"Error scheduling periodic jobs: {e}")
+        stop_event.wait(Config.JOB_SCHEDULER_INTERVAL)
+    
+    for process in processes:
+        process.join()
+    mongo_client.close()
+
+if __name__ == '__main__':
+    main()
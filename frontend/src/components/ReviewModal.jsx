@@ -5,7 +5,9 @@ import '../styles/resources.css'; // Reusing existing styles or add specific one
 
 const ReviewModal = ({ isOpen, onClose, resource, onReviewSubmitted }) => {
     const [reviews, setReviews] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [submitting, setSubmitting] = useState(false);
     const [userRating, setUserRating] = useState(0);
     const [userComment, setUserComment] = useState('');
@@ -27,7 +29,8 @@ const ReviewModal = ({ isOpen, onClose, resource, onReviewSubmitted }) => {
         try {
             setLoading(true);
             const data = await resourceService.getReviews(resource._id);
-            setReviews(data);
+            setReviews(data.reviews);
+            setNextCursor(data.next_cursor);
         } catch (err) {
             console.error("Failed to fetch reviews", err);
         } finally {
@@ -35,6 +38,19 @@ const ReviewModal = ({ isOpen, onClose, resource, onReviewSubmitted }) => {
         }
     };
 
+    const fetchMoreReviews = async () => {
+        try {
+            setLoadingMore(true);
+            const data = await resourceService.getReviews(resource._id, nextCursor);
+            setReviews(prev => [...prev, ...data.reviews]);
+            setNextCursor(data.next_cursor);
+        } catch (err) {
+            console.error("Failed to fetch reviews", err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleSubmit = async (e) => {
         e.preventDefault();
         if (userRating === 0) {
@@ -128,6 +144,15 @@ const ReviewModal = ({ isOpen, onClose, resource, onReviewSubmitted }) => {
                             </div>
                         ))
                     )}
+                    {!loading && nextCursor && (
+                        <button
+                            className="btn btn-secondary btn-sm"
+                            onClick={fetchMoreReviews}
+                            disabled={loadingMore}
+                        >
+                            {loadingMore ? 'Loading...' : 'Load more reviews'}
+                        </button>
+                    )}
                 </div>
             </div>
         </div>
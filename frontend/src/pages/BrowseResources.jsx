@@ -197,6 +197,7 @@ const BrowseResources = () => {
                                 <option value="latest">Latest Uploads</option>
                                 <option value="popular">Most Popular</option>
                                 <option value="rated">Highest Rated</option>
+                                <option value="trending">Trending</option>
                             </select>
                         </div>
                     </div>
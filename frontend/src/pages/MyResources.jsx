@@ -34,7 +34,10 @@ const MyResources = () => {
                 semester: filterSemester,
                 search: searchTerm
             };
-            const data = await resourceService.getMyResources(filters);
+            // Unfiltered lists only fetch what changed since the last visit
+            const data = filterType || filterSemester || searchTerm
+                ? await resourceService.getMyResources(filters)
+                : await resourceService.syncMyResources();
             setResources(data);
             setError('');
         } catch (err) {
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import resourceService from '../services/resourceService';
 import '../styles/resources.css';
@@ -24,6 +24,35 @@ const UploadResource = () => {
     });
 
     const [tagInput, setTagInput] = useState('');
+    const [subjectSuggestions, setSubjectSuggestions] = useState([]);
+    const [tagSuggestions, setTagSuggestions] = useState([]);
+
+    // Fetch autocomplete suggestions shortly after the user stops typing
+    useEffect(() => {
+        if (!formData.subject.trim()) {
+            setSubjectSuggestions([]);
+            return;
+        }
+        const timer = setTimeout(() => {
+            resourceService.getSuggestions('subjects', formData.subject)
+                .then(setSubjectSuggestions)
+                .catch(() => setSubjectSuggestions([]));
+        }, 150);
+        return () => clearTimeout(timer);
+    }, [formData.subject]);
+
+    useEffect(() => {
+        if (!tagInput.trim()) {
+            setTagSuggestions([]);
+            return;
+        }
+        const timer = setTimeout(() => {
+            resourceService.getSuggestions('tags', tagInput)
+                .then(setTagSuggestions)
+                .catch(() => setTagSuggestions([]));
+        }, 150);
+        return () => clearTimeout(timer);
+    }, [tagInput]);
 
     const resourceTypes = [
         'Notes',
@@ -252,8 +281,14 @@ const UploadResource = () => {
                                 onChange={handleChange}
                                 minLength="2"
                                 maxLength="100"
+                                list="subject-suggestions"
                                 required
                             />
+                            <datalist id="subject-suggestions">
+                                {subjectSuggestions.map((suggestion) => (
+                                    <option key={suggestion.value} value={suggestion.value} />
+                                ))}
+                            </datalist>
                         </div>
 
                         <div className="input-group">
@@ -396,6 +431,7 @@ const UploadResource = () => {
                                     type="text"
                                     className="input-field"
                                     placeholder="Add tag (e.g., arrays, recursion)"
+                                    list="tag-suggestions"
                                     value={tagInput}
                                     onChange={(e) => setTagInput(e.target.value)}
                                     onKeyPress={(e) => {
@@ -405,6 +441,11 @@ const UploadResource = () => {
                                     }}
                                     disabled={formData.tags.length >= 10}
                                 />
+                                <datalist id="tag-suggestions">
+                                    {tagSuggestions.map((suggestion) => (
+                                        <option key={suggestion.value} value={suggestion.value} />
+                                    ))}
+                                </datalist>
                                 <button
                                     type="button"
                                     onClick={handleAddTag}
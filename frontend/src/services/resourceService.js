@@ -22,6 +22,23 @@ const createAuthRequest = async () => {
     };
 };
 
+// Seconds the server asked to wait before retrying (429/503 with Retry-After), or null for other errors
+const getRetryAfter = (error) => {
+    const response = error.response;
+    if (!response || (response.status !== 429 && response.status !== 503)) return null;
+    const seconds = Number(response.headers['retry-after']);
+    return Number.isFinite(seconds) && seconds > 0 ? seconds : 1;
+};
+
+const wait = (seconds) => new Promise((resolve) => setTimeout(resolve, seconds * 1000));
+
+// Local copy of the current user's resources, kept up to date with delta syncs
+const myResourcesCopy = {
+    uid: null,
+    cursor: null,
+    resources: new Map()
+};
+
 const resourceService = {
     /**
      * Upload a new resource with file
@@ -70,6 +87,130 @@ const resourceService = {
         return response.data;
     },
 
+    /**
+     * Upload a large file in chunks, resuming from the committed offset after failures
+     * @param {File} file - The file to upload
+     * @param {Object} metadata - Resource metadata
+     * @param {Function} onProgress - Optional callback receiving the uploaded fraction
+     * @param {string} sessionId - Optional existing session to resume
+     * @returns {Promise<Object>} - Uploaded resource data
+     */
+    uploadResourceResumable: async (file, metadata, onProgress, sessionId = null) => {
+        let config = await createAuthRequest();
+        let session;
+
+        if (sessionId) {
+            const response = await axios.get(`${API_URL}/resources/uploads/${sessionId}`, config);
+            session = response.data.session;
+        } else {
+            const response = await axios.post(
+                `${API_URL}/resources/uploads`,
+                {
+                    file_name: file.name,
+                    file_size: file.size,
+                    file_type: file.type,
+                    title: metadata.title,
+                    subject: metadata.subject,
+                    semester: metadata.semester,
+                    resource_type: metadata.resourceType,
+                    year: metadata.year,
+                    description: metadata.description || '',
+                    tags: metadata.tags || [],
+                    privacy: metadata.privacy || 'Private'
+                },
+                config
+            );
+            session = response.data.session;
+        }
+
+        // Send whole server chunks, about 8MB per request, to keep round trips low
+        const requestSize = session.chunk_size * Math.max(1, Math.floor((8 * 1024 * 1024) / session.chunk_size));
+        let retries = 0;
+
+        while (session.committed_offset < session.file_size) {
+            const start = session.committed_offset;
+            const end = Math.min(start + requestSize, session.file_size);
+            try {
+                config = await createAuthRequest();
+                const response = await axios.put(
+                    `${API_URL}/resources/uploads/${session.session_id}`,
+                    file.slice(start, end),
+                    {
+                        ...config,
+                        headers: {
+                            ...config.headers,
+                            'Content-Type': 'application/octet-stream',
+                            'Content-Range': `bytes ${start}-${end - 1}/${session.file_size}`
+                        }
+                    }
+                );
+                session = response.data.session;
+                retries = 0;
+            } catch (error) {
+                // Being throttled is not a failure: wait as told and try again
+                const retryAfter = getRetryAfter(error);
+                if (retryAfter !== null) {
+                    await wait(retryAfter);
+                    continue;
+                }
+                // Resume from whatever the server committed before the failure
+                if (retries >= 5) throw error;
+                retries += 1;
+                const response = await axios.get(`${API_URL}/resources/uploads/${session.session_id}`, config);
+                session = response.data.session;
+            }
+            if (onProgress) onProgress(session.committed_offset / session.file_size);
+        }
+
+        const response = await axios.post(
+            `${API_URL}/resources/uploads/${session.session_id}/complete`,
+            {},
+            config
+        );
+        return response.data;
+    },
+
+    /**
+     * Upload several resources in one request
+     * @param {Array<{file: File, metadata: Object}>} items - Files with their metadata
+     * @returns {Promise<Object>} - Per-file upload results
+     */
+    bulkUploadResources: async (items) => {
+        const config = await createAuthRequest();
+
+        const formData = new FormData();
+        const metadataList = items.map(({ file, metadata }) => {
+            formData.append('files', file);
+            return {
+                title: metadata.title,
+                subject: metadata.subject,
+                semester: metadata.semester,
+                resource_type: metadata.resourceType,
+                year: metadata.year,
+                description: metadata.description || '',
+                tags: metadata.tags || [],
+                privacy: metadata.privacy || 'Private'
+            };
+        });
+        formData.append('metadata', JSON.stringify(metadataList));
+
+        const response = await axios.post(
+            `${API_URL}/resources/bulk-upload`,
+            formData,
+            {
+                ...config,
+                headers: {
+                    ...config.headers,
+                    'Content-Type': 'multipart/form-data'
+                },
+                // Partial success is reported per file with a 207 status
+                validateStatus: (status) => status === 201 || status === 207
+            }
+        );
+
+        return response.data;
+    },
+
     /**
      * Get all resources uploaded by the current user
      * @param {Object} filters - Optional filters (type, semester, search)
@@ -91,6 +232,41 @@ const resourceService = {
         return response.data.resources;
     },
 
+    /**
+     * Get all resources of the current user from a local copy that is
+     * brought up to date with only the changes since the previous call
+     * @returns {Promise<Array>} - List of resources, newest first
+     */
+    syncMyResources: async () => {
+        const uid = auth.currentUser ? auth.currentUser.uid : null;
+        if (myResourcesCopy.uid !== uid) {
+            myResourcesCopy.uid = uid;
+            myResourcesCopy.cursor = null;
+            myResourcesCopy.resources = new Map();
+        }
+
+        const config = await createAuthRequest();
+        const params = new URLSearchParams();
+        if (myResourcesCopy.cursor) params.append('since', myResourcesCopy.cursor);
+
+        const response = await axios.get(
+            `${API_URL}/resources/my-resources?${params.toString()}`,
+            config
+        );
+        const data = response.data;
+
+        // A first fetch or a reset replaces the copy; a delta is merged into it
+        if (!myResourcesCopy.cursor || data.reset) {
+            myResourcesCopy.resources = new Map();
+        }
+        data.resources.forEach((resource) => myResourcesCopy.resources.set(resource._id, resource));
+        (data.deleted || []).forEach((resourceId) => myResourcesCopy.resources.delete(resourceId));
+        myResourcesCopy.cursor = data.cursor;
+
+        return Array.from(myResourcesCopy.resources.values())
+            .sort((a, b) => b.created_at.localeCompare(a.created_at));
+    },
+
     /**
      * Get a single resource by ID
      * @param {string} resourceId - Resource ID
@@ -148,6 +324,42 @@ const resourceService = {
         return response.data;
     },
 
+    /**
+     * Get the small preview of a resource (first page, thumbnail or text snippet)
+     * @param {string} resourceId - Resource ID
+     * @returns {Promise<Blob|null>} - Preview blob, or null if no preview exists
+     */
+    getResourcePreview: async (resourceId) => {
+        const config = await createAuthRequest();
+        try {
+            const response = await axios.get(
+                `${API_URL}/resources/preview/${resourceId}`,
+                {
+                    ...config,
+                    responseType: 'blob'
+                }
+            );
+            return response.data;
+        } catch (error) {
+            if (error.response?.status === 404) return null;
+            throw error;
+        }
+    },
+
+    /**
+     * Get resources similar to a resource
+     * @param {string} resourceId - Resource ID
+     * @returns {Promise<Array>} - Related resources, most similar first
+     */
+    getRelatedResources: async (resourceId) => {
+        const config = await createAuthRequest();
+        const response = await axios.get(
+            `${API_URL}/resources/${resourceId}/related`,
+            config
+        );
+        return response.data.resources;
+    },
+
     /**
      * Update resource metadata
      * @param {string} resourceId - Resource ID
@@ -187,6 +399,42 @@ const resourceService = {
         return response.data;
     },
 
+    /**
+     * Update metadata of several resources at once
+     * @param {Array<Object>} updates - Objects with an id and the fields to change
+     * @returns {Promise<Object>} - Per-resource update results
+     */
+    bulkUpdateResources: async (updates) => {
+        const config = await createAuthRequest();
+        const response = await axios.post(
+            `${API_URL}/resources/bulk-update`,
+            { updates },
+            {
+                ...config,
+                validateStatus: (status) => status === 200 || status === 207
+            }
+        );
+        return response.data;
+    },
+
+    /**
+     * Delete several resources at once
+     * @param {Array<string>} resourceIds - Resource IDs
+     * @returns {Promise<Object>} - Per-resource delete results
+     */
+    bulkDeleteResources: async (resourceIds) => {
+        const config = await createAuthRequest();
+        const response = await axios.post(
+            `${API_URL}/resources/bulk-delete`,
+            { ids: resourceIds },
+            {
+                ...config,
+                validateStatus: (status) => status === 200 || status === 207
+            }
+        );
+        return response.data;
+    },
+
     /**
      * Browse all accessible resources (public + private from same college)
      * @param {Object} filters - Optional filters (type, semester, subject, search)
@@ -204,6 +452,8 @@ const resourceService = {
         if (filters.privacy) params.append('privacy', filters.privacy);
         if (filters.sort) params.append('sort', filters.sort);
         if (filters.search) params.append('search', filters.search);
+        if (filters.page) params.append('page', filters.page);
+        if (filters.limit) params.append('limit', filters.limit);
 
         const response = await axios.get(
             `${API_URL}/resources/browse?${params.toString()}`,
@@ -213,6 +463,46 @@ const resourceService = {
         return response.data.resources;
     },
 
+    /**
+     * Get autocomplete suggestions
+     * @param {string} field - 'tags', 'subjects' or 'colleges'
+     * @param {string} prefix - Text typed so far
+     * @returns {Promise<Array>} - Suggestions ({ value, count }), most popular first
+     */
+    getSuggestions: async (field, prefix) => {
+        const config = await createAuthRequest();
+        const response = await axios.get(
+            `${API_URL}/autocomplete/${field}?q=${encodeURIComponent(prefix)}`,
+            config
+        );
+        return response.data.suggestions;
+    },
+
+    /**
+     * Get resource counts for every browse filter (type, semester, branch, year, privacy)
+     * @param {Object} filters - Currently selected filters, same as browseResources
+     * @returns {Promise<Object>} - Facet counts keyed by field
+     */
+    getFacets: async (filters = {}) => {
+        const config = await createAuthRequest();
+
+        const params = new URLSearchParams();
+        if (filters.type) params.append('type', filters.type);
+        if (filters.semester) params.append('semester', filters.semester);
+        if (filters.subject) params.append('subject', filters.subject);
+        if (filters.branch) params.append('branch', filters.branch);
+        if (filters.year) params.append('year', filters.year);
+        if (filters.privacy) params.append('privacy', filters.privacy);
+        if (filters.search) params.append('search', filters.search);
+
+        const response = await axios.get(
+            `${API_URL}/resources/facets?${params.toString()}`,
+            config
+        );
+
+        return response.data.facets;
+    },
+
     /**
      * Add a review for a resource
      * @param {string} resourceId - Resource ID
@@ -230,17 +520,18 @@ const resourceService = {
     },
 
     /**
-     * Get reviews for a resource
+     * Get a page of reviews for a resource, newest first
      * @param {string} resourceId - Resource ID
-     * @returns {Promise<Array>} - List of reviews
+     * @param {string} cursor - next_cursor of the previous page (omit for the first page)
+     * @returns {Promise<Object>} - { reviews, next_cursor, has_more }
      */
-    getReviews: async (resourceId) => {
+    getReviews: async (resourceId, cursor = null) => {
         const config = await createAuthRequest();
         const response = await axios.get(
             `${API_URL}/resources/${resourceId}/reviews`,
-            config
+            { ...config, params: cursor ? { cursor } : {} }
         );
-        return response.data.reviews;
+        return response.data;
     }
 };
 